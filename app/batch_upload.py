@@ -0,0 +1,191 @@
+"""
+Batch uploads and the text extraction pool
+Unpacks multi-file and ZIP uploads, runs extractions a bounded number at a
+time and tracks each batch's progress for polling
+"""
+import asyncio
+import os
+import posixpath
+import uuid
+import zipfile
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterator, Optional, Set, Tuple
+
+from app.models import BatchFileResult, BatchUploadStatus, ProcessingStatus
+from app.pregeneration import get_pregenerator
+
+# Extractions running at once, across single and batch uploads
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", 2))
+# Files accepted per batch, counting each ZIP entry
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 200))
+# Finished batches kept for polling; the oldest are forgotten first
+MAX_TRACKED_BATCHES = 1000
+
+ARCHIVE_EXTENSIONS = (".zip",)
+
+class BatchUploadError(Exception):
+    """Custom exception for batch upload errors"""
+    pass
+
+def is_archive(filename: Optional[str]) -> bool:
+    """True for uploads that are unpacked instead of stored"""
+    return bool(filename) and filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def iter_archive(fileobj: BinaryIO, max_file_size: int) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """(filename, content, error) per file entry of a ZIP archive, read one entry at a time.
+
+    Blocking; content is None when the entry is too large, in which case only
+    max_file_size + 1 bytes of it were decompressed.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise BatchUploadError(f"Not a valid ZIP archive: {e}")
+    with archive:
+        for info in archive.infolist():
+            name = posixpath.basename(info.filename)
+            # Skip folders and resource-fork / hidden files added by archivers
+            if info.is_dir() or not name or name.startswith(".") or "__MACOSX/" in info.filename:
+                continue
+            if info.file_size > max_file_size:
+                yield name, None, "File too large."
+                continue
+            try:
+                with archive.open(info) as entry:
+                    content = entry.read(max_file_size + 1)
+            except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+                yield name, None, f"Unreadable archive entry: {e}"
+                continue
+            if len(content) > max_file_size:
+                yield name, None, "File too large."
+                continue
+            yield name, content, None
+
+class BatchTracker:
+    """Progress of recent batches, kept in this process"""
+
+    def __init__(self, max_batches: int = MAX_TRACKED_BATCHES):
+        self.max_batches = max_batches
+        self._batches: "OrderedDict[str, BatchUploadStatus]" = OrderedDict()
+        self._positions: Dict[Tuple[str, str], int] = {}
+
+    def create(self) -> BatchUploadStatus:
+        """Start tracking a new, empty batch"""
+        batch = BatchUploadStatus(batch_id=str(uuid.uuid4()), status=ProcessingStatus.PENDING)
+        self._batches[batch.batch_id] = batch
+        while len(self._batches) > self.max_batches:
+            old_id, old = self._batches.popitem(last=False)
+            for item in old.files:
+                self._positions.pop((old_id, item.file_id), None)
+        return batch
+
+    def get(self, batch_id: str) -> Optional[BatchUploadStatus]:
+        """Current status of a batch"""
+        return self._batches.get(batch_id)
+
+    def add_file(self, batch: BatchUploadStatus, item: BatchFileResult) -> None:
+        """Record a file of the batch (rejected files have no file_id)"""
+        if item.file_id:
+            self._positions[(batch.batch_id, item.file_id)] = len(batch.files)
+        batch.files.append(item)
+        self._refresh(batch)
+
+    def update(self, batch_id: str, file_id: str, status: ProcessingStatus,
+               message: Optional[str] = None, word_count: Optional[int] = None) -> None:
+        """Set the extraction state of one file of a batch"""
+        batch = self._batches.get(batch_id)
+        position = self._positions.get((batch_id, file_id))
+        if batch is None or position is None:
+            return
+        item = batch.files[position]
+        item.status, item.message, item.word_count = status, message, word_count
+        self._refresh(batch)
+
+    def _refresh(self, batch: BatchUploadStatus) -> None:
+        counts = {status: 0 for status in ProcessingStatus}
+        for item in batch.files:
+            counts[item.status] += 1
+        batch.total = len(batch.files)
+        batch.completed = counts[ProcessingStatus.COMPLETED]
+        batch.failed = counts[ProcessingStatus.FAILED]
+        if counts[ProcessingStatus.PENDING] == batch.total:
+            batch.status = ProcessingStatus.PENDING
+        elif counts[ProcessingStatus.PENDING] or counts[ProcessingStatus.PROCESSING]:
+            batch.status = ProcessingStatus.PROCESSING
+        else:
+            # Done; a batch fails only if no file in it could be extracted
+            batch.status = ProcessingStatus.COMPLETED if batch.completed else ProcessingStatus.FAILED
+
+class ExtractionPool:
+    """Text extraction for uploaded files, at most `concurrency` at a time.
+
+    Parsing runs in worker threads (see QuizGeneratorService); the bound keeps
+    a large batch from occupying every thread while single uploads wait.
+    """
+
+    def __init__(self, concurrency: int = EXTRACTION_CONCURRENCY,
+                 tracker: Optional[BatchTracker] = None):
+        self.concurrency = concurrency
+        self.tracker = tracker if tracker is not None else batch_tracker
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._running = 0
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+    def submit(self, file_id: str, quiz_generator, batch_id: Optional[str] = None) -> asyncio.Task:
+        """Queue extraction of a stored file"""
+        self.stats["submitted"] += 1
+        task = asyncio.create_task(self._run(file_id, quiz_generator, batch_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, file_id: str, quiz_generator, batch_id: Optional[str]) -> None:
+        async with self._semaphore:
+            self._running += 1
+            if batch_id:
+                self.tracker.update(batch_id, file_id, ProcessingStatus.PROCESSING)
+            try:
+                result = await quiz_generator.extract_text_from_file(file_id)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"❌ Text extraction failed for file {file_id}: {e}")
+                if batch_id:
+                    self.tracker.update(batch_id, file_id, ProcessingStatus.FAILED, message=str(e))
+                return
+            finally:
+                self._running -= 1
+        self.stats["completed"] += 1
+        print(f"Text extraction completed for file: {file_id}")
+        if batch_id:
+            self.tracker.update(batch_id, file_id, ProcessingStatus.COMPLETED,
+                                word_count=result.word_count)
+
+        # Opt-in: use idle LLM capacity to seed the question bank
+        get_pregenerator().schedule(file_id, quiz_generator)
+
+    async def join(self) -> None:
+        """Wait for every queued extraction to finish"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def status(self) -> dict:
+        """Concurrency limit, queue depth and counters"""
+        return {
+            "concurrency": self.concurrency,
+            "running": self._running,
+            "queued": len(self._tasks) - self._running,
+            **self.stats,
+        }
+
+# Global batch tracker and extraction pool
+batch_tracker = BatchTracker()
+extraction_pool = ExtractionPool()
+
+def get_batch_tracker() -> BatchTracker:
+    """Get batch tracker instance"""
+    return batch_tracker
+
+def get_extraction_pool() -> ExtractionPool:
+    """Get extraction pool instance"""
+    return extraction_pool
@@ -0,0 +1,182 @@
+"""
+Tiered blob store for Quiz Generator
+Keeps raw upload bytes in a bounded memory tier and spills the rest to
+local disk, where reads go through memory-mapped files
+"""
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional
+
+class BlobStoreError(Exception):
+    """Custom exception for blob store errors"""
+    pass
+
+class BlobStore:
+    """Two-tier byte store: an LRU memory tier capped by BLOB_MEMORY_BUDGET_MB
+    and a disk tier under BLOB_STORE_DIR (a temporary directory by default).
+
+    Blobs that no longer fit in the budget, or that are explicitly demoted,
+    are written to disk and dropped from memory. Disk reads map the file
+    instead of buffering it, so the copy comes straight from the page cache.
+    With write_through every blob is also written to disk on put, so the
+    directory survives restarts and can be re-attached with adopt().
+    """
+
+    def __init__(self, directory: Optional[str] = None, memory_budget: Optional[int] = None,
+                 write_through: bool = False):
+        if memory_budget is None:
+            memory_budget = int(float(os.getenv("BLOB_MEMORY_BUDGET_MB", "64")) * 1024 * 1024)
+        self.memory_budget = memory_budget
+        self._directory = directory or os.getenv("BLOB_STORE_DIR") or None
+        self._owns_directory = self._directory is None
+        self.write_through = write_through
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Removes a directory the store created once the store is gone, even without close()
+        self._cleanup: Optional[weakref.finalize] = None
+
+    @property
+    def directory(self) -> str:
+        """Disk tier location, created on first spill"""
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="quiz_generator_blobs_")
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._directory, ignore_errors=True)
+        os.makedirs(self._directory, exist_ok=True)
+        return self._directory
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a blob in memory, spilling least recently used blobs past the budget"""
+        with self._lock:
+            self._discard(key)
+            if self.write_through or len(data) > self.memory_budget:
+                self._write_disk(key, data)
+            if len(data) > self.memory_budget:
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.memory_budget:
+                oldest, _ = next(iter(self._memory.items()))
+                self._spill(oldest)
+
+    def put_file(self, key: str, path: str) -> None:
+        """Move a file into the disk tier, taking ownership of it; nothing is read into memory"""
+        with self._lock:
+            self._discard(key)
+            try:
+                shutil.move(path, self._path(key))
+                self._disk_sizes[key] = os.path.getsize(self._path(key))
+            except OSError as e:
+                raise BlobStoreError(f"Failed to move blob {key}: {str(e)}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Read a blob from whichever tier holds it"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            if key not in self._disk_sizes:
+                return None
+            if self._disk_sizes[key] == 0:
+                return b""
+            with open(self._path(key), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return mapped[:]
+
+    def locate(self, key: str) -> Optional[str]:
+        """Path of the blob's disk copy, writing one first if it only lives in memory"""
+        with self._lock:
+            if key not in self._disk_sizes:
+                data = self._memory.get(key)
+                if data is None:
+                    return None
+                self._write_disk(key, data)
+            return self._path(key)
+
+    def demote(self, key: str) -> bool:
+        """Move a blob to the disk tier now. Returns False if it is not in memory"""
+        with self._lock:
+            if key not in self._memory:
+                return False
+            self._spill(key)
+            return True
+
+    def adopt(self, key: str) -> bool:
+        """Register a blob already present in the disk tier directory"""
+        with self._lock:
+            try:
+                self._disk_sizes[key] = os.path.getsize(self._path(key))
+            except OSError:
+                return False
+            return True
+
+    def delete(self, key: str) -> bool:
+        """Remove a blob from both tiers"""
+        with self._lock:
+            return self._discard(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or key in self._disk_sizes
+
+    def stats(self) -> dict:
+        """Blob counts and byte totals per tier"""
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "memory_bytes": self._memory_bytes,
+                "memory_blobs": len(self._memory),
+                "disk_bytes": sum(self._disk_sizes.values()),
+                "disk_blobs": len(self._disk_sizes),
+            }
+
+    def close(self) -> None:
+        """Remove the disk tier if the store created its directory"""
+        with self._lock:
+            if self._owns_directory and self._directory:
+                if self._cleanup is not None:
+                    self._cleanup()
+                self._directory = None
+                self._disk_sizes.clear()
+
+    def _spill(self, key: str) -> None:
+        data = self._memory.pop(key)
+        self._memory_bytes -= len(data)
+        if key not in self._disk_sizes:
+            self._write_disk(key, data)
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            raise BlobStoreError(f"Failed to write blob {key}: {str(e)}")
+        self._disk_sizes[key] = len(data)
+
+    def _discard(self, key: str) -> bool:
+        found = False
+        data = self._memory.pop(key, None)
+        if data is not None:
+            self._memory_bytes -= len(data)
+            found = True
+        if self._disk_sizes.pop(key, None) is not None:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            found = True
+        return found
+
+    def _path(self, key: str) -> str:
+        # Keys are generated file ids; keep path components out of the name
+        return os.path.join(self.directory, key.replace(os.sep, "_"))
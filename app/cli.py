@@ -0,0 +1,271 @@
+"""
+Offline bulk quiz generation
+Walks a directory, extracts text on a process pool and generates quizzes
+with bounded concurrency, writing JSONL or into the configured storage
+
+Usage:
+    python -m app.cli /path/to/course --output quizzes.jsonl --num-questions 10
+    python -m app.cli /path/to/course --store   # DATABASE_URL backend
+
+Completed files are appended to a checkpoint file (default: next to the
+output, or .quizgen-checkpoint.jsonl in the directory with --store); a
+re-run skips them unless they changed. The JSONL output is in the format
+POST /api/quizzes/import accepts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.database import InMemoryDatabase, close_db, get_database, init_db, run_db
+from app.file_parser import FileParser, get_file_type, validate_file_type
+from app.models import QuestionType, QuizGenerationRequest, TextExtractionResult
+from app.quiz_generator import QuizGeneratorService
+from app.scheduler import Priority, scheduling_context
+
+DEFAULT_CHECKPOINT_NAME = ".quizgen-checkpoint.jsonl"
+
+class CLIError(Exception):
+    """Raised for invalid command-line input"""
+    pass
+
+@dataclass
+class RunStats:
+    """Counters for the end-of-run throughput summary"""
+    found: int = 0
+    skipped: int = 0
+    completed: int = 0
+    failed: int = 0
+    questions: int = 0
+    source_bytes: int = 0
+    extraction_seconds: float = 0.0
+    generation_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        processed = self.completed + self.failed
+        rate = processed / elapsed if elapsed else 0.0
+        return "\n".join([
+            f"Files: {self.found} found, {self.skipped} skipped (checkpoint), "
+            f"{self.completed} completed, {self.failed} failed",
+            f"Questions: {self.questions} ({self.questions / elapsed * 60 if elapsed else 0:.1f}/min)",
+            f"Throughput: {rate:.2f} files/s, {self.source_bytes / elapsed / 1e6 if elapsed else 0:.2f} MB/s "
+            f"of source over {elapsed:.1f}s",
+            f"Time per file: extraction {self.extraction_seconds / processed if processed else 0:.2f}s, "
+            f"generation {self.generation_seconds / processed if processed else 0:.2f}s",
+        ])
+
+def find_documents(root: str) -> List[str]:
+    """Supported documents under root, as sorted relative paths"""
+    found = []
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories[:] = sorted(d for d in subdirectories if not d.startswith("."))
+        for filename in filenames:
+            if not filename.startswith(".") and validate_file_type(filename):
+                found.append(os.path.relpath(os.path.join(directory, filename), root))
+    return sorted(found)
+
+def file_fingerprint(path: str) -> Tuple[int, int]:
+    """(size, mtime in ns); a changed file is generated again"""
+    status = os.stat(path)
+    return status.st_size, status.st_mtime_ns
+
+def is_done(done: Dict[str, Tuple[int, int]], directory: str, path: str) -> bool:
+    """Whether a checkpointed file is unchanged; one that cannot be read is not,
+    so processing it records the failure"""
+    try:
+        return done.get(path) == file_fingerprint(os.path.join(directory, path))
+    except OSError:
+        return False
+
+def load_checkpoint(path: str) -> Dict[str, Tuple[int, int]]:
+    """Completed files recorded by earlier runs, with the fingerprint they had"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line of an interrupted run
+            if record.get("status") == "completed":
+                done[record["path"]] = (record["size"], record["mtime_ns"])
+    return done
+
+def extract_document(path: str, keep_content: bool) -> Tuple[bytes, str, int, Optional[List[int]], float]:
+    """Read and parse one document; runs in a pool process.
+
+    The raw bytes are only sent back when they are going to be stored.
+    """
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        content = f.read()
+    text, word_count, page_offsets = FileParser.parse_document(os.path.basename(path), content)
+    return content if keep_content else b"", text, word_count, page_offsets, time.perf_counter() - started
+
+class BulkGenerator:
+    """Extraction on a process pool feeding generation with bounded async concurrency"""
+
+    def __init__(self, args: argparse.Namespace, db, output, checkpoint):
+        self.args = args
+        self.db = db
+        self.output = output
+        self.checkpoint = checkpoint
+        self.stats = RunStats()
+        self.service = QuizGeneratorService()
+        self.service.db = db
+
+    async def run(self, paths: List[str], pool: ProcessPoolExecutor) -> RunStats:
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def process(relative_path: str) -> None:
+            async with semaphore:
+                await self._process(relative_path, pool)
+
+        with scheduling_context(Priority.BATCH):
+            await asyncio.gather(*(process(path) for path in paths))
+        return self.stats
+
+    async def _process(self, relative_path: str, pool: ProcessPoolExecutor) -> None:
+        path = os.path.join(self.args.directory, relative_path)
+        file_id = str(uuid.uuid4())
+        record = {"path": relative_path, "file_id": file_id}
+        try:
+            # A file removed since the walk fails on its own instead of ending the run
+            size, mtime_ns = file_fingerprint(path)
+            record.update(size=size, mtime_ns=mtime_ns)
+            content, text, word_count, page_offsets, extraction_time = \
+                await asyncio.get_running_loop().run_in_executor(pool, extract_document, path, self.args.store)
+            self.stats.extraction_seconds += extraction_time
+            self.stats.source_bytes += size
+
+            filename = os.path.basename(relative_path)
+            await run_db(self.db.store_file, file_id, filename, get_file_type(filename), size, content)
+            await run_db(self.db.store_extracted_text, TextExtractionResult(
+                file_id=file_id, text_content=text, word_count=word_count,
+                extraction_time=extraction_time, page_offsets=page_offsets
+            ))
+            del content, text
+
+            started = time.perf_counter()
+            quiz = await self.service.generate_quiz_from_text(QuizGenerationRequest(
+                file_id=file_id,
+                num_questions=self.args.num_questions,
+                question_types=self.args.question_types,
+                difficulty_level=self.args.difficulty,
+                language=self.args.language,
+                # Every file is new, so there is nothing in the bank to reuse
+                use_question_bank=False,
+            ))
+            self.stats.generation_seconds += time.perf_counter() - started
+        except Exception as e:
+            self.stats.failed += 1
+            print(f"❌ {relative_path}: {e}", file=sys.stderr)
+            self._record({**record, "status": "failed", "error": str(e)})
+            await self._discard(file_id)
+            return
+
+        if self.output is not None:
+            self.output.write(quiz.model_dump_json() + "\n")
+            self.output.flush()
+            await self._discard(file_id)
+        self.stats.completed += 1
+        self.stats.questions += len(quiz.questions)
+        self._record({**record, "status": "completed", "quiz_id": quiz.id})
+        print(f"✅ {relative_path}: {len(quiz.questions)} questions")
+
+    async def _discard(self, file_id: str) -> None:
+        """Drop scratch records; with --store a failed file is not kept either"""
+        self.service.question_bank.remove_file(file_id)
+        await run_db(self.db.delete_quizzes_for_file, file_id)
+        await run_db(self.db.delete_file, file_id)
+
+    def _record(self, record: dict) -> None:
+        # Written after the quiz itself, so a crash in between repeats the file, never loses it
+        self.checkpoint.write(json.dumps(record) + "\n")
+        self.checkpoint.flush()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.splitlines()[1])
+    parser.add_argument("directory", help="Directory to walk for PDF, DOCX and TXT files")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", "-o", help="Append quizzes to this JSONL file")
+    target.add_argument("--store", action="store_true",
+                        help="Store files, texts and quizzes in the DATABASE_URL backend")
+    parser.add_argument("--checkpoint", help="Checkpoint file (see above for the default)")
+    parser.add_argument("--num-questions", type=int, default=10)
+    parser.add_argument("--question-types", default=QuestionType.MULTIPLE_CHOICE.value,
+                        help="Comma separated: " + ", ".join(t.value for t in QuestionType))
+    parser.add_argument("--difficulty", default="medium")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Extraction processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_GENERATION_CONCURRENCY", 4)),
+                        help="Files in progress at once; LLM calls are further capped by LLM_MAX_CONCURRENCY")
+    parser.add_argument("--limit", type=int, help="Process at most this many files this run")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        raise CLIError(f"Not a directory: {args.directory}")
+    try:
+        args.question_types = [QuestionType(value.strip()) for value in args.question_types.split(",")
+                               if value.strip()]
+    except ValueError as e:
+        raise CLIError(str(e))
+    if args.checkpoint is None:
+        args.checkpoint = (f"{args.output}.checkpoint" if args.output
+                           else os.path.join(args.directory, DEFAULT_CHECKPOINT_NAME))
+    return args
+
+async def main_async(args: argparse.Namespace) -> RunStats:
+    paths = find_documents(args.directory)
+    done = load_checkpoint(args.checkpoint)
+    pending = [path for path in paths if not is_done(done, args.directory, path)]
+    skipped = len(paths) - len(pending)
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    print(f"{len(paths)} documents, {skipped} already done, {len(pending)} to process")
+
+    if args.store:
+        await init_db()
+        db = get_database()
+    else:
+        # Scratch store: each file's records are dropped once its quiz is written out
+        db = InMemoryDatabase()
+
+    output = open(args.output, "a") if args.output else None
+    checkpoint = open(args.checkpoint, "a")
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            generator = BulkGenerator(args, db, output, checkpoint)
+            generator.stats.found, generator.stats.skipped = len(paths), skipped
+            return await generator.run(pending, pool)
+    finally:
+        checkpoint.close()
+        if output is not None:
+            output.close()
+        if args.store:
+            await close_db()
+        else:
+            db.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    try:
+        args = parse_args(argv)
+    except CLIError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    stats = asyncio.run(main_async(args))
+    print(stats.summary())
+    return 1 if stats.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Response compression for Quiz Generator
+Gzip that flushes every streamed chunk, so NDJSON lines reach the client as
+they are produced instead of all at once when the stream ends
+"""
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Receive, Scope, Send
+
+class FlushingGZipResponder(GZipResponder):
+    """GZipResponder that ends each streamed chunk with a zlib sync flush.
+
+    Starlette's responder leaves chunks in the compressor until it has enough
+    data, which holds back a slow stream until it finishes. A sync flush costs a
+    few bytes per chunk and makes everything written so far decodable.
+    """
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        self.gzip_file.write(body)
+        if more_body:
+            self.gzip_file.flush()  # zlib.Z_SYNC_FLUSH
+        else:
+            self.gzip_file.close()
+
+        body = self.gzip_buffer.getvalue()
+        self.gzip_buffer.seek(0)
+        self.gzip_buffer.truncate()
+        return body
+
+class FlushingGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware whose streamed responses are flushed chunk by chunk"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = FlushingGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -1,24 +1,264 @@
 """
 Database operations for Quiz Generator
-In-memory storage for MVP with PostgreSQL preparation
+Storage interface, the in-memory default backend and backend selection
 """
+import asyncio
+import base64
+import bisect
+import functools
+import hashlib
+import inspect
 import os
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, List, Optional, Protocol, Tuple, TypeVar
 from datetime import datetime
 import json
 import uuid
 
-from app.models import Quiz, QuizQuestion, FileInfo, TextExtractionResult
+from pydantic_core import to_json
+
+from app.blob_store import BlobStore
+from app.memory import MemoryManager
+from app.models import Quiz, QuizQuestion, QuizSummary, FileInfo, TextExtractionResult, TextSlice
+from app.quiz_patch import apply_quiz_patch, check_version, next_version
+from app.text_window import slice_text
+
+T = TypeVar("T")
+
+# Listing order key: (timestamp, id), newest first
+SortKey = Tuple[datetime, str]
+
+# Rough per-entry object overhead added to payload sizes in memory accounting
+ENTRY_OVERHEAD_BYTES = 512
+
+# Bytes charged per question reference in a quiz; the question itself is charged once
+QUESTION_REF_BYTES = 8
+
+# Title prefix given to duplicated quizzes
+DUPLICATE_TITLE_PREFIX = "Copy of "
+
+# Response header carrying the cursor of the next page of a listing
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+    pass
+
+class StorageBackend(Protocol):
+    """Operations every storage backend provides.
+
+    Methods may be plain or coroutine functions; callers on the event loop
+    go through run_db(), which awaits coroutines and moves blocking backends
+    (blocking_io = True), or single methods marked @blocking, onto a worker
+    thread.
+    """
+
+    blocking_io: bool
+    # Largest file the backend can store, or None if only the disk limits it
+    max_file_size: Optional[int]
+
+    def store_file(self, file_id: str, filename: str, file_type: str,
+                   file_size: int, content: bytes) -> FileInfo: ...
+
+    def store_file_from_path(self, file_id: str, filename: str, file_type: str,
+                             file_size: int, path: str) -> FileInfo: ...
+
+    def get_file_info(self, file_id: str) -> Optional[FileInfo]: ...
+
+    def get_file_content(self, file_id: str) -> Optional[bytes]: ...
+
+    def list_files(self, limit: Optional[int] = None,
+                   cursor: Optional[str] = None) -> List[FileInfo]: ...
+
+    def delete_file(self, file_id: str) -> bool: ...
+
+    def get_files_version(self) -> str: ...
+
+    def get_file_version(self, file_id: str) -> Optional[str]: ...
+
+    def store_extracted_text(self, result: TextExtractionResult) -> None: ...
+
+    def get_extracted_text(self, file_id: str) -> Optional[TextExtractionResult]: ...
+
+    def get_text_slice(self, file_id: str, start: int = 0, end: Optional[int] = None,
+                       page: Optional[int] = None) -> Optional[TextSlice]: ...
+
+    def store_quiz(self, quiz: Quiz) -> Quiz: ...
+
+    def store_quizzes(self, quizzes: List[Quiz]) -> int: ...
+
+    def get_quiz(self, quiz_id: str) -> Optional[Quiz]: ...
+
+    def get_quiz_json(self, quiz_id: str) -> Optional[bytes]: ...
+
+    def get_quiz_version(self, quiz_id: str) -> Optional[int]: ...
+
+    def duplicate_quiz(self, quiz_id: str, new_id: str,
+                       created_at: Optional[datetime] = None) -> Optional[Quiz]: ...
+
+    def update_quiz(self, quiz_id: str, updates: dict,
+                    expected_version: Optional[int] = None) -> Optional[Quiz]: ...
+
+    def patch_quiz(self, quiz_id: str, operations: List[dict],
+                   expected_version: Optional[int] = None) -> Optional[Quiz]: ...
+
+    def list_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                     cursor: Optional[str] = None) -> List[Quiz]: ...
+
+    def list_quiz_summaries(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                            cursor: Optional[str] = None) -> List[QuizSummary]: ...
+
+    def export_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                       cursor: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]: ...
+
+    def delete_quiz(self, quiz_id: str) -> bool: ...
+
+    def delete_quizzes_for_file(self, file_id: str) -> int: ...
+
+    def close(self) -> None: ...
+
+async def run_db(method, *args, **kwargs):
+    """Call a storage method from async code without blocking the event loop"""
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    if getattr(method, "blocking_io", False) or getattr(getattr(method, "__self__", None), "blocking_io", False):
+        return await asyncio.to_thread(method, *args, **kwargs)
+    return method(*args, **kwargs)
+
+def blocking(method):
+    """Mark a storage method that does file I/O, so run_db calls it on a worker thread"""
+    method.blocking_io = True
+    return method
+
+def _synchronized(method):
+    """Run an InMemoryDatabase method under the store's state lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def encode_cursor(timestamp: datetime, item_id: str) -> str:
+    """Opaque cursor pointing just past the given listing position"""
+    raw = json.dumps([timestamp.isoformat(), item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Inverse of encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, item_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), str(item_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+def next_page(items: List[T], limit: Optional[int],
+              key: Callable[[T], SortKey]) -> Tuple[List[T], Optional[str]]:
+    """Trim a listing fetched with limit + 1 rows and build the cursor for the next page"""
+    if limit is None or len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(*key(items[-1]))
+
+def split_questions(quiz: Quiz) -> Tuple[str, List[Tuple[str, str]]]:
+    """Quiz JSON with each question replaced by the hash of its JSON, plus the
+    (hash, question JSON) pairs, for backends that store each question once"""
+    data = quiz.model_dump(mode="json")
+    questions = [to_json(question).decode() for question in data["questions"]]
+    hashes = [hashlib.sha256(question.encode()).hexdigest() for question in questions]
+    data["questions"] = hashes
+    return to_json(data).decode(), list(zip(hashes, questions))
+
+def question_ref_changes(questions: List[Tuple[str, str]],
+                         released: List[str]) -> List[Tuple[str, Optional[str], int]]:
+    """(hash, question JSON, reference count change) for a write that stores
+    questions and drops the released references. Sorted by hash, so concurrent
+    writers touch shared question rows in the same order; the JSON is None
+    for questions that are only released."""
+    changes: Dict[str, list] = {}
+    for key in released:
+        changes.setdefault(key, [None, 0])[1] -= 1
+    for key, body in questions:
+        change = changes.setdefault(key, [None, 0])
+        change[0] = body
+        change[1] += 1
+    return [(key, body, delta) for key, (body, delta) in sorted(changes.items()) if delta]
+
+def quiz_sort_key(quiz: Quiz) -> SortKey:
+    """Listing position of a quiz"""
+    return quiz.created_at, quiz.id
+
+def file_sort_key(file_info: FileInfo) -> SortKey:
+    """Listing position of an uploaded file"""
+    return file_info.upload_time, file_info.file_id
+
+def _page(order: List[SortKey], limit: Optional[int], cursor: Optional[str]) -> List[SortKey]:
+    """Keys of one page, newest first, from an ascending key list"""
+    end = bisect.bisect_left(order, decode_cursor(cursor)) if cursor else len(order)
+    start = 0 if limit is None else max(0, end - limit)
+    return order[start:end][::-1]
+
+def _index_remove(order: List[SortKey], key: SortKey) -> None:
+    position = bisect.bisect_left(order, key)
+    if position < len(order) and order[position] == key:
+        del order[position]
 
 class InMemoryDatabase:
-    """In-memory database implementation for MVP"""
+    """In-memory database implementation for MVP.
+
+    Dictionary operations never block, so run_db calls most methods inline.
+    Methods that read or write upload bytes are marked @blocking and run on
+    worker threads; the state lock keeps the dictionaries and indexes
+    consistent between them and the event loop, and blob I/O happens
+    outside it so a large upload never holds up other requests.
+    """
+
+    blocking_io = False
+    # Uploads assembled on disk are moved into the blob store, not read
+    max_file_size = None
     
     def __init__(self):
+        self._lock = threading.RLock()
         self.files: Dict[str, FileInfo] = {}
         self.extracted_texts: Dict[str, TextExtractionResult] = {}
         self.quizzes: Dict[str, Quiz] = {}
-        self.file_contents: Dict[str, bytes] = {}
+        self.quiz_summaries: Dict[str, QuizSummary] = {}
+        # Raw upload bytes; demoted to disk once their text has been extracted
+        self.blobs = BlobStore()
+        # Ascending (timestamp, id) keys, maintained on every store/delete
+        self._quiz_order: List[SortKey] = []
+        self._quiz_order_by_file: Dict[str, List[SortKey]] = {}
+        self._file_order: List[SortKey] = []
+        # Store-wide file change counter and the count at each file's last change,
+        # so file ETags are checked without building the response; the epoch
+        # keeps a restarted store from handing out a count it used before
+        self._files_epoch = uuid.uuid4().hex[:8]
+        self._files_version = 0
+        self._file_versions: Dict[str, int] = {}
+        # Question objects are immutable and shared between quiz versions and
+        # duplicates: id(question) -> [question, reference count, bytes]
+        self._question_refs: Dict[int, list] = {}
+        # Serialized quizzes for GET responses, dropped whenever the quiz changes
+        self._quiz_json: Dict[str, bytes] = {}
+        # Last version of each deleted quiz, so a quiz recreated under the same
+        # ID never repeats an ETag the old one had
+        self._retired_versions: Dict[str, int] = {}
+        # Approximate bytes per collection, TTL/LRU eviction under MEMORY_BUDGET_MB.
+        # Only data that can be rebuilt is evicted; files and quizzes are just counted
+        self.memory = MemoryManager()
+        self._file_usage = self.memory.track("files")
+        self._text_usage = self.memory.track("extracted_texts", self._evict_text)
+        self._quiz_usage = self.memory.track("quizzes")
+        self._quiz_json_usage = self.memory.track("quiz_json", self._drop_quiz_json)
+        # Optional snapshot + journal persistence (app.storage.snapshot), set by init_db
+        self.persistence = None
 
+    def _log(self, op: str, key: str, payload: Optional[str] = None) -> None:
+        """Append a change to the persistence journal, if enabled"""
+        if self.persistence is not None:
+            self.persistence.log(op, key, payload)
+
+    @blocking
     def store_file(self, file_id: str, filename: str, file_type: str, 
                    file_size: int, content: bytes) -> FileInfo:
         """Store uploaded file information and content"""
@@ -30,89 +270,405 @@ class InMemoryDatabase:
             upload_time=datetime.now(),
             text_extracted=False
         )
-        self.files[file_id] = file_info
-        self.file_contents[file_id] = content
+        self.blobs.put(file_id, content)
+        with self._lock:
+            self._put_file(file_info)
+            self._log("file", file_id, file_info.model_dump_json())
+        return file_info
+
+    @blocking
+    def store_file_from_path(self, file_id: str, filename: str, file_type: str,
+                             file_size: int, path: str) -> FileInfo:
+        """Store an upload assembled on disk, moving the file into the blob store's disk tier"""
+        file_info = FileInfo(
+            file_id=file_id,
+            filename=filename,
+            file_type=file_type,
+            file_size=file_size,
+            upload_time=datetime.now(),
+            text_extracted=False
+        )
+        self.blobs.put_file(file_id, path)
+        with self._lock:
+            self._put_file(file_info)
+            self._log("file", file_id, file_info.model_dump_json())
         return file_info
 
+    @_synchronized
+    def restore_file(self, file_info: FileInfo) -> None:
+        """Re-insert file information whose content is already in the blob store directory"""
+        self.blobs.adopt(file_info.file_id)
+        self._put_file(file_info)
+
+    def _put_file(self, file_info: FileInfo) -> None:
+        file_id = file_info.file_id
+        if file_id in self.files:
+            _index_remove(self._file_order, file_sort_key(self.files[file_id]))
+        self.files[file_id] = file_info
+        bisect.insort(self._file_order, file_sort_key(file_info))
+        self._file_changed(file_id)
+        self._file_usage.add(file_id, ENTRY_OVERHEAD_BYTES + len(file_info.filename))
+        self.memory.enforce()
+
+    def _file_changed(self, file_id: str) -> None:
+        self._files_version += 1
+        if file_id in self.files:
+            self._file_versions[file_id] = self._files_version
+        else:
+            self._file_versions.pop(file_id, None)
+
+    @_synchronized
+    def get_files_version(self) -> str:
+        """Changes whenever a file is stored, processed or deleted"""
+        return f"{self._files_epoch}-{self._files_version}"
+
+    @_synchronized
+    def get_file_version(self, file_id: str) -> Optional[str]:
+        """Changes whenever the file's information does; None for a missing file"""
+        version = self._file_versions.get(file_id)
+        return f"{self._files_epoch}-{version}" if version is not None else None
+
+    @_synchronized
     def get_file_info(self, file_id: str) -> Optional[FileInfo]:
         """Get file information by ID"""
+        self._file_usage.touch(file_id)
+        self.memory.tick()
         return self.files.get(file_id)
 
+    @blocking
     def get_file_content(self, file_id: str) -> Optional[bytes]:
         """Get file content by ID"""
-        return self.file_contents.get(file_id)
+        return self.blobs.get(file_id)
 
+    @blocking
     def store_extracted_text(self, result: TextExtractionResult) -> None:
         """Store extracted text result"""
-        self.extracted_texts[result.file_id] = result
-        if result.file_id in self.files:
-            self.files[result.file_id].text_extracted = True
-            self.files[result.file_id].word_count = result.word_count
+        with self._lock:
+            self.extracted_texts[result.file_id] = result
+            if result.file_id in self.files:
+                self.files[result.file_id].text_extracted = True
+                self.files[result.file_id].word_count = result.word_count
+                self._file_changed(result.file_id)
+            self._text_usage.add(result.file_id, ENTRY_OVERHEAD_BYTES + len(result.text_content))
+            self._log("text", result.file_id, result.model_dump_json())
+            self.memory.enforce()
+        self.blobs.demote(result.file_id)
 
+    @_synchronized
     def get_extracted_text(self, file_id: str) -> Optional[TextExtractionResult]:
         """Get extracted text by file ID"""
+        self._text_usage.touch(file_id)
+        self.memory.tick()
         return self.extracted_texts.get(file_id)
 
+    @_synchronized
+    def get_text_slice(self, file_id: str, start: int = 0, end: Optional[int] = None,
+                       page: Optional[int] = None) -> Optional[TextSlice]:
+        """Get a character range or PDF page of the extracted text"""
+        result = self.get_extracted_text(file_id)
+        return slice_text(result, start, end, page) if result else None
+
+    def _evict_text(self, file_id: str) -> None:
+        # The upload blob stays, so the text is re-extracted on next use
+        self.extracted_texts.pop(file_id, None)
+        file_info = self.files.get(file_id)
+        if file_info is not None:
+            file_info.text_extracted = False
+            self._file_changed(file_id)
+
+    def _drop_quiz_json(self, quiz_id: str) -> None:
+        """Forget a cached quiz body; rebuilt on the next read"""
+        if self._quiz_json.pop(quiz_id, None) is not None:
+            self._quiz_json_usage.remove(quiz_id)
+
+    @_synchronized
     def store_quiz(self, quiz: Quiz) -> Quiz:
         """Store quiz in database"""
+        quiz = self._put_quiz(quiz)
+        self._log("quiz", quiz.id, quiz.model_dump_json())
+        self.memory.enforce()
+        return quiz
+
+    def _put_quiz(self, quiz: Quiz, summary: Optional[QuizSummary] = None) -> Quiz:
+        previous = self.quizzes.get(quiz.id)
+        # Anything that can fail runs before the store is touched
+        quiz = next_version(quiz, previous, self._retired_versions.get(quiz.id))
+        summary = summary or QuizSummary.from_quiz(quiz)
+        size = (ENTRY_OVERHEAD_BYTES + len(quiz.model_dump_json(exclude={"questions"}))
+                + QUESTION_REF_BYTES * len(quiz.questions))
+        self._retired_versions.pop(quiz.id, None)
+        if previous is not None:
+            self._drop_quiz_json(quiz.id)
+            quiz = _share_unchanged(previous, quiz)
+            self._unindex_quiz(previous)
+        self._retain_questions(quiz.questions)
+        if previous is not None:
+            self._release_questions(previous.questions)
         self.quizzes[quiz.id] = quiz
+        self.quiz_summaries[quiz.id] = summary
+        key = quiz_sort_key(quiz)
+        bisect.insort(self._quiz_order, key)
+        bisect.insort(self._quiz_order_by_file.setdefault(quiz.source_file_id, []), key)
+        self._quiz_usage.add(quiz.id, size)
         return quiz
 
+    def _retain_questions(self, questions: List[QuizQuestion]) -> None:
+        for question in questions:
+            entry = self._question_refs.get(id(question))
+            if entry is None:
+                size = ENTRY_OVERHEAD_BYTES + len(question.model_dump_json())
+                self._question_refs[id(question)] = [question, 1, size]
+                self._quiz_usage.adjust(size)
+            else:
+                entry[1] += 1
+
+    def _release_questions(self, questions: List[QuizQuestion]) -> None:
+        for question in questions:
+            entry = self._question_refs[id(question)]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._question_refs[id(question)]
+                self._quiz_usage.adjust(-entry[2])
+
+    def _unindex_quiz(self, quiz: Quiz) -> None:
+        key = quiz_sort_key(quiz)
+        _index_remove(self._quiz_order, key)
+        file_order = self._quiz_order_by_file.get(quiz.source_file_id)
+        if file_order is not None:
+            _index_remove(file_order, key)
+            if not file_order:
+                del self._quiz_order_by_file[quiz.source_file_id]
+
+    @_synchronized
+    def store_quizzes(self, quizzes: List[Quiz]) -> int:
+        """Store several quizzes at once"""
+        for quiz in quizzes:
+            self.store_quiz(quiz)
+        return len(quizzes)
+
+    @_synchronized
     def get_quiz(self, quiz_id: str) -> Optional[Quiz]:
         """Get quiz by ID"""
+        self._quiz_usage.touch(quiz_id)
+        self.memory.tick()
         return self.quizzes.get(quiz_id)
 
-    def update_quiz(self, quiz_id: str, updates: dict) -> Optional[Quiz]:
+    @_synchronized
+    def get_quiz_version(self, quiz_id: str) -> Optional[int]:
+        """Get the current version of a quiz"""
+        quiz = self.quizzes.get(quiz_id)
+        return quiz.version if quiz is not None else None
+
+    @_synchronized
+    def get_quiz_json(self, quiz_id: str) -> Optional[bytes]:
+        """Get a quiz serialized as JSON, cached until the quiz changes"""
+        body = self._quiz_json.get(quiz_id)
+        if body is None:
+            quiz = self.quizzes.get(quiz_id)
+            if quiz is None:
+                return None
+            body = self._quiz_json[quiz_id] = to_json(quiz)
+            self._quiz_json_usage.add(quiz_id, ENTRY_OVERHEAD_BYTES + len(body))
+        self._quiz_usage.touch(quiz_id)
+        self._quiz_json_usage.touch(quiz_id)
+        self.memory.tick()
+        return body
+
+    @_synchronized
+    def duplicate_quiz(self, quiz_id: str, new_id: str,
+                       created_at: Optional[datetime] = None) -> Optional[Quiz]:
+        """Copy a quiz; the copy shares its questions with the original until they are edited"""
+        original = self.quizzes.get(quiz_id)
+        if original is None:
+            return None
+        changes = {
+            "id": new_id,
+            "title": DUPLICATE_TITLE_PREFIX + original.title,
+            "created_at": created_at or datetime.now(),
+            "updated_at": None,
+        }
+        duplicate = original.model_copy(update={
+            **changes, "metadata": dict(original.metadata), "version": 1,
+        })
+        self._put_quiz(duplicate, self.quiz_summaries[quiz_id].model_copy(update=changes))
+        self._log("duplicate_quiz", new_id, json.dumps({
+            "source_id": quiz_id, "created_at": duplicate.created_at.isoformat(),
+        }))
+        self.memory.enforce()
+        return duplicate
+
+    @_synchronized
+    def update_quiz(self, quiz_id: str, updates: dict,
+                    expected_version: Optional[int] = None) -> Optional[Quiz]:
         """Update quiz with new data"""
         if quiz_id not in self.quizzes:
             return None
         
         quiz = self.quizzes[quiz_id]
-        quiz_dict = quiz.dict()
+        check_version(quiz, expected_version)
+        quiz_dict = quiz.model_dump()
         quiz_dict.update(updates)
         quiz_dict['updated_at'] = datetime.now()
+        quiz_dict['version'] = quiz.version + 1
         
         updated_quiz = Quiz(**quiz_dict)
-        self.quizzes[quiz_id] = updated_quiz
-        return updated_quiz
+        return self.store_quiz(updated_quiz)
+
+    @_synchronized
+    def patch_quiz(self, quiz_id: str, operations: List[dict],
+                   expected_version: Optional[int] = None) -> Optional[Quiz]:
+        """Apply JSON-Patch style operations, touching only the affected questions"""
+        quiz = self.quizzes.get(quiz_id)
+        if quiz is None:
+            return None
+        check_version(quiz, expected_version)
+        return self.store_quiz(apply_quiz_patch(quiz, operations))
 
-    def list_quizzes(self, file_id: Optional[str] = None) -> List[Quiz]:
-        """List all quizzes, optionally filtered by file ID"""
-        quizzes = list(self.quizzes.values())
-        if file_id:
-            quizzes = [q for q in quizzes if q.source_file_id == file_id]
-        return sorted(quizzes, key=lambda x: x.created_at, reverse=True)
+    @_synchronized
+    def list_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                     cursor: Optional[str] = None) -> List[Quiz]:
+        """List quizzes newest first, optionally filtered by file ID"""
+        order = self._quiz_order_by_file.get(file_id, []) if file_id else self._quiz_order
+        return [self.quizzes[quiz_id] for _, quiz_id in _page(order, limit, cursor)]
 
+    @_synchronized
+    def list_quiz_summaries(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                            cursor: Optional[str] = None) -> List[QuizSummary]:
+        """List quiz summaries in the same order as list_quizzes"""
+        order = self._quiz_order_by_file.get(file_id, []) if file_id else self._quiz_order
+        return [self.quiz_summaries[quiz_id] for _, quiz_id in _page(order, limit, cursor)]
+
+    @_synchronized
+    def export_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                       cursor: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]:
+        """One page of quizzes as JSON, in list_quizzes order, and the cursor of the next page"""
+        order = self._quiz_order_by_file.get(file_id, []) if file_id else self._quiz_order
+        keys, next_cursor = next_page(_page(order, limit + 1 if limit else None, cursor),
+                                      limit, lambda key: key)
+        # Reuses cached bodies but does not cache the rest, so an export
+        # leaves the read cache (and the memory budget) as it found it
+        return [self._quiz_json.get(quiz_id) or to_json(self.quizzes[quiz_id])
+                for _, quiz_id in keys], next_cursor
+
+    @_synchronized
     def delete_quiz(self, quiz_id: str) -> bool:
         """Delete quiz by ID"""
-        if quiz_id in self.quizzes:
-            del self.quizzes[quiz_id]
-            return True
-        return False
+        quiz = self.quizzes.pop(quiz_id, None)
+        if quiz is None:
+            return False
+        del self.quiz_summaries[quiz_id]
+        self._retired_versions[quiz_id] = quiz.version
+        self._drop_quiz_json(quiz_id)
+        self._unindex_quiz(quiz)
+        self._release_questions(quiz.questions)
+        self._quiz_usage.remove(quiz_id)
+        self._log("delete_quiz", quiz_id)
+        return True
+
+    @_synchronized
+    def delete_quizzes_for_file(self, file_id: str) -> int:
+        """Delete every quiz generated from a file"""
+        file_order = self._quiz_order_by_file.pop(file_id, [])
+        for key in file_order:
+            quiz = self.quizzes.pop(key[1])
+            self._retired_versions[quiz.id] = quiz.version
+            self._release_questions(quiz.questions)
+            self._drop_quiz_json(key[1])
+            del self.quiz_summaries[key[1]]
+            _index_remove(self._quiz_order, key)
+            self._quiz_usage.remove(key[1])
+        if file_order:
+            self._log("delete_file_quizzes", file_id)
+        return len(file_order)
+
+    @_synchronized
+    def restore_retired_version(self, quiz_id: str, version: int) -> None:
+        """Re-insert the last version of a deleted quiz, read from a snapshot"""
+        if quiz_id not in self.quizzes:
+            self._retired_versions[quiz_id] = max(version, self._retired_versions.get(quiz_id, 0))
+
+    @_synchronized
+    def list_files(self, limit: Optional[int] = None,
+                   cursor: Optional[str] = None) -> List[FileInfo]:
+        """List uploaded files, newest first"""
+        return [self.files[file_id] for _, file_id in _page(self._file_order, limit, cursor)]
 
-    def list_files(self) -> List[FileInfo]:
-        """List all uploaded files"""
-        return sorted(self.files.values(), key=lambda x: x.upload_time, reverse=True)
+    @blocking
+    def delete_file(self, file_id: str) -> bool:
+        """Delete file information, content and extracted text"""
+        with self._lock:
+            if file_id not in self.files:
+                return False
+            _index_remove(self._file_order, file_sort_key(self.files.pop(file_id)))
+            self._file_changed(file_id)
+            self.extracted_texts.pop(file_id, None)
+            self._file_usage.remove(file_id)
+            self._text_usage.remove(file_id)
+            self._log("delete_file", file_id)
+        self.blobs.delete(file_id)
+        return True
+
+    def close(self) -> None:
+        """Remove spilled upload blobs"""
+        self.blobs.close()
+
+def _share_unchanged(previous: Quiz, quiz: Quiz) -> Quiz:
+    """Reuse the previous version's question objects for questions that did not change"""
+    if quiz.questions is previous.questions:
+        return quiz
+    by_id = {question.id: question for question in previous.questions}
+    questions = []
+    for question in quiz.questions:
+        old = by_id.get(question.id)
+        questions.append(old if old is not None and (old is question or old == question) else question)
+    if all(new is old for new, old in zip(questions, quiz.questions)):
+        return quiz
+    return quiz.model_copy(update={"questions": questions})
 
 # Global database instance
 db = InMemoryDatabase()
 
-def init_db():
-    """Initialize database - placeholder for PostgreSQL setup"""
-    # For PostgreSQL implementation, you would:
-    # 1. Create connection pool
-    # 2. Run migrations
-    # 3. Set up tables
+async def init_db():
+    """Initialize database backend from DATABASE_URL"""
+    global db
     
     database_url = os.getenv("DATABASE_URL")
     if database_url and database_url.startswith("postgresql"):
-        print(f"PostgreSQL database configured: {database_url}")
-        # TODO: Implement PostgreSQL connection
+        from app.storage.postgres import PostgresDatabase
+        db = PostgresDatabase(database_url)
+        await db.connect()
+        print(f"Using PostgreSQL database (pool {db.min_size}-{db.max_size})")
+    elif database_url and database_url.startswith("shared://"):
+        from app.storage.shared import SharedDatabase
+        socket_path = database_url[len("shared://"):]
+        db = await asyncio.to_thread(SharedDatabase, socket_path)
+        print(f"Using shared store process at {socket_path}")
+    elif database_url and database_url.startswith("sqlite:///"):
+        from app.storage.sqlite import SQLiteDatabase
+        path = database_url[len("sqlite:///"):]
+        db = SQLiteDatabase(path)
+        print(f"Using SQLite database: {path}")
     else:
-        print("Using in-memory database for MVP")
+        snapshot_dir = os.getenv("SNAPSHOT_DIR")
+        if snapshot_dir:
+            from app.storage.snapshot import StorePersistence
+            # Keep upload bytes next to the snapshot so they survive restarts too
+            db.blobs = BlobStore(os.path.join(snapshot_dir, "blobs"), write_through=True)
+            db.persistence = StorePersistence(db, snapshot_dir)
+            await db.persistence.start()
+            print(f"Using in-memory database with snapshots in {snapshot_dir}")
+        else:
+            print("Using in-memory database for MVP")
     
     return db
 
+async def close_db():
+    """Flush persistence and release the database backend"""
+    persistence = getattr(db, "persistence", None)
+    if persistence is not None:
+        await persistence.close()
+    await run_db(db.close)
+
 def get_database():
     """Get database instance"""
     return db
@@ -0,0 +1,45 @@
+"""
+Client disconnect handling for long-running generation endpoints
+Generation is cancelled when the browser goes away so no further LLM
+calls are made for a result nobody will read
+"""
+import asyncio
+import os
+from typing import Awaitable, TypeVar
+
+from fastapi import Request
+
+from app.metrics import get_metrics
+
+T = TypeVar("T")
+
+# Non-standard status used by nginx for "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before the work finished"""
+    pass
+
+async def run_until_disconnected(request: Request, work: Awaitable[T]) -> T:
+    """Await `work`, cancelling it if the client disconnects in the meantime.
+
+    Cancellation propagates into the LLM clients: queued scheduler slots are
+    given up, in-flight HTTP calls are aborted and no retries are attempted.
+    Chunk results that completed before cancellation have already been
+    handed to their chunk callbacks.
+    """
+    poll_interval = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                get_metrics().increment("http.generation_cancelled_on_disconnect")
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
@@ -3,10 +3,13 @@ File parsing utilities for extracting text from different file formats
 """
 import io
 import re
-from typing import Tuple
+from typing import List, Optional, Tuple
 import fitz  # PyMuPDF
 from docx import Document
 
+# Private-use character marking page starts while PDF text is cleaned
+PAGE_MARK = "\ue000"
+
 class FileParsingError(Exception):
     """Custom exception for file parsing errors"""
     pass
@@ -17,6 +20,12 @@ class FileParser:
     @staticmethod
     def extract_text_from_pdf(content: bytes) -> Tuple[str, int]:
         """Extract text from PDF content"""
+        text_content, word_count, _ = FileParser.extract_pages_from_pdf(content)
+        return text_content, word_count
+    
+    @staticmethod
+    def extract_pages_from_pdf(content: bytes) -> Tuple[str, int, List[int]]:
+        """Extract text from PDF content, with the character offset where each page starts"""
         try:
             # Open PDF from bytes
             pdf_document = fitz.open(stream=content, filetype="pdf")
@@ -24,6 +33,7 @@ class FileParser:
             
             for page_num in range(pdf_document.page_count):
                 page = pdf_document.load_page(page_num)
+                text_content += PAGE_MARK
                 
                 # Try multiple extraction methods to get readable content
                 text = ""
@@ -97,6 +107,7 @@ class FileParser:
             text_content = re.sub(r'%PDF-\d+\.\d+', '', text_content)
             text_content = re.sub(r'\[\d+\s+\d+\s+\d+\s+\d+\]', '', text_content)
             text_content = re.sub(r'\s+', ' ', text_content).strip()
+            text_content, page_offsets = FileParser._split_pages(FileParser._clean_text(text_content))
             
             # Validate extracted content
             if not text_content or text_content.isspace():
@@ -152,7 +163,7 @@ class FileParser:
             print(text_content[:500] + "..." if len(text_content) > 500 else text_content)
             print("================================\n")
                 
-            return text_content, word_count
+            return text_content, word_count, page_offsets
             
         except Exception as e:
             if isinstance(e, FileParsingError):
@@ -237,6 +248,38 @@ class FileParser:
         
         return text
     
+    @staticmethod
+    def _split_pages(text: str) -> Tuple[str, List[int]]:
+        """Remove page marks, returning the text and the offset where each page starts"""
+        pieces = []
+        offsets = []
+        length = 0
+        empty_pages = 0
+        for page_text in text.split(PAGE_MARK)[1:]:
+            page_text = page_text.strip()
+            if not page_text:
+                # Empty pages start where the next page's text does
+                empty_pages += 1
+                continue
+            if pieces:
+                pieces.append(" ")
+                length += 1
+            offsets.extend([length] * (empty_pages + 1))
+            empty_pages = 0
+            pieces.append(page_text)
+            length += len(page_text)
+        offsets.extend([length] * empty_pages)
+        return "".join(pieces), offsets
+    
+    @staticmethod
+    def parse_document(filename: str, content: bytes) -> Tuple[str, int, Optional[List[int]]]:
+        """Like parse_file, plus page start offsets for PDFs (None for other formats)"""
+        file_extension = filename.lower().split('.')[-1] if '.' in filename else ''
+        if file_extension == 'pdf':
+            return FileParser.extract_pages_from_pdf(content)
+        text_content, word_count = FileParser.parse_file(filename, content)
+        return text_content, word_count, None
+    
     @staticmethod
     def parse_file(filename: str, content: bytes) -> Tuple[str, int]:
         """Parse file based on extension and return text content and word count"""
@@ -3,7 +3,7 @@ Google Gemini LLM client for quiz generation
 Uses Google Gemini API for real AI-powered quiz generation
 """
 
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
 import json
 import re
 import uuid
@@ -11,6 +11,18 @@ import httpx
 import asyncio
 import os
 from app.models import QuizQuestion, QuestionType
+from app.metrics import get_metrics
+from app.scheduler import get_scheduler, estimate_cost, estimate_generation_tokens
+from app.single_flight import SingleFlight
+
+# Called with (chunk_text, questions) as soon as a chunk has been answered
+ChunkCallback = Callable[[str, List[QuizQuestion]], None]
+
+DEFAULT_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+# Identical chunk calls from concurrent requests (e.g. one batch) share one completion;
+# module level because a client is created per request
+_completions = SingleFlight("llm.completions")
 
 class GeminiClientError(Exception):
     """Custom exception for Gemini client errors"""
@@ -22,16 +34,22 @@ class GeminiClient:
     def __init__(self):
         self.api_token = os.getenv("GEMINI_API_KEY", "")
         self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateContent"
+        # GEMINI_API_BASE points at a stand-in, e.g. `python -m app.mock_provider`
+        self.api_base = os.getenv("GEMINI_API_BASE", DEFAULT_API_BASE).rstrip("/")
+        self.api_url = f"{self.api_base}/models/{self.model_name}:generateContent"
         self.timeout = int(os.getenv("LLM_TIMEOUT", "120"))
         self.max_retries = 2
         self.chunk_size = 4000
+        # httpx transport override (None = network); used by the in-process mock provider
+        self.transport = None
+        self._completions = _completions
 
     async def generate_quiz(self, text_content: str, num_questions: int = 5, 
                           question_types: Optional[List[QuestionType]] = None,
                           difficulty_level: str = "medium",
                           focus_topics: Optional[List[str]] = None,
-                          language: str = "english") -> List[QuizQuestion]:
+                          language: str = "english",
+                          on_chunk: Optional[ChunkCallback] = None) -> List[QuizQuestion]:
         """Generate quiz questions from text content"""
 
         if not self.api_token:
@@ -43,8 +61,7 @@ class GeminiClient:
             focus_topics = []
 
         # Split long content into chunks
-        content_chunks = [text_content[i:i + self.chunk_size] 
-                        for i in range(0, len(text_content), self.chunk_size)]
+        content_chunks = split_into_chunks(text_content, self.chunk_size)
 
         all_questions = []
         questions_per_chunk = num_questions // len(content_chunks)
@@ -55,14 +72,105 @@ class GeminiClient:
                 # Add remaining questions to last chunk
                 chunk_questions += num_questions % len(content_chunks)
 
-            questions = await self._generate_chunk_questions(
-                chunk, chunk_questions, question_types, 
-                difficulty_level, focus_topics, language
-            )
+            try:
+                questions = await self._generate_chunk_questions(
+                    chunk, chunk_questions, question_types, 
+                    difficulty_level, focus_topics, language
+                )
+            except asyncio.CancelledError:
+                _record_cancelled_chunks(content_chunks[i:], questions_per_chunk)
+                raise
             all_questions.extend(questions)
+            if on_chunk and questions:
+                on_chunk(chunk, questions)
 
         return all_questions[:num_questions]
 
+    async def generate_quiz_variants(self, text_content: str, num_questions: int = 5,
+                                   variants: int = 2,
+                                   question_types: Optional[List[QuestionType]] = None,
+                                   difficulty_level: str = "medium",
+                                   focus_topics: Optional[List[str]] = None,
+                                   language: str = "english",
+                                   on_chunk: Optional[ChunkCallback] = None) -> List[List[QuizQuestion]]:
+        """Generate several disjoint question sets with one request per chunk"""
+
+        if not self.api_token:
+            raise GeminiClientError("Gemini API key is required")
+
+        if question_types is None:
+            question_types = [QuestionType.MULTIPLE_CHOICE]
+        if focus_topics is None:
+            focus_topics = []
+
+        content_chunks = split_into_chunks(text_content, self.chunk_size)
+
+        variant_questions: List[List[QuizQuestion]] = [[] for _ in range(variants)]
+        questions_per_chunk = num_questions // len(content_chunks)
+
+        for i, chunk in enumerate(content_chunks):
+            chunk_questions = questions_per_chunk
+            if i == len(content_chunks) - 1:
+                chunk_questions += num_questions % len(content_chunks)
+            if chunk_questions == 0:
+                continue
+
+            try:
+                chunk_variants = await self._generate_chunk_variants(
+                    chunk, chunk_questions, variants, question_types,
+                    difficulty_level, focus_topics, language
+                )
+            except asyncio.CancelledError:
+                _record_cancelled_chunks(content_chunks[i:], questions_per_chunk * variants)
+                raise
+            for index, questions in enumerate(chunk_variants):
+                variant_questions[index].extend(questions)
+            if on_chunk and any(chunk_variants):
+                on_chunk(chunk, [q for questions in chunk_variants for q in questions])
+
+        return [questions[:num_questions] for questions in variant_questions]
+
+    async def _generate_chunk_variants(self, content: str, num_questions: int,
+                                     variants: int,
+                                     question_types: List[QuestionType],
+                                     difficulty_level: str,
+                                     focus_topics: List[str],
+                                     language: str) -> List[List[QuizQuestion]]:
+        """Generate disjoint question sets for a content chunk with retries"""
+
+        for attempt in range(self.max_retries):
+            try:
+                prompt = self._create_variants_prompt(
+                    content, num_questions, variants, question_types,
+                    difficulty_level, focus_topics, language
+                )
+
+                # No stop sequence here: the answer must contain every variant
+                payload = {
+                    "contents": [{
+                        "parts": [{"text": prompt}]
+                    }],
+                    "generationConfig": {
+                        "temperature": 0.7,
+                        "topP": 0.9,
+                        "maxOutputTokens": min(2048 * variants, 8192)
+                    }
+                }
+
+                response_text = await self._request_completion(prompt, payload)
+                parsed = self._parse_variants_response(response_text, variants)
+
+                if any(parsed):
+                    return parsed
+
+            except Exception as e:
+                # CancelledError is not an Exception: a cancelled call is never retried
+                if attempt == self.max_retries - 1:
+                    raise GeminiClientError(f"Failed after {self.max_retries} attempts: {str(e)}")
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+
+        return [[] for _ in range(variants)]
+
     async def _generate_chunk_questions(self, content: str, num_questions: int,
                                      question_types: List[QuestionType],
                                      difficulty_level: str,
@@ -89,22 +197,11 @@ class GeminiClient:
                     }
                 }
 
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        f"{self.api_url}?key={self.api_token}",
-                        json=payload
-                    )
-                    response.raise_for_status()
+                response_text = await self._request_completion(prompt, payload)
+                questions = self._parse_quiz_response(response_text)
 
-                    result = response.json()
-                    if not result.get("candidates"):
-                        raise GeminiClientError("No response candidates")
-
-                    response_text = result["candidates"][0]["content"]["parts"][0]["text"]
-                    questions = self._parse_quiz_response(response_text)
-
-                    if questions:
-                        return questions
+                if questions:
+                    return questions
 
             except Exception as e:
                 if attempt == self.max_retries - 1:
@@ -158,6 +255,90 @@ class GeminiClient:
             START WITH QUESTION 1:
             """
 
+    async def _request_completion(self, prompt: str, payload: Dict[str, Any]) -> str:
+        """Send one generateContent call, or join an identical one already in flight"""
+        key = (self.api_url, json.dumps(payload, sort_keys=True))
+        return await self._completions.run(key, lambda: self._send_completion(prompt, payload))
+
+    async def _send_completion(self, prompt: str, payload: Dict[str, Any]) -> str:
+        """Send one generateContent call through the LLM scheduler"""
+
+        async with get_scheduler().slot(cost=estimate_cost(prompt)):
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
+                response = await client.post(
+                    f"{self.api_url}?key={self.api_token}",
+                    json=payload
+                )
+                response.raise_for_status()
+
+        result = response.json()
+        if not result.get("candidates"):
+            raise GeminiClientError("No response candidates")
+
+        return result["candidates"][0]["content"]["parts"][0]["text"]
+
+    def _create_variants_prompt(self, text_content: str, num_questions: int,
+                              variants: int,
+                              question_types: List[QuestionType],
+                              difficulty_level: str,
+                              focus_topics: List[str],
+                              language: str) -> str:
+        """Create a prompt asking for several non-overlapping question sets"""
+
+        type_map = {
+            QuestionType.MULTIPLE_CHOICE: "multiple-choice (4 options)",
+            QuestionType.TRUE_FALSE: "true/false",
+            QuestionType.SHORT_ANSWER: "short-answer"
+        }
+
+        types_str = ", ".join(type_map[t] for t in question_types)
+        focus_str = f"\nFocus on these topics: {', '.join(focus_topics)}" if focus_topics else ""
+        labels = ", ".join(variant_label(i) for i in range(variants))
+
+        return f"""
+        You are **QuizMaster**, a large-language model specialized in assessment
+        design. As an expert educator, create {variants} alternative versions
+        ({labels}) of a {difficulty_level} level quiz in {language}, each with
+        {num_questions} questions.
+
+        Study this material carefully:
+
+            {text_content}
+
+            CREATE {variants} VERSIONS OF {num_questions} QUESTIONS:
+            - Question types: {types_str}
+            - Make questions test comprehension
+            - Ensure answers come from the text{focus_str}
+            - Every version must cover the material at the same difficulty
+            - No question may appear in more than one version, not even reworded
+
+            START EACH VERSION WITH ITS OWN HEADER LINE, e.g. VARIANT A:
+            FORMAT EACH QUESTION EXACTLY LIKE THIS:
+
+            QUESTION:
+            Type: [question_type]
+            Question: [clear, specific question]
+            Options: [for multiple-choice: A) B) C) D)]
+            Answer: [correct answer]
+            Explanation: [brief explanation from text]
+
+            START WITH VARIANT A:
+            """
+
+    def _parse_variants_response(self, response_text: str, variants: int) -> List[List[QuizQuestion]]:
+        """Split a multi-variant response into one question list per variant"""
+
+        parsed: List[List[QuizQuestion]] = [[] for _ in range(variants)]
+        sections = re.split(r'(?:^|\n)\s*\**VARIANT\s+([A-Z])\**:?', response_text, flags=re.IGNORECASE)
+
+        # re.split yields [preamble, label, body, label, body, ...]
+        for label, body in zip(sections[1::2], sections[2::2]):
+            index = ord(label.upper()) - ord('A')
+            if 0 <= index < variants:
+                parsed[index].extend(self._parse_quiz_response(body))
+
+        return parsed
+
     def _parse_quiz_response(self, response_text: str) -> List[QuizQuestion]:
         """Parse response with improved error handling"""
 
@@ -219,6 +400,23 @@ class GeminiClient:
         options = re.findall(r'[A-D]\)(.*?)(?=[A-D]\)|$)', options_text)
         return [opt.strip() for opt in options] if len(options) == 4 else ["Option A", "Option B", "Option C", "Option D"]
 
+def _record_cancelled_chunks(chunks: List[str], questions_per_chunk: int) -> None:
+    """Count chunk calls dropped by cancellation (including the one in flight)"""
+    metrics = get_metrics()
+    metrics.increment("llm.cancelled_calls", len(chunks))
+    metrics.increment("llm.tokens_saved", sum(
+        estimate_generation_tokens(chunk, questions_per_chunk) for chunk in chunks
+    ))
+
+def split_into_chunks(text_content: str, chunk_size: int) -> List[str]:
+    """Split text into the fixed-size chunks that are sent to the model"""
+    return [text_content[i:i + chunk_size]
+            for i in range(0, len(text_content), chunk_size)]
+
+def variant_label(index: int) -> str:
+    """Exam-style label for a variant index (0 -> "A")"""
+    return chr(ord('A') + index)
+
 def get_gemini_client() -> GeminiClient:
     """Get Gemini client instance"""
     return GeminiClient()
\ No newline at end of file
@@ -6,7 +6,9 @@ import re
 import uuid
 import os
 from app.models import QuizQuestion, QuestionType
-from app.gemini_client import get_gemini_client
+from app.gemini_client import ChunkCallback, get_gemini_client, variant_label
+from app.mock_provider import get_simulated_gemini_client
+from app.scheduler import get_scheduler
 
 
 class LLMClientError(Exception):
@@ -21,13 +23,16 @@ class LocalLLMClient:
         self.model_name = os.getenv("LLM_MODEL", "llama3.2")
         self.timeout = int(os.getenv("LLM_TIMEOUT", "120"))
         self.mock_mode = os.getenv("LLM_MOCK_MODE", "false").lower() == "true"
+        # "instant": canned questions; "simulated": GeminiClient against app.mock_provider
+        self.mock_provider = os.getenv("LLM_MOCK_PROVIDER", "instant").lower()
         self.use_gemini = os.getenv("USE_GEMINI", "true").lower() == "true"
 
     async def generate_quiz(self, text_content: str, num_questions: int = 5, 
                           question_types: Optional[List[QuestionType]] = None,
                           difficulty_level: str = "medium",
                           focus_topics: Optional[List[str]] = None,
-                          language: str = "english") -> List[QuizQuestion]:
+                          language: str = "english",
+                          on_chunk: Optional[ChunkCallback] = None) -> List[QuizQuestion]:
         """Generate quiz questions from text content"""
 
         # Set defaults for optional parameters
@@ -36,9 +41,19 @@ class LocalLLMClient:
         if focus_topics is None:
             focus_topics = []
 
+        if self.mock_mode and self.mock_provider == "simulated":
+            return await get_simulated_gemini_client().generate_quiz(
+                text_content, num_questions, question_types, difficulty_level, focus_topics,
+                language, on_chunk=on_chunk
+            )
+
         if self.mock_mode:
             print(f"🎯 Using mock mode for quiz generation")
-            return self._generate_mock_quiz(text_content, num_questions, question_types)
+            async with get_scheduler().slot():
+                questions = self._generate_mock_quiz(text_content, num_questions, question_types)
+            if on_chunk:
+                on_chunk(text_content, questions)
+            return questions
 
 
         # Try Gemini as fallback
@@ -46,7 +61,57 @@ class LocalLLMClient:
             try:
                 gemini_client = get_gemini_client()
                 return await gemini_client.generate_quiz(
-                    text_content, num_questions, question_types, difficulty_level, focus_topics
+                    text_content, num_questions, question_types, difficulty_level, focus_topics,
+                    on_chunk=on_chunk
+                )
+            except Exception as gemini_error:
+                print(f"⚠️ Gemini failed: {gemini_error}")
+                raise LLMClientError(
+                    "All AI services are currently unavailable. Gemini failed to generate questions. Please try again in a few moments."
+                )
+
+        raise LLMClientError(
+            "All AI services are currently unavailable. Please try again in a few moments."
+        )
+
+    async def generate_quiz_variants(self, text_content: str, num_questions: int = 5,
+                                   variants: int = 2,
+                                   question_types: Optional[List[QuestionType]] = None,
+                                   difficulty_level: str = "medium",
+                                   focus_topics: Optional[List[str]] = None,
+                                   language: str = "english",
+                                   on_chunk: Optional[ChunkCallback] = None) -> List[List[QuizQuestion]]:
+        """Generate disjoint question sets (one per variant) from text content"""
+
+        if question_types is None:
+            question_types = [QuestionType.MULTIPLE_CHOICE]
+        if focus_topics is None:
+            focus_topics = []
+
+        if self.mock_mode and self.mock_provider == "simulated":
+            return await get_simulated_gemini_client().generate_quiz_variants(
+                text_content, num_questions, variants, question_types,
+                difficulty_level, focus_topics, language, on_chunk=on_chunk
+            )
+
+        if self.mock_mode:
+            print(f"🎯 Using mock mode for {variants}-variant quiz generation")
+            async with get_scheduler().slot():
+                variant_questions = [
+                    self._generate_mock_quiz(text_content, num_questions, question_types,
+                                             variant=variant_label(index))
+                    for index in range(variants)
+                ]
+            if on_chunk:
+                on_chunk(text_content, [q for questions in variant_questions for q in questions])
+            return variant_questions
+
+        if self.use_gemini:
+            try:
+                gemini_client = get_gemini_client()
+                return await gemini_client.generate_quiz_variants(
+                    text_content, num_questions, variants, question_types,
+                    difficulty_level, focus_topics, language, on_chunk=on_chunk
                 )
             except Exception as gemini_error:
                 print(f"⚠️ Gemini failed: {gemini_error}")
@@ -227,11 +292,14 @@ IMPORTANT:
         return questions
 
     def _generate_mock_quiz(self, text_content: str, num_questions: int,
-                          question_types: List[QuestionType]) -> List[QuizQuestion]:
+                          question_types: List[QuestionType],
+                          variant: Optional[str] = None) -> List[QuizQuestion]:
         """Generate mock quiz for development/testing"""
 
         questions = []
         content_preview = text_content[:200] + "..." if len(text_content) > 200 else text_content
+        # Mock questions repeat, so number them to keep variants disjoint
+        suffix = f" (variant {variant}, #{{}})" if variant else ""
 
         for i in range(num_questions):
             question_type = question_types[i % len(question_types)]
@@ -239,7 +307,7 @@ IMPORTANT:
             if question_type == QuestionType.MULTIPLE_CHOICE:
                 questions.append(QuizQuestion(
                     id=str(uuid.uuid4()),
-                    question=f"What is the main topic discussed in the following text: '{content_preview}'?",
+                    question=f"What is the main topic discussed in the following text: '{content_preview}'?" + suffix.format(i + 1),
                     question_type=QuestionType.MULTIPLE_CHOICE,
                     options=[
                         "The primary subject matter",
@@ -253,7 +321,7 @@ IMPORTANT:
             elif question_type == QuestionType.TRUE_FALSE:
                 questions.append(QuizQuestion(
                     id=str(uuid.uuid4()),
-                    question=f"The text discusses relevant information about the subject matter.",
+                    question=f"The text discusses relevant information about the subject matter." + suffix.format(i + 1),
                     question_type=QuestionType.TRUE_FALSE,
                     options=None,
                     correct_answer="True",
@@ -262,7 +330,7 @@ IMPORTANT:
             else:  # SHORT_ANSWER
                 questions.append(QuizQuestion(
                     id=str(uuid.uuid4()),
-                    question=f"Describe the key concepts presented in the study material.",
+                    question=f"Describe the key concepts presented in the study material." + suffix.format(i + 1),
                     question_type=QuestionType.SHORT_ANSWER,
                     options=None,
                     correct_answer="The material covers important concepts that require understanding and analysis.",
@@ -0,0 +1,210 @@
+"""
+Memory accounting and eviction for the in-memory store
+Tracks approximate bytes per collection and evicts rebuildable data by TTL and LRU under a budget
+"""
+import os
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.metrics import get_metrics
+
+# Collections are evicted in this order when the store is over budget
+EVICTION_ORDER = ["quiz_json", "extracted_texts"]
+
+# Reads apply TTLs at most this often; writes always do
+READ_ENFORCE_INTERVAL_SECONDS = 1.0
+
+class TrackedCollection:
+    """Sizes and last-access times of one collection, least recently used first"""
+
+    def __init__(self, name: str, ttl_seconds: float, evictable: bool,
+                 on_evict: Optional[Callable[[str], None]]):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.evictable = evictable
+        self.on_evict = on_evict
+        self.bytes = 0
+        self.shared_bytes = 0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    def add(self, key: str, size: int) -> None:
+        self.remove(key)
+        self._entries[key] = (size, time.monotonic())
+        self.bytes += size
+
+    def adjust(self, size: int) -> None:
+        """Account bytes shared by several entries and owned by none of them"""
+        self.bytes += size
+        self.shared_bytes += size
+
+    def touch(self, key: str) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (entry[0], time.monotonic())
+            self._entries.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[0]
+
+    def oldest(self) -> Optional[Tuple[str, float]]:
+        """Least recently used key and its last access time"""
+        if not self._entries:
+            return None
+        key, (_, accessed) = next(iter(self._entries.items()))
+        return key, accessed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "shared_bytes": self.shared_bytes,
+            "ttl_seconds": self.ttl_seconds or None,
+            "lru_evictable": self.evictable,
+            "evicted_ttl": self.evicted_ttl,
+            "evicted_lru": self.evicted_lru,
+        }
+
+class MemoryManager:
+    """Byte budget (MEMORY_BUDGET_MB, 0 = unlimited) shared by tracked collections.
+
+    Only collections registered with an eviction callback are evicted: data
+    that can be rebuilt, such as extracted text or cached JSON. The others
+    (files, quizzes) are counted against the budget but never dropped.
+    Each evictable collection has its own TTL (MEMORY_TTL_<NAME>_SECONDS,
+    0 = never) and may opt out of LRU eviction (MEMORY_LRU_<NAME>=false).
+    Entries used within MEMORY_PIN_SECONDS are never evicted for space.
+    """
+
+    def __init__(self):
+        self.budget_bytes = int(float(os.getenv("MEMORY_BUDGET_MB", "0")) * 1024 * 1024)
+        self.pin_seconds = float(os.getenv("MEMORY_PIN_SECONDS", "300"))
+        self.collections: Dict[str, TrackedCollection] = {}
+        self.metrics = get_metrics()
+        self._last_enforced = 0.0
+
+    def track(self, name: str, on_evict: Optional[Callable[[str], None]] = None) -> TrackedCollection:
+        """Register a collection; with on_evict it is evictable under the environment's policy"""
+        env_name = name.upper()
+        collection = TrackedCollection(
+            name,
+            ttl_seconds=float(os.getenv(f"MEMORY_TTL_{env_name}_SECONDS", "0")) if on_evict else 0.0,
+            evictable=on_evict is not None and os.getenv(f"MEMORY_LRU_{env_name}", "true").lower() == "true",
+            on_evict=on_evict,
+        )
+        self.collections[name] = collection
+        return collection
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(c.bytes for c in self.collections.values())
+
+    def tick(self) -> None:
+        """enforce() from the read path, at most every READ_ENFORCE_INTERVAL_SECONDS"""
+        if time.monotonic() - self._last_enforced >= READ_ENFORCE_INTERVAL_SECONDS:
+            self.enforce()
+
+    def enforce(self) -> None:
+        """Drop expired entries, then least recently used ones until under budget"""
+        now = self._last_enforced = time.monotonic()
+        for collection in self.collections.values():
+            if collection.ttl_seconds:
+                self._evict_while(collection, lambda accessed: now - accessed > collection.ttl_seconds, "ttl")
+        if not self.budget_bytes or self.used_bytes <= self.budget_bytes:
+            return
+        for name in EVICTION_ORDER:
+            collection = self.collections.get(name)
+            if collection is None or not collection.evictable:
+                continue
+            self._evict_while(
+                collection,
+                lambda accessed: (self.used_bytes > self.budget_bytes
+                                  and now - accessed > self.pin_seconds),
+                "lru",
+            )
+            if self.used_bytes <= self.budget_bytes:
+                return
+
+    def _evict_while(self, collection: TrackedCollection, condition: Callable[[float], bool],
+                     reason: str) -> None:
+        # Entries are in access order, so the first one that fails the
+        # condition means every later one fails too
+        while True:
+            oldest = collection.oldest()
+            if oldest is None or not condition(oldest[1]):
+                return
+            key = oldest[0]
+            collection.on_evict(key)
+            collection.remove(key)
+            if reason == "ttl":
+                collection.evicted_ttl += 1
+            else:
+                collection.evicted_lru += 1
+            self.metrics.increment(f"memory.evicted.{collection.name}")
+
+    def report(self) -> dict:
+        """Usage against the budget and eviction counts per collection"""
+        return {
+            "budget_bytes": self.budget_bytes or None,
+            "used_bytes": self.used_bytes,
+            "pin_seconds": self.pin_seconds,
+            "collections": {name: c.stats() for name, c in self.collections.items()},
+        }
+
+# Last tracemalloc snapshot, for reporting growth between calls
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+def tracemalloc_report(top: int = 10) -> dict:
+    """Top allocation sites, and growth since the previous call.
+
+    Starts tracing on the first call (or at startup with MEMORY_TRACEMALLOC=true);
+    tracing slows allocation, so leave it off in normal operation.
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _last_snapshot = None
+        return {"tracing": True, "started": True, "top": [], "growth": []}
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    current, peak = tracemalloc.get_traced_memory()
+    report = {
+        "tracing": True,
+        "started": False,
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": _format_stats(snapshot.statistics("lineno")[:top]),
+        "growth": [],
+    }
+    if _last_snapshot is not None:
+        report["growth"] = _format_stats(snapshot.compare_to(_last_snapshot, "lineno")[:top])
+    _last_snapshot = snapshot
+    return report
+
+def stop_tracemalloc() -> None:
+    """Stop tracing and drop the saved snapshot"""
+    global _last_snapshot
+    tracemalloc.stop()
+    _last_snapshot = None
+
+def _format_stats(stats: List) -> List[dict]:
+    formatted = []
+    for stat in stats:
+        frame = stat.traceback[0]
+        entry = {"location": f"{frame.filename}:{frame.lineno}", "bytes": stat.size, "count": stat.count}
+        if hasattr(stat, "size_diff"):
+            entry["bytes_diff"] = stat.size_diff
+            entry["count_diff"] = stat.count_diff
+        formatted.append(entry)
+    return formatted
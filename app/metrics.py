@@ -0,0 +1,72 @@
+"""
+Lightweight in-process metrics for Quiz Generator
+Counters and timing summaries exposed through the admin endpoints
+"""
+from collections import deque
+from typing import Deque, Dict
+
+# Recent observations kept per timing for percentile estimates
+TIMING_WINDOW = 1024
+
+class Timing:
+    """Running count/total/max plus a window of recent values"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=TIMING_WINDOW)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p * len(recent)))]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "max": self.max,
+        }
+
+class Metrics:
+    """Named counters and timings"""
+
+    def __init__(self):
+        self.counters: Dict[str, float] = {}
+        self.timings: Dict[str, Timing] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a timing observation in seconds"""
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = Timing()
+        timing.observe(value)
+
+    def snapshot(self) -> dict:
+        """Current values of every counter and timing"""
+        return {
+            "counters": dict(self.counters),
+            "timings": {name: timing.summary() for name, timing in self.timings.items()},
+        }
+
+# Global metrics registry
+metrics = Metrics()
+
+def get_metrics() -> Metrics:
+    """Get metrics registry"""
+    return metrics
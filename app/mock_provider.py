@@ -0,0 +1,303 @@
+"""
+Simulated LLM provider
+Stands in for the Gemini generateContent API with seeded latency, token
+throughput, injected 429/500 errors, malformed output and streaming
+
+In-process: LLM_MOCK_MODE=true with LLM_MOCK_PROVIDER=simulated sends mock
+generations through GeminiClient (chunking, retries, parsing, scheduler)
+against this provider without any network.
+
+Standalone:
+    python -m app.mock_provider --port 8090 --latency-ms 1500 --rate-limit-rate 0.05
+    GEMINI_API_BASE=http://127.0.0.1:8090/v1beta GEMINI_API_KEY=mock LLM_MOCK_MODE=false python main.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from dataclasses import dataclass, fields
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.gemini_client import GeminiClient
+
+# Prompts whose attempt counters are remembered; past this the counters restart
+MAX_TRACKED_PROMPTS = 100_000
+
+class MockProviderError(Exception):
+    """Injected provider failure, carrying the HTTP status it maps to"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+@dataclass
+class MockProviderConfig:
+    """Simulation parameters; defaults come from MOCK_LLM_* environment variables"""
+    seed: int = 0
+    # Time to first token: lognormal with this median and shape (0 = fixed)
+    latency_ms: float = 800.0
+    latency_sigma: float = 0.5
+    # Output speed after the first token (0 = instant)
+    tokens_per_second: float = 80.0
+    # Probabilities per call
+    rate_limit_rate: float = 0.0
+    server_error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    # Tokens per streamed event
+    stream_chunk_tokens: int = 16
+
+    @classmethod
+    def from_env(cls, **overrides) -> "MockProviderConfig":
+        values = {}
+        for f in fields(cls):
+            raw = os.getenv(f"MOCK_LLM_{f.name.upper()}")
+            if raw:
+                values[f.name] = type(f.default)(raw)
+        values.update({name: value for name, value in overrides.items() if value is not None})
+        return cls(**values)
+
+class MockProvider:
+    """Seeded stand-in for generateContent.
+
+    Every draw for a call comes from a generator seeded with (seed, prompt,
+    attempt number for that prompt), so a run is reproducible however
+    concurrent calls interleave, and a retried prompt draws afresh.
+    """
+
+    def __init__(self, config: Optional[MockProviderConfig] = None):
+        self.config = config or MockProviderConfig.from_env()
+        self.stats: Dict[str, float] = {
+            "requests": 0, "rate_limited": 0, "server_errors": 0, "malformed": 0, "output_tokens": 0
+        }
+        self._attempts: Dict[str, int] = {}
+        self._app: Optional[FastAPI] = None
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:16]
+        if len(self._attempts) >= MAX_TRACKED_PROMPTS:
+            self._attempts.clear()
+        attempt = self._attempts[digest] = self._attempts.get(digest, 0) + 1
+        return random.Random(f"{self.config.seed}:{digest}:{attempt}")
+
+    def _first_token_delay(self, rng: random.Random) -> float:
+        median = self.config.latency_ms / 1000
+        if median <= 0:
+            return 0.0
+        return median * math.exp(rng.gauss(0, self.config.latency_sigma)) if self.config.latency_sigma else median
+
+    def _plan(self, prompt: str) -> Tuple[float, str, Optional[MockProviderError]]:
+        """Draw the outcome of one call: (first-token delay, response text, injected error)"""
+        self.stats["requests"] += 1
+        rng = self._rng(prompt)
+        delay = self._first_token_delay(rng)
+        roll = rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            # Rejections come back quicker than answers
+            return delay / 2, "", MockProviderError(429, "Resource has been exhausted (e.g. check quota).")
+        if roll < self.config.rate_limit_rate + self.config.server_error_rate:
+            self.stats["server_errors"] += 1
+            return delay / 2, "", MockProviderError(500, "An internal error has occurred.")
+
+        text = render_response(prompt, rng)
+        if rng.random() < self.config.malformed_rate:
+            self.stats["malformed"] += 1
+            text = malform(text, rng)
+        self.stats["output_tokens"] += count_tokens(text)
+        return delay, text, None
+
+    def _generation_time(self, text: str) -> float:
+        if self.config.tokens_per_second <= 0:
+            return 0.0
+        return count_tokens(text) / self.config.tokens_per_second
+
+    async def complete(self, prompt: str) -> str:
+        """Whole response, after first-token latency plus generation time"""
+        delay, text, error = self._plan(prompt)
+        await asyncio.sleep(delay + self._generation_time(text))
+        if error:
+            raise error
+        return text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Response in pieces of stream_chunk_tokens, paced at tokens_per_second"""
+        delay, text, error = self._plan(prompt)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        step = max(1, self.config.stream_chunk_tokens) * 4
+        for start in range(0, len(text), step):
+            piece = text[start:start + step]
+            if start:
+                await asyncio.sleep(self._generation_time(piece))
+            yield piece
+
+    @property
+    def app(self) -> FastAPI:
+        """HTTP stand-in for the Gemini v1beta API"""
+        if self._app is None:
+            self._app = create_app(self)
+        return self._app
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """httpx transport that serves requests from this provider in-process"""
+        return httpx.ASGITransport(app=self.app)
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (about 4 characters per token, as in the scheduler)"""
+    return max(1, len(text) // 4)
+
+def _material(prompt: str) -> List[str]:
+    match = re.search(r"Study this material carefully:(.*?)CREATE \d+", prompt, flags=re.DOTALL)
+    text = match.group(1) if match else prompt
+    sentences = [" ".join(s.split()) for s in re.split(r"(?<=[.!?])\s+", text)]
+    # Parentheses would be read as option markers
+    return [s.replace(")", "").replace("(", "")[:160] for s in sentences if len(s.split()) >= 4] \
+        or ["The material covers the main topic of the source document."]
+
+def render_response(prompt: str, rng: random.Random) -> str:
+    """Well-formed answer to a quiz prompt, in the QUESTION/VARIANT format GeminiClient parses"""
+    variants_match = re.search(r"CREATE (\d+) VERSIONS OF (\d+) QUESTIONS", prompt)
+    questions_match = re.search(r"CREATE (\d+) QUESTIONS", prompt)
+    if variants_match:
+        variants, per_variant = int(variants_match.group(1)), int(variants_match.group(2))
+    else:
+        variants, per_variant = 0, int(questions_match.group(1)) if questions_match else 5
+    types_match = re.search(r"Question types: (.+)", prompt)
+    types_text = types_match.group(1).lower() if types_match else "multiple"
+    types = [name for key, name in (("multiple", "multiple_choice"), ("true", "true_false"),
+                                    ("short", "short_answer")) if key in types_text] or ["multiple_choice"]
+    sentences = _material(prompt)
+
+    def questions(count: int, label: str) -> List[str]:
+        blocks = []
+        for i in range(count):
+            sentence = rng.choice(sentences)
+            question_type = types[i % len(types)]
+            lines = [f"QUESTION {i + 1}:", f"Type: {question_type}"]
+            if question_type == "multiple_choice":
+                distractors = rng.sample(sentences, min(3, len(sentences)))
+                options = [sentence] + [d for d in distractors if d != sentence]
+                options = (options + ["None of the above", "All of the above", "Not stated"])[:4]
+                rng.shuffle(options)
+                lines += [f"Question: {label}Which statement is supported by the material? #{i + 1}",
+                          "Options: " + " ".join(f"{chr(65 + j)}) {option}" for j, option in enumerate(options)),
+                          f"Answer: {sentence}"]
+            elif question_type == "true_false":
+                lines += [f"Question: {label}{sentence}", f"Answer: {rng.choice(['True', 'False'])}"]
+            else:
+                lines += [f"Question: {label}Explain in your own words: {sentence}", f"Answer: {sentence}"]
+            lines.append(f"Explanation: The material states: {sentence}")
+            blocks.append("\n".join(lines))
+        return blocks
+
+    if not variants:
+        return "\n\n".join(questions(per_variant, ""))
+    return "\n\n".join(
+        f"VARIANT {chr(65 + v)}:\n\n" + "\n\n".join(questions(per_variant, f"[{chr(65 + v)}] "))
+        for v in range(variants)
+    )
+
+def malform(text: str, rng: random.Random) -> str:
+    """Turn a good response into a bad one: truncated mid-question, or prose ignoring the format"""
+    if rng.random() < 0.5:
+        return text[:rng.randint(1, max(1, len(text) - 1))]
+    return "Sure! Here is a quiz based on the material. " + " ".join(
+        line.split(":", 1)[-1].strip() for line in text.splitlines() if line.strip()
+    )[:2000]
+
+def _candidate(text: str, finish_reason: Optional[str] = "STOP") -> dict:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    return {"candidates": [candidate]}
+
+def _error_response(error: MockProviderError) -> JSONResponse:
+    status = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL"}.get(error.status_code, "UNKNOWN")
+    headers = {"Retry-After": "1"} if error.status_code == 429 else None
+    return JSONResponse(
+        {"error": {"code": error.status_code, "message": str(error), "status": status}},
+        status_code=error.status_code, headers=headers
+    )
+
+def _prompt(payload: dict) -> str:
+    return "".join(part.get("text", "") for content in payload.get("contents", [])
+                   for part in content.get("parts", []))
+
+def create_app(provider: MockProvider) -> FastAPI:
+    """FastAPI app serving generateContent and streamGenerateContent from provider"""
+    mock_app = FastAPI(title="Mock Gemini API")
+
+    @mock_app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        try:
+            text = await provider.complete(_prompt(await request.json()))
+        except MockProviderError as e:
+            return _error_response(e)
+        return _candidate(text)
+
+    @mock_app.post("/v1beta/models/{model}:streamGenerateContent")
+    async def stream_generate_content(model: str, request: Request, alt: Optional[str] = None):
+        pieces = provider.stream(_prompt(await request.json()))
+        try:
+            # Injected errors surface before the first byte, like a rejected call
+            first = await pieces.__anext__()
+        except MockProviderError as e:
+            return _error_response(e)
+
+        async def body():
+            sse = alt == "sse"
+            yield ("data: " if sse else "[") + json.dumps(_candidate(first, None))
+            async for piece in pieces:
+                yield ("\n\ndata: " if sse else ",\n") + json.dumps(_candidate(piece, None))
+            yield ("\n\ndata: " if sse else ",\n") + json.dumps(_candidate("", "STOP")) + ("\n\n" if sse else "]")
+
+        return StreamingResponse(body(), media_type="text/event-stream" if alt == "sse" else "application/json")
+
+    @mock_app.get("/mock/stats")
+    async def stats():
+        return {"config": provider.config.__dict__, "stats": provider.stats}
+
+    return mock_app
+
+# Global provider instance
+mock_provider: Optional[MockProvider] = None
+
+def get_mock_provider() -> MockProvider:
+    """Get the in-process simulated provider"""
+    global mock_provider
+    if mock_provider is None:
+        mock_provider = MockProvider()
+    return mock_provider
+
+def get_simulated_gemini_client() -> GeminiClient:
+    """GeminiClient whose calls are answered in-process by the simulated provider"""
+    client = GeminiClient()
+    client.api_token = client.api_token or "mock"
+    client.transport = get_mock_provider().transport()
+    return client
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m app.mock_provider", description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    for f in fields(MockProviderConfig):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=type(f.default),
+                            help=f"Default: MOCK_LLM_{f.name.upper()} or {f.default}")
+    args = parser.parse_args(argv)
+    config = MockProviderConfig.from_env(**{f.name: getattr(args, f.name) for f in fields(MockProviderConfig)})
+    print(f"✅ Mock Gemini API on http://{args.host}:{args.port}/v1beta ({config})")
+    uvicorn.run(MockProvider(config).app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
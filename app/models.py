@@ -1,8 +1,8 @@
 """
 Pydantic models for Quiz Generator application
 """
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from enum import Enum
 
@@ -29,14 +29,67 @@ class UploadResponse(BaseModel):
     file_size: int
     status: ProcessingStatus
     message: str
+    digest: Optional[str] = None  # Resumable uploads: sha256 over the part digests, "-<parts>"
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    file_size: int = Field(..., gt=0)
+    part_size: Optional[int] = None  # Server default when omitted
+
+class UploadPart(BaseModel):
+    part_number: int
+    size: int
+    sha256: str
+
+class UploadSession(BaseModel):
+    """A resumable upload; parts lists what has been received so far"""
+    upload_id: str
+    filename: str
+    file_size: int
+    part_size: int
+    part_count: int
+    created_at: datetime
+    expires_at: datetime
+    parts: List[UploadPart] = []
+
+class BatchFileResult(BaseModel):
+    filename: str
+    file_id: Optional[str] = None  # None when the file was rejected
+    status: ProcessingStatus
+    message: Optional[str] = None
+    word_count: Optional[int] = None
+
+class BatchUploadStatus(BaseModel):
+    """Aggregate extraction progress of a multi-file or ZIP upload"""
+    batch_id: str
+    status: ProcessingStatus
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    files: List[BatchFileResult] = []
 
 class TextExtractionResult(BaseModel):
     file_id: str
     text_content: str
     word_count: int
     extraction_time: float
+    page_offsets: Optional[List[int]] = None  # Start of each PDF page in text_content
+
+class TextSlice(BaseModel):
+    """A window of a file's extracted text, by character range or PDF page"""
+    file_id: str
+    start: int
+    end: int
+    total_chars: int
+    word_count: int
+    page: Optional[int] = None
+    page_count: Optional[int] = None
+    text: str
 
 class QuizQuestion(BaseModel):
+    # Immutable so quiz versions and duplicates can share question objects
+    model_config = ConfigDict(frozen=True)
+
     id: str
     question: str
     question_type: QuestionType
@@ -54,6 +107,39 @@ class Quiz(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     metadata: Dict[str, Any] = {}
+    version: int = 1  # Bumped on every edit, for optimistic concurrency
+
+class QuizSummary(BaseModel):
+    """List-view projection of a Quiz, stored next to it so listings skip the questions"""
+    id: str
+    title: str
+    description: Optional[str] = None
+    source_file_id: str
+    question_count: int
+    question_types: Dict[str, int] = {}
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    variant_group_id: Optional[str] = None
+    variant_label: Optional[str] = None
+
+    @classmethod
+    def from_quiz(cls, quiz: Quiz) -> "QuizSummary":
+        question_types: Dict[str, int] = {}
+        for question in quiz.questions:
+            key = question.question_type.value
+            question_types[key] = question_types.get(key, 0) + 1
+        return cls(
+            id=quiz.id,
+            title=quiz.title,
+            description=quiz.description,
+            source_file_id=quiz.source_file_id,
+            question_count=len(quiz.questions),
+            question_types=question_types,
+            created_at=quiz.created_at,
+            updated_at=quiz.updated_at,
+            variant_group_id=quiz.metadata.get("variant_group_id"),
+            variant_label=quiz.metadata.get("variant_label"),
+        )
 
 class QuizGenerationRequest(BaseModel):
     file_id: str
@@ -62,17 +148,58 @@ class QuizGenerationRequest(BaseModel):
     difficulty_level: str = "medium"
     focus_topics: Optional[List[str]] = None
     language: str = "english"
+    variants: int = Field(default=1, ge=1, le=5)  # Disjoint question sets, e.g. exam versions A/B/C
+    use_question_bank: bool = True  # Reuse previously generated questions before calling the LLM
 
 class QuizGenerationResponse(BaseModel):
     quiz_id: str
     status: ProcessingStatus
     message: str
     quiz: Optional[Quiz] = None
+    group_id: Optional[str] = None  # Links the quizzes of a multi-variant request
+    variant_quizzes: Optional[List[Quiz]] = None
+
+class BatchQuizGenerationItem(BaseModel):
+    """Outcome of one request of a batch generation, streamed as soon as it finishes"""
+    index: int  # Position of the request in the batch
+    file_id: str
+    status: ProcessingStatus
+    quiz: Optional[Quiz] = None
+    variant_quizzes: Optional[List[Quiz]] = None
+    error: Optional[str] = None
 
 class QuizUpdateRequest(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     questions: Optional[List[QuizQuestion]] = None
+    version: Optional[int] = None  # Version the edit was based on; stale edits are rejected
+
+class QuestionUpdateRequest(BaseModel):
+    """Fields to change on one question; unset fields are left as they are"""
+    question: Optional[str] = None
+    question_type: Optional[QuestionType] = None
+    options: Optional[List[str]] = None
+    correct_answer: Optional[str] = None
+    explanation: Optional[str] = None
+    difficulty: Optional[str] = None
+    version: Optional[int] = None
+
+class QuizPatchOperation(BaseModel):
+    """One JSON-Patch style operation; question paths use question IDs, not indexes"""
+    op: Literal["add", "remove", "replace", "test"]
+    path: str
+    value: Optional[Any] = None
+
+class QuizImportLineError(BaseModel):
+    line: int
+    error: str
+
+class QuizImportResponse(BaseModel):
+    """Outcome of a bulk NDJSON import"""
+    imported: int = 0
+    questions: int = 0
+    failed: int = 0
+    errors: List[QuizImportLineError] = []  # First invalid lines only
 
 class ErrorResponse(BaseModel):
     error: str
@@ -87,3 +214,14 @@ class FileInfo(BaseModel):
     upload_time: datetime
     text_extracted: bool
     word_count: Optional[int] = None
+
+class QuestionBankEntry(BaseModel):
+    question: QuizQuestion
+    source_file_id: str
+    chunk_hash: str
+    difficulty: str
+    language: str = "english"
+    origin: str = "interactive"  # "interactive" or "pregenerated"
+    created_at: datetime
+    times_used: int = 0
+    stale: bool = False
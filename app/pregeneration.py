@@ -0,0 +1,182 @@
+"""
+Speculative quiz pre-generation
+Seeds the question bank right after text extraction so the first quiz
+request for a file can be served without waiting for the LLM
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Dict, List, Set
+
+from app.database import run_db
+from app.models import QuestionType
+from app.scheduler import estimate_generation_tokens
+
+class PreGenerator:
+    """Low-priority background generation with a daily token budget.
+
+    Speculative runs only start while no interactive generation is active
+    and are cancelled as soon as one begins; a cancelled run is retried once
+    the interactive work is done. Questions that already reached the bank
+    before cancellation are kept.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("PREGENERATE_ENABLED", "false").lower() == "true"
+        self.daily_token_budget = int(os.getenv("PREGENERATE_DAILY_TOKEN_BUDGET", "200000"))
+        self.num_questions = int(os.getenv("PREGENERATE_NUM_QUESTIONS", "10"))
+        self.max_attempts = int(os.getenv("PREGENERATE_MAX_ATTEMPTS", "3"))
+        self.question_types = [
+            QuestionType(value.strip())
+            for value in os.getenv("PREGENERATE_QUESTION_TYPES", "multiple_choice").split(",")
+            if value.strip()
+        ]
+
+        self._budget_day = date.today()
+        self._tokens_used = 0
+        self._interactive_active = 0
+        self._idle_waiters: List[asyncio.Future] = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running: Set[str] = set()
+        self.pregenerated_files: Set[str] = set()
+        self.used_files: Set[str] = set()
+        self.stats = {
+            "scheduled": 0,
+            "completed": 0,
+            "preempted": 0,
+            "skipped_budget": 0,
+            "failed": 0,
+            "questions_seeded": 0,
+            "requests_served": 0,
+            "questions_served": 0,
+        }
+
+    @asynccontextmanager
+    async def interactive(self):
+        """Mark interactive LLM work; running speculative work is preempted"""
+        self._interactive_active += 1
+        for file_id in list(self._running):
+            task = self._tasks.get(file_id)
+            if task and not task.done():
+                task.cancel()
+        try:
+            yield
+        finally:
+            self._interactive_active -= 1
+            if self._interactive_active == 0:
+                for waiter in self._idle_waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+                self._idle_waiters.clear()
+
+    async def _wait_for_idle(self) -> None:
+        """Wait until no interactive generation is in progress"""
+        while self._interactive_active > 0:
+            waiter = asyncio.get_running_loop().create_future()
+            self._idle_waiters.append(waiter)
+            await waiter
+
+    def schedule(self, file_id: str, quiz_generator) -> bool:
+        """Queue speculative generation for a freshly extracted file"""
+        if not self.enabled or file_id in self._tasks:
+            return False
+
+        self.stats["scheduled"] += 1
+        task = asyncio.create_task(self._run(file_id, quiz_generator))
+        self._tasks[file_id] = task
+        task.add_done_callback(
+            lambda done: self._tasks.pop(file_id, None) if self._tasks.get(file_id) is done else None
+        )
+        return True
+
+    def cancel(self, file_id: str) -> None:
+        """Drop pending or running pre-generation for a file"""
+        task = self._tasks.pop(file_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    async def _run(self, file_id: str, quiz_generator) -> None:
+        """Generate into the bank, retrying after preemption"""
+        # Tokens already charged for this file; a retry after preemption is
+        # only charged if it needs more than the first attempt reserved
+        reserved = 0
+        for _ in range(self.max_attempts):
+            await self._wait_for_idle()
+
+            missing = self.num_questions - quiz_generator.question_bank.fresh_count(file_id)
+            if missing <= 0:
+                break
+
+            extracted_text = await run_db(quiz_generator.db.get_extracted_text, file_id)
+            if not extracted_text:
+                return
+            estimate = estimate_generation_tokens(extracted_text.text_content, missing)
+            if estimate > reserved and not self._reserve_tokens(estimate - reserved):
+                self.stats["skipped_budget"] += 1
+                print(f"Pre-generation skipped for file {file_id}: daily token budget reached")
+                return
+            reserved = max(reserved, estimate)
+
+            self._running.add(file_id)
+            try:
+                seeded = await quiz_generator.pregenerate_questions(
+                    file_id, missing, self.question_types
+                )
+                self.stats["questions_seeded"] += seeded
+                self.stats["completed"] += 1
+                self.pregenerated_files.add(file_id)
+                print(f"Pre-generated {seeded} questions for file: {file_id}")
+                return
+            except asyncio.CancelledError:
+                if file_id not in self._tasks:
+                    # Cancelled through cancel(), not preempted
+                    raise
+                asyncio.current_task().uncancel()
+                self.stats["preempted"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"Pre-generation failed for file {file_id}: {e}")
+                return
+            finally:
+                self._running.discard(file_id)
+
+    def _reserve_tokens(self, tokens: int) -> bool:
+        """Charge tokens against today's budget if they fit"""
+        today = date.today()
+        if today != self._budget_day:
+            self._budget_day = today
+            self._tokens_used = 0
+        if self._tokens_used + tokens > self.daily_token_budget:
+            return False
+        self._tokens_used += tokens
+        return True
+
+    def record_use(self, file_id: str, bank_hits: int) -> None:
+        """Record that an interactive request was served from pre-generated questions"""
+        if bank_hits and file_id in self.pregenerated_files:
+            self.used_files.add(file_id)
+            self.stats["requests_served"] += 1
+            self.stats["questions_served"] += bank_hits
+
+    def report(self) -> dict:
+        """Pre-generation counters, budget state and usage ratio"""
+        return {
+            "enabled": self.enabled,
+            "daily_token_budget": self.daily_token_budget,
+            "tokens_used_today": self._tokens_used if self._budget_day == date.today() else 0,
+            "pending": len(self._tasks),
+            **self.stats,
+            "files_pregenerated": len(self.pregenerated_files),
+            "files_used": len(self.used_files),
+            # Share of pre-generated files whose questions were later served
+            "usage_ratio": (len(self.used_files) / len(self.pregenerated_files)
+                            if self.pregenerated_files else None),
+        }
+
+# Global pre-generator instance
+pregenerator = PreGenerator()
+
+def get_pregenerator() -> PreGenerator:
+    """Get pre-generator instance"""
+    return pregenerator
@@ -0,0 +1,42 @@
+"""
+Field projections for list endpoints
+Parses the `fields=` query parameter and trims listed models to those fields
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Type
+
+from pydantic import BaseModel
+
+class ProjectionError(Exception):
+    """Raised when a `fields=` parameter names unknown fields"""
+    pass
+
+def parse_fields(fields: Optional[str], *models: Type[BaseModel]) -> Optional[Set[str]]:
+    """Split a comma separated field list and check it against the models' fields"""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    known = set().union(*(model.model_fields for model in models))
+    unknown = sorted(requested - known)
+    if unknown:
+        raise ProjectionError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def covers(fields: Optional[Set[str]], model: Type[BaseModel]) -> bool:
+    """True when every requested field is available on the model"""
+    return fields is not None and fields <= model.model_fields.keys()
+
+def project(items: Iterable[BaseModel], fields: Set[str],
+            derive: Optional[Callable[[Any], BaseModel]] = None) -> List[Dict[str, Any]]:
+    """JSON-ready dicts holding only the requested fields.
+
+    Fields the items do not have are taken from derive(item), e.g. summary
+    fields such as question_count computed from a full quiz.
+    """
+    rows = []
+    for item in items:
+        row = item.model_dump(mode="json", include=fields)
+        missing = fields - row.keys()
+        if missing and derive is not None:
+            row.update(derive(item).model_dump(mode="json", include=missing))
+        rows.append(row)
+    return rows
@@ -0,0 +1,203 @@
+"""
+Question bank for reusing generated questions across quiz requests
+Every generated question is indexed by source file, chunk hash, question
+type, difficulty and language so later requests can be assembled without the LLM
+"""
+import hashlib
+import re
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models import QuestionBankEntry, QuestionType, QuizQuestion
+
+# (source_file_id, question_type, difficulty, language)
+BucketKey = Tuple[str, QuestionType, str, str]
+
+DEFAULT_LANGUAGE = "english"
+
+def chunk_hash(chunk_text: str) -> str:
+    """Stable short hash identifying a chunk of source text"""
+    return hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()[:16]
+
+def normalize_language(language: str) -> str:
+    """Bucket form of a request language ("English " -> "english")"""
+    return language.strip().lower() or DEFAULT_LANGUAGE
+
+def normalize_question_text(text: str) -> str:
+    """Normalize question text so trivially reworded duplicates compare equal"""
+    return re.sub(r'[\W_]+', ' ', text.lower()).strip()
+
+class QuestionBank:
+    """In-memory question bank with per-constraint selection buckets.
+
+    The bank lives in the process: it is not written to the storage backend,
+    so it starts empty after a restart and is not shared between workers.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, QuestionBankEntry] = {}
+        # Fresh entries per constraint bucket, least recently served first
+        self._buckets: Dict[BucketKey, "OrderedDict[str, None]"] = {}
+        self._by_file: Dict[str, Set[str]] = {}
+        self._texts: Dict[str, Dict[str, str]] = {}
+
+    def add(self, file_id: str, chunk_text_hash: str, questions: Iterable[QuizQuestion],
+            difficulty: str, origin: str = "interactive",
+            language: str = DEFAULT_LANGUAGE) -> int:
+        """Add generated questions to the bank, skipping duplicates. Returns number added"""
+        language = normalize_language(language)
+        added = 0
+        texts = self._texts.setdefault(file_id, {})
+        for question in questions:
+            key = normalize_question_text(question.question)
+            if key in texts:
+                continue
+
+            entry = QuestionBankEntry(
+                question=question,
+                source_file_id=file_id,
+                chunk_hash=chunk_text_hash,
+                difficulty=difficulty,
+                language=language,
+                origin=origin,
+                created_at=datetime.now()
+            )
+            self.entries[question.id] = entry
+            texts[key] = question.id
+            self._by_file.setdefault(file_id, set()).add(question.id)
+            self._buckets.setdefault(
+                (file_id, question.question_type, difficulty, language), OrderedDict()
+            )[question.id] = None
+            added += 1
+        return added
+
+    def select(self, file_id: str, question_types: List[QuestionType],
+               difficulty: str, count: int,
+               language: str = DEFAULT_LANGUAGE) -> List[Tuple[QuizQuestion, str]]:
+        """Pick up to `count` fresh questions matching the constraints, each with its origin.
+
+        Types are filled round-robin like the generators do; a type that runs
+        short is topped up from the others. Served entries move to the back of
+        their bucket so consecutive requests rotate through the bank.
+        """
+        if count <= 0 or not question_types:
+            return []
+
+        bucket_language = normalize_language(language)
+        types = list(dict.fromkeys(question_types))
+        quotas = [count // len(types) + (1 if i < count % len(types) else 0)
+                  for i in range(len(types))]
+
+        picked: List[str] = []
+        picked_ids: Set[str] = set()
+        shortfall = 0
+        for question_type, quota in zip(types, quotas):
+            taken = self._take(file_id, question_type, difficulty, bucket_language, quota, picked_ids)
+            picked.extend(taken)
+            picked_ids.update(taken)
+            shortfall += quota - len(taken)
+
+        for question_type in types:
+            if shortfall <= 0:
+                break
+            taken = self._take(file_id, question_type, difficulty, bucket_language, shortfall, picked_ids)
+            picked.extend(taken)
+            picked_ids.update(taken)
+            shortfall -= len(taken)
+
+        selected = []
+        for question_id in picked:
+            entry = self.entries[question_id]
+            entry.times_used += 1
+            # Quizzes get their own question ids so edits never touch the bank
+            selected.append((entry.question.model_copy(update={"id": str(uuid.uuid4())}), entry.origin))
+        return selected
+
+    def _take(self, file_id: str, question_type: QuestionType, difficulty: str, language: str,
+              limit: int, exclude: Set[str]) -> List[str]:
+        """Take up to `limit` ids from the front of a bucket and rotate them to the back"""
+        bucket = self._buckets.get((file_id, question_type, difficulty, language))
+        if not bucket or limit <= 0:
+            return []
+
+        taken = []
+        for question_id in bucket:
+            if len(taken) == limit:
+                break
+            if question_id not in exclude:
+                taken.append(question_id)
+        for question_id in taken:
+            bucket.move_to_end(question_id)
+        return taken
+
+    def mark_stale(self, file_id: str, keep_chunk_hashes: Optional[Set[str]] = None) -> int:
+        """Tag a file's entries as stale, except those whose chunk is still current.
+
+        Stale entries stay in the bank for inspection but are never selected.
+        Returns the number of newly stale entries.
+        """
+        marked = 0
+        texts = self._texts.get(file_id, {})
+        for question_id in self._by_file.get(file_id, set()):
+            entry = self.entries[question_id]
+            if entry.stale:
+                continue
+            if keep_chunk_hashes is not None and entry.chunk_hash in keep_chunk_hashes:
+                continue
+
+            entry.stale = True
+            bucket = self._buckets.get(
+                (file_id, entry.question.question_type, entry.difficulty, entry.language)
+            )
+            if bucket is not None:
+                bucket.pop(question_id, None)
+            texts.pop(normalize_question_text(entry.question.question), None)
+            marked += 1
+        return marked
+
+    def fresh_count(self, file_id: str) -> int:
+        """Number of selectable entries for a file"""
+        return sum(len(bucket) for key, bucket in self._buckets.items() if key[0] == file_id)
+
+    def remove_file(self, file_id: str) -> int:
+        """Remove every entry generated from a file"""
+        question_ids = self._by_file.pop(file_id, set())
+        for question_id in question_ids:
+            self.entries.pop(question_id, None)
+        self._texts.pop(file_id, None)
+        for key in [key for key in self._buckets if key[0] == file_id]:
+            del self._buckets[key]
+        return len(question_ids)
+
+    def stats(self, file_id: Optional[str] = None) -> dict:
+        """Summarize bank contents, optionally for a single file"""
+        if file_id is None:
+            entries = list(self.entries.values())
+        else:
+            entries = [self.entries[qid] for qid in self._by_file.get(file_id, set())]
+
+        by_type: Dict[str, int] = {}
+        served_by_origin: Dict[str, int] = {}
+        for entry in entries:
+            if not entry.stale:
+                question_type = entry.question.question_type.value
+                by_type[question_type] = by_type.get(question_type, 0) + 1
+            served_by_origin[entry.origin] = served_by_origin.get(entry.origin, 0) + entry.times_used
+
+        return {
+            "total": len(entries),
+            "fresh": sum(1 for e in entries if not e.stale),
+            "stale": sum(1 for e in entries if e.stale),
+            "times_used": sum(e.times_used for e in entries),
+            "by_question_type": by_type,
+            "served_by_origin": served_by_origin
+        }
+
+# Global question bank instance
+question_bank = QuestionBank()
+
+def get_question_bank() -> QuestionBank:
+    """Get question bank instance"""
+    return question_bank
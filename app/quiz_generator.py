@@ -1,17 +1,29 @@
 """
 Quiz generation service that orchestrates text extraction and LLM generation
 """
+import asyncio
+import os
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from app.models import (
     Quiz, QuizQuestion, QuizGenerationRequest, 
-    TextExtractionResult, ProcessingStatus, QuestionType
+    TextExtractionResult, ProcessingStatus, QuestionType, QuizSummary, BatchQuizGenerationItem
 )
-from app.database import get_database
+from app.database import get_database, run_db
 from app.file_parser import FileParser, FileParsingError
 from app.llm_client import get_llm_client, LLMClientError
+from app.gemini_client import get_gemini_client, split_into_chunks, variant_label
+from app.question_bank import get_question_bank, chunk_hash, normalize_question_text
+from app.pregeneration import get_pregenerator
+from app.scheduler import Priority, scheduling_context
+from app.single_flight import SingleFlight
+
+# Requests of one batch generation in progress at once; LLM calls are further
+# capped by the scheduler, this bounds the quizzes held in memory meanwhile
+BATCH_GENERATION_CONCURRENCY = int(os.getenv("BATCH_GENERATION_CONCURRENCY", 4))
+MAX_BATCH_GENERATION_REQUESTS = int(os.getenv("MAX_BATCH_GENERATION_REQUESTS", 100))
 
 class QuizGenerationError(Exception):
     """Custom exception for quiz generation errors"""
@@ -21,27 +33,44 @@ class QuizGeneratorService:
     """Service for generating quizzes from uploaded files"""
     
     def __init__(self):
-        self.db = get_database()
+        self._db = None
         self.llm_client = get_llm_client()
+        self.question_bank = get_question_bank()
+        self.pregenerator = get_pregenerator()
+        # Concurrent requests for the same file (batch items, upload pool) extract it once
+        self._extractions = SingleFlight("extraction")
+
+    @property
+    def db(self):
+        """Storage backend; the configured global one unless explicitly set"""
+        return self._db if self._db is not None else get_database()
+
+    @db.setter
+    def db(self, value):
+        self._db = value
     
     async def extract_text_from_file(self, file_id: str) -> TextExtractionResult:
         """Extract text from uploaded file"""
+        return await self._extractions.run(file_id, lambda: self._extract_text(file_id))
+    
+    async def _extract_text(self, file_id: str) -> TextExtractionResult:
+        """Parse a stored file and store the extracted text"""
         
         # Get file info and content
-        file_info = self.db.get_file_info(file_id)
+        file_info = await run_db(self.db.get_file_info, file_id)
         if not file_info:
             raise QuizGenerationError(f"File not found: {file_id}")
         
-        file_content = self.db.get_file_content(file_id)
+        file_content = await run_db(self.db.get_file_content, file_id)
         if not file_content:
             raise QuizGenerationError(f"File content not found: {file_id}")
         
         try:
             start_time = datetime.now()
             
-            # Extract text using file parser
-            text_content, word_count = FileParser.parse_file(
-                file_info.filename, file_content
+            # Extract text using file parser; parsing is CPU-bound, so keep it off the event loop
+            text_content, word_count, page_offsets = await asyncio.to_thread(
+                FileParser.parse_document, file_info.filename, file_content
             )
             
             extraction_time = (datetime.now() - start_time).total_seconds()
@@ -51,85 +80,181 @@ class QuizGeneratorService:
                 file_id=file_id,
                 text_content=text_content,
                 word_count=word_count,
-                extraction_time=extraction_time
+                extraction_time=extraction_time,
+                page_offsets=page_offsets
             )
             
             # Store extraction result
-            self.db.store_extracted_text(result)
+            await run_db(self.db.store_extracted_text, result)
+
+            # Bank entries from chunks that no longer exist are out of date
+            self.question_bank.mark_stale(file_id, self._current_chunk_hashes(text_content))
             
             return result
             
         except FileParsingError as e:
             raise QuizGenerationError(f"Text extraction failed: {str(e)}")
     
-    async def generate_quiz_from_text(self, request: QuizGenerationRequest) -> Quiz:
-        """Generate quiz from extracted text"""
-        
+    async def _get_clean_text(self, file_id: str):
+        """Get extracted text for a file with PDF metadata lines removed"""
+
         # Get extracted text
-        extracted_text = self.db.get_extracted_text(request.file_id)
+        extracted_text = await run_db(self.db.get_extracted_text, file_id)
         if not extracted_text:
             # Try to extract text if not already done
-            extracted_text = await self.extract_text_from_file(request.file_id)
+            extracted_text = await self.extract_text_from_file(file_id)
         
         text_content = extracted_text.text_content.strip()
         if not text_content:
             raise QuizGenerationError("No text content available for quiz generation")
             
         # Validate actual content vs metadata
-        lines = text_content.split('\n')
-        real_content_lines = [line for line in lines 
-                            if line.strip() and not line.strip().startswith(('/', '%'))]
-        
-        if not real_content_lines:
+        clean_text_content = _strip_metadata_lines(text_content)
+        if not clean_text_content:
             raise QuizGenerationError("No readable content found in document, only metadata was extracted")
+
+        return extracted_text, clean_text_content
+
+    def _current_chunk_hashes(self, text_content: str) -> set:
+        """Hashes of every chunk the LLM clients would cut from this text"""
+        clean_text_content = _strip_metadata_lines(text_content.strip())
+        chunks = split_into_chunks(clean_text_content, get_gemini_client().chunk_size)
+        # Mock mode answers the whole text as a single chunk
+        return {chunk_hash(chunk) for chunk in chunks} | {chunk_hash(clean_text_content)}
+
+    def _bank_recorder(self, request: QuizGenerationRequest, origin: str = "interactive"):
+        """Chunk callback that files generated questions into the question bank"""
+        def record(chunk_text: str, questions: List[QuizQuestion]) -> None:
+            self.question_bank.add(
+                request.file_id, chunk_hash(chunk_text), questions,
+                request.difficulty_level, origin, language=request.language
+            )
+        return record
+
+    async def _build_quiz(self, request: QuizGenerationRequest, questions: List[QuizQuestion],
+                    extracted_text: TextExtractionResult, title_suffix: str = "",
+                    extra_metadata: Optional[dict] = None) -> Quiz:
+        """Create a quiz record for generated questions"""
+
+        # Get file info for quiz metadata
+        file_info = await run_db(self.db.get_file_info, request.file_id)
+        metadata = {
+            "generation_request": request.dict(),
+            "source_word_count": extracted_text.word_count,
+            "extraction_time": extracted_text.extraction_time
+        }
+        metadata.update(extra_metadata or {})
+
+        return Quiz(
+            id=str(uuid.uuid4()),
+            title=f"Quiz from {file_info.filename if file_info else 'uploaded file'}{title_suffix}",
+            description=f"Generated quiz with {len(questions)} questions",
+            source_file_id=request.file_id,
+            questions=questions,
+            created_at=datetime.now(),
+            metadata=metadata
+        )
+
+    async def generate_quiz_from_text(self, request: QuizGenerationRequest) -> Quiz:
+        """Generate quiz from extracted text"""
+        
+        extracted_text, clean_text_content = await self._get_clean_text(request.file_id)
+
+        # Serve as much as possible from previously generated questions
+        selected = []
+        if request.use_question_bank and not request.focus_topics:
+            selected = self.question_bank.select(
+                request.file_id, request.question_types,
+                request.difficulty_level, request.num_questions, language=request.language
+            )
+        questions = [question for question, _ in selected]
+        bank_hits = len(questions)
+        # Questions an earlier interactive request left in the bank are not pre-generation's doing
+        self.pregenerator.record_use(
+            request.file_id, sum(1 for _, origin in selected if origin == "pregenerated")
+        )
             
         try:
-            # Generate questions using LLM with validated content
-            clean_text_content = '\n'.join(real_content_lines)
-            questions = await self.llm_client.generate_quiz(
-                text_content=clean_text_content,
-                num_questions=request.num_questions,
-                question_types=request.question_types,
-                difficulty_level=request.difficulty_level,
-                focus_topics=request.focus_topics,
-                language=request.language
-            )
+            remaining = request.num_questions - bank_hits
+            if remaining > 0:
+                # Generate the remainder using LLM with validated content
+                async with self.pregenerator.interactive():
+                    generated = await self.llm_client.generate_quiz(
+                        text_content=clean_text_content,
+                        num_questions=remaining,
+                        question_types=request.question_types,
+                        difficulty_level=request.difficulty_level,
+                        focus_topics=request.focus_topics,
+                        language=request.language,
+                        on_chunk=self._bank_recorder(request)
+                    )
+                seen = {normalize_question_text(q.question) for q in questions}
+                questions.extend(q for q in generated
+                                 if normalize_question_text(q.question) not in seen)
             
             if not questions:
                 raise QuizGenerationError("No questions were generated")
             
-            # Get file info for quiz metadata
-            file_info = self.db.get_file_info(request.file_id)
-            
             # Create quiz
-            quiz = Quiz(
-                id=str(uuid.uuid4()),
-                title=f"Quiz from {file_info.filename if file_info else 'uploaded file'}",
-                description=f"Generated quiz with {len(questions)} questions",
-                source_file_id=request.file_id,
-                questions=questions,
-                created_at=datetime.now(),
-                metadata={
-                    "generation_request": request.dict(),
-                    "source_word_count": extracted_text.word_count,
-                    "extraction_time": extracted_text.extraction_time
-                }
-            )
+            quiz = await self._build_quiz(request, questions, extracted_text,
+                                    extra_metadata={"question_bank_hits": bank_hits})
             
             # Store quiz
-            stored_quiz = self.db.store_quiz(quiz)
+            stored_quiz = await run_db(self.db.store_quiz, quiz)
             
             return stored_quiz
             
         except LLMClientError as e:
             raise QuizGenerationError(f"Quiz generation failed: {str(e)}")
+
+    async def generate_quiz_variants_from_text(self, request: QuizGenerationRequest) -> List[Quiz]:
+        """Generate linked, non-overlapping quiz variants from one set of LLM calls"""
+
+        extracted_text, clean_text_content = await self._get_clean_text(request.file_id)
+
+        try:
+            async with self.pregenerator.interactive():
+                variant_questions = await self.llm_client.generate_quiz_variants(
+                    text_content=clean_text_content,
+                    num_questions=request.num_questions,
+                    variants=request.variants,
+                    question_types=request.question_types,
+                    difficulty_level=request.difficulty_level,
+                    focus_topics=request.focus_topics,
+                    language=request.language,
+                    on_chunk=self._bank_recorder(request)
+                )
+        except LLMClientError as e:
+            raise QuizGenerationError(f"Quiz generation failed: {str(e)}")
+
+        variant_questions = _remove_overlapping_questions(variant_questions)
+        if not all(variant_questions):
+            raise QuizGenerationError("Could not generate a distinct question set for every variant")
+
+        group_id = str(uuid.uuid4())
+        quizzes = []
+        for index, questions in enumerate(variant_questions):
+            label = variant_label(index)
+            quiz = await self._build_quiz(
+                request, questions, extracted_text,
+                title_suffix=f" (Variant {label})",
+                extra_metadata={
+                    "variant_group_id": group_id,
+                    "variant_index": index,
+                    "variant_label": label,
+                    "variant_count": len(variant_questions)
+                }
+            )
+            quizzes.append(await run_db(self.db.store_quiz, quiz))
+
+        return quizzes
     
     async def generate_quiz_from_file(self, request: QuizGenerationRequest) -> Quiz:
         """Complete workflow: extract text and generate quiz"""
         
         try:
             # Check if text is already extracted
-            extracted_text = self.db.get_extracted_text(request.file_id)
+            extracted_text = await run_db(self.db.get_extracted_text, request.file_id)
             if not extracted_text:
                 extracted_text = await self.extract_text_from_file(request.file_id)
             
@@ -143,29 +268,165 @@ class QuizGeneratorService:
                 raise
             raise QuizGenerationError(f"Unexpected error during quiz generation: {str(e)}")
     
-    def get_quiz(self, quiz_id: str) -> Optional[Quiz]:
+    async def pregenerate_questions(self, file_id: str, num_questions: int,
+                                    question_types: List[QuestionType]) -> int:
+        """Seed the question bank for a file with speculative questions"""
+
+        request = QuizGenerationRequest(
+            file_id=file_id,
+            num_questions=min(num_questions, 50),
+            question_types=question_types
+        )
+        _, clean_text_content = await self._get_clean_text(file_id)
+
+        seeded = 0
+        def record(chunk_text: str, questions: List[QuizQuestion]) -> None:
+            nonlocal seeded
+            seeded += self.question_bank.add(
+                file_id, chunk_hash(chunk_text), questions,
+                request.difficulty_level, origin="pregenerated", language=request.language
+            )
+
+        with scheduling_context(Priority.SPECULATIVE):
+            await self.llm_client.generate_quiz(
+                text_content=clean_text_content,
+                num_questions=request.num_questions,
+                question_types=request.question_types,
+                difficulty_level=request.difficulty_level,
+                language=request.language,
+                on_chunk=record
+            )
+        return seeded
+
+    async def generate_quiz_variants_from_file(self, request: QuizGenerationRequest) -> List[Quiz]:
+        """Complete workflow for multi-variant requests: extract text and generate variants"""
+
+        try:
+            extracted_text = await run_db(self.db.get_extracted_text, request.file_id)
+            if not extracted_text:
+                extracted_text = await self.extract_text_from_file(request.file_id)
+
+            return await self.generate_quiz_variants_from_text(request)
+
+        except Exception as e:
+            if isinstance(e, QuizGenerationError):
+                raise
+            raise QuizGenerationError(f"Unexpected error during quiz generation: {str(e)}")
+    
+    async def generate_quiz_batch(self, requests: List[QuizGenerationRequest],
+                                  concurrency: int = BATCH_GENERATION_CONCURRENCY
+                                  ) -> AsyncIterator[BatchQuizGenerationItem]:
+        """Run many generation requests concurrently and yield each outcome as it completes.
+
+        A failing request yields an item with its error; the others carry on.
+        Requests for the same file share its extraction, and identical chunk
+        calls share one completion. Closing the iterator cancels what is left.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index: int, request: QuizGenerationRequest) -> BatchQuizGenerationItem:
+            async with semaphore:
+                try:
+                    if request.variants > 1:
+                        quizzes = await self.generate_quiz_variants_from_file(request)
+                        return BatchQuizGenerationItem(
+                            index=index, file_id=request.file_id, status=ProcessingStatus.COMPLETED,
+                            quiz=quizzes[0], variant_quizzes=quizzes
+                        )
+                    quiz = await self.generate_quiz_from_file(request)
+                    return BatchQuizGenerationItem(
+                        index=index, file_id=request.file_id, status=ProcessingStatus.COMPLETED, quiz=quiz
+                    )
+                except Exception as e:
+                    return BatchQuizGenerationItem(
+                        index=index, file_id=request.file_id, status=ProcessingStatus.FAILED, error=str(e)
+                    )
+
+        tasks = [asyncio.create_task(run(index, request)) for index, request in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def get_quiz(self, quiz_id: str) -> Optional[Quiz]:
         """Get quiz by ID"""
-        return self.db.get_quiz(quiz_id)
+        return await run_db(self.db.get_quiz, quiz_id)
     
-    def update_quiz(self, quiz_id: str, updates: dict) -> Optional[Quiz]:
+    async def store_quiz(self, quiz: Quiz) -> Quiz:
+        """Store a quiz"""
+        return await run_db(self.db.store_quiz, quiz)
+    
+    async def get_quiz_version(self, quiz_id: str) -> Optional[int]:
+        """Get the current version of a quiz"""
+        return await run_db(self.db.get_quiz_version, quiz_id)
+    
+    async def get_quiz_json(self, quiz_id: str) -> Optional[bytes]:
+        """Get a quiz serialized as JSON"""
+        return await run_db(self.db.get_quiz_json, quiz_id)
+    
+    async def duplicate_quiz(self, quiz_id: str) -> Optional[Quiz]:
+        """Copy a quiz under a new ID"""
+        return await run_db(self.db.duplicate_quiz, quiz_id, str(uuid.uuid4()))
+    
+    async def update_quiz(self, quiz_id: str, updates: dict,
+                          expected_version: Optional[int] = None) -> Optional[Quiz]:
         """Update quiz with new data"""
-        return self.db.update_quiz(quiz_id, updates)
+        return await run_db(self.db.update_quiz, quiz_id, updates, expected_version)
+    
+    async def patch_quiz(self, quiz_id: str, operations: List[dict],
+                         expected_version: Optional[int] = None) -> Optional[Quiz]:
+        """Apply JSON-Patch style operations to a quiz"""
+        return await run_db(self.db.patch_quiz, quiz_id, operations, expected_version)
     
-    def list_quizzes(self, file_id: Optional[str] = None) -> List[Quiz]:
-        """List quizzes, optionally filtered by file ID"""
-        return self.db.list_quizzes(file_id)
+    async def list_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                           cursor: Optional[str] = None) -> List[Quiz]:
+        """List quizzes newest first, optionally filtered by file ID"""
+        return await run_db(self.db.list_quizzes, file_id, limit, cursor)
     
-    def delete_quiz(self, quiz_id: str) -> bool:
+    async def list_quiz_summaries(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                                  cursor: Optional[str] = None) -> List[QuizSummary]:
+        """List stored quiz summaries newest first, optionally filtered by file ID"""
+        return await run_db(self.db.list_quiz_summaries, file_id, limit, cursor)
+    
+    async def delete_quiz(self, quiz_id: str) -> bool:
         """Delete quiz by ID"""
-        return self.db.delete_quiz(quiz_id)
+        return await run_db(self.db.delete_quiz, quiz_id)
+    
+    async def delete_quizzes_for_file(self, file_id: str) -> int:
+        """Delete every quiz generated from a file"""
+        return await run_db(self.db.delete_quizzes_for_file, file_id)
     
-    def get_file_info(self, file_id: str):
+    async def get_file_info(self, file_id: str):
         """Get file information"""
-        return self.db.get_file_info(file_id)
+        return await run_db(self.db.get_file_info, file_id)
     
-    def list_files(self):
-        """List all uploaded files"""
-        return self.db.list_files()
+    async def list_files(self, limit: Optional[int] = None, cursor: Optional[str] = None):
+        """List uploaded files, newest first"""
+        return await run_db(self.db.list_files, limit, cursor)
+
+def _strip_metadata_lines(text_content: str) -> str:
+    """Drop empty lines and PDF structure lines ('/...', '%...') from extracted text"""
+    lines = text_content.split('\n')
+    real_content_lines = [line for line in lines 
+                        if line.strip() and not line.strip().startswith(('/', '%'))]
+    return '\n'.join(real_content_lines)
+
+def _remove_overlapping_questions(variant_questions: List[List[QuizQuestion]]) -> List[List[QuizQuestion]]:
+    """Drop questions that already appear in an earlier variant (or earlier in the same one)"""
+    seen = set()
+    result = []
+    for questions in variant_questions:
+        unique = []
+        for question in questions:
+            key = normalize_question_text(question.question)
+            if key in seen:
+                continue
+            seen.add(key)
+            unique.append(question)
+        result.append(unique)
+    return result
 
 # Global quiz generator service
 quiz_generator = QuizGeneratorService()
@@ -0,0 +1,154 @@
+"""
+JSON-Patch style edits for quizzes
+Applies a list of operations to a quiz, re-validating only the questions they touch
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.models import Quiz, QuizQuestion
+
+# Quiz-level fields that can be replaced directly
+QUIZ_FIELDS = {"title", "description"}
+# Question fields that may be removed (reset to None)
+OPTIONAL_QUESTION_FIELDS = {"options", "explanation", "difficulty"}
+
+class QuizPatchError(Exception):
+    """Raised when a patch operation is malformed or does not apply"""
+    pass
+
+class VersionConflictError(Exception):
+    """Raised when a quiz changed since the version the editor started from"""
+
+    def __init__(self, current_version: int, expected_version: int):
+        super().__init__(current_version, expected_version)
+        self.current_version = current_version
+        self.expected_version = expected_version
+
+    def __str__(self) -> str:
+        return (f"Quiz is at version {self.current_version}, "
+                f"edit was based on version {self.expected_version}")
+
+def check_version(quiz: Quiz, expected_version: Optional[int]) -> None:
+    """Raise VersionConflictError unless the quiz is at the expected version"""
+    if expected_version is not None and quiz.version != expected_version:
+        raise VersionConflictError(quiz.version, expected_version)
+
+def next_version(quiz: Quiz, current: Optional[Quiz], retired_version: Optional[int] = None) -> Quiz:
+    """The quiz with a version no ETag issued earlier for its ID can match.
+
+    current is the quiz being overwritten, retired_version the version a
+    deleted quiz with the same ID had. A changed quiz that does not already
+    carry a newer version continues after that one; an unchanged one keeps
+    the stored version.
+    """
+    floor = current.version if current is not None else retired_version
+    if floor is None or quiz.version > floor:
+        return quiz
+    if current is not None and _content(quiz) == _content(current):
+        version = current.version
+    else:
+        version = floor + 1
+    return quiz if quiz.version == version else quiz.model_copy(update={"version": version})
+
+def apply_quiz_patch(quiz: Quiz, operations: List[Dict[str, Any]]) -> Quiz:
+    """Return a new version of the quiz with the operations applied.
+
+    Supported paths: /title, /description, /questions/- (add only),
+    /questions/{question_id} and /questions/{question_id}/{field}. Operations
+    are add, remove, replace and test. Untouched questions are shared with
+    the original quiz, not copied.
+    """
+    updates: Dict[str, Any] = {}
+    questions = list(quiz.questions)
+
+    for operation in operations:
+        op = operation.get("op")
+        path = operation.get("path", "")
+        value = operation.get("value")
+        parts = path.strip("/").split("/") if path.strip("/") else []
+
+        if op not in ("add", "remove", "replace", "test"):
+            raise QuizPatchError(f"Unsupported operation: {op}")
+
+        if len(parts) == 1 and parts[0] in QUIZ_FIELDS:
+            current = updates.get(parts[0], getattr(quiz, parts[0]))
+            if op == "test":
+                _test(path, current, value)
+            elif op == "remove":
+                if parts[0] == "title":
+                    raise QuizPatchError("Cannot remove /title")
+                updates[parts[0]] = None
+            else:
+                if parts[0] == "title" and not isinstance(value, str):
+                    raise QuizPatchError("/title must be a string")
+                updates[parts[0]] = value
+            continue
+
+        if not parts or parts[0] != "questions" or len(parts) > 3:
+            raise QuizPatchError(f"Unsupported path: {path}")
+
+        if len(parts) == 2 and parts[1] == "-":
+            if op != "add":
+                raise QuizPatchError(f"Only add is allowed on {path}")
+            questions.append(_validate_question(value, path))
+            continue
+
+        if len(parts) == 2:
+            index = _question_index(questions, parts[1], path)
+            if op == "add":
+                questions.insert(index, _validate_question(value, path))
+            elif op == "remove":
+                del questions[index]
+            elif op == "replace":
+                questions[index] = _validate_question(value, path)
+            else:
+                _test(path, questions[index].model_dump(mode="json"), value)
+            continue
+
+        index = _question_index(questions, parts[1], path)
+        field = parts[2]
+        if field == "id" or field not in QuizQuestion.model_fields:
+            raise QuizPatchError(f"Unsupported question field: {field}")
+        question = questions[index]
+        if op == "test":
+            _test(path, question.model_dump(mode="json")[field], value)
+            continue
+        if op == "remove":
+            if field not in OPTIONAL_QUESTION_FIELDS:
+                raise QuizPatchError(f"Cannot remove required field {field}")
+            value = None
+        data = question.model_dump()
+        data[field] = value
+        questions[index] = _validate_question(data, path)
+
+    if questions != quiz.questions or "questions" in updates:
+        updates["questions"] = questions
+    updates["version"] = quiz.version + 1
+    updates["updated_at"] = datetime.now()
+    # Question instances are kept as they are, so only new ones were validated
+    data = {**quiz.model_dump(exclude={"questions"}), "questions": questions, **updates}
+    try:
+        return Quiz.model_validate(data)
+    except ValidationError as e:
+        raise QuizPatchError(f"Invalid quiz: {str(e)}")
+
+def _content(quiz: Quiz) -> dict:
+    return quiz.model_dump(exclude={"version", "updated_at"})
+
+def _question_index(questions: List[QuizQuestion], question_id: str, path: str) -> int:
+    for index, question in enumerate(questions):
+        if question.id == question_id:
+            return index
+    raise QuizPatchError(f"No question {question_id} for {path}")
+
+def _validate_question(value: Any, path: str) -> QuizQuestion:
+    try:
+        return QuizQuestion.model_validate(value)
+    except ValueError as e:
+        raise QuizPatchError(f"Invalid question for {path}: {str(e)}")
+
+def _test(path: str, current: Any, expected: Any) -> None:
+    if current != expected:
+        raise QuizPatchError(f"Test failed for {path}")
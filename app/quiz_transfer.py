@@ -0,0 +1,113 @@
+"""
+Bulk quiz export and import
+Streams quizzes out as NDJSON a page at a time and reads them back in batches
+"""
+import os
+import zlib
+from typing import AsyncIterable, AsyncIterator, Iterator, List, Optional
+
+from pydantic import ValidationError
+
+from app.database import run_db
+from app.models import Quiz, QuizImportLineError, QuizImportResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Quizzes fetched from storage per export page
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 200))
+# An import batch is written once it holds this many questions or quizzes
+IMPORT_BATCH_QUESTIONS = int(os.getenv("IMPORT_BATCH_QUESTIONS", 5000))
+IMPORT_BATCH_QUIZZES = int(os.getenv("IMPORT_BATCH_QUIZZES", 500))
+# Longest accepted line, i.e. the largest single quiz
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", 16 * 1024 * 1024))
+
+# Decompressed bytes produced per step, so a small gzip body cannot inflate all at once
+INFLATE_CHUNK_BYTES = 256 * 1024
+# Invalid lines described in the response; later ones are only counted
+MAX_REPORTED_ERRORS = 100
+
+class QuizImportError(Exception):
+    """Raised when an import stream cannot be read"""
+    pass
+
+async def export_ndjson(db, file_id: Optional[str] = None,
+                        page_size: int = EXPORT_PAGE_SIZE) -> AsyncIterator[bytes]:
+    """Every quiz (or a file's quizzes) as one JSON line each, newest first"""
+    cursor = None
+    while True:
+        bodies, cursor = await run_db(db.export_quizzes, file_id, page_size, cursor)
+        if bodies:
+            yield b"\n".join(bodies) + b"\n"
+        if cursor is None:
+            return
+
+def _inflate(decompressor, chunk: bytes) -> Iterator[bytes]:
+    while True:
+        data = decompressor.decompress(chunk, INFLATE_CHUNK_BYTES)
+        if data:
+            yield data
+        chunk = decompressor.unconsumed_tail
+        if not chunk:
+            return
+
+async def read_lines(chunks: AsyncIterable[bytes], gzipped: bool = False,
+                     max_line_bytes: int = IMPORT_MAX_LINE_BYTES) -> AsyncIterator[bytes]:
+    """Split a (possibly gzip compressed) byte stream into lines as it arrives"""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    buffer = b""
+    try:
+        async for chunk in chunks:
+            for data in _inflate(decompressor, chunk) if decompressor else (chunk,):
+                *lines, buffer = (buffer + data).split(b"\n")
+                for line in lines:
+                    yield line
+                if len(buffer) > max_line_bytes:
+                    raise QuizImportError(f"Line longer than {max_line_bytes} bytes")
+        if decompressor:
+            buffer += decompressor.flush()
+    except zlib.error as e:
+        raise QuizImportError(f"Invalid gzip stream: {e}")
+    for line in buffer.split(b"\n"):
+        yield line
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'quiz'}: {detail['msg']}"
+        for detail in error.errors()[:3]
+    )
+
+async def import_ndjson(db, lines: AsyncIterable[bytes]) -> QuizImportResponse:
+    """Validate each line as a Quiz and store the valid ones in batches.
+
+    Invalid lines are skipped and reported by line number; quizzes whose ID
+    already exists replace the stored copy, keeping the imported version if it
+    is newer and continuing after the stored one otherwise, so the stored
+    version never goes backwards.
+    """
+    result = QuizImportResponse()
+    batch: List[Quiz] = []
+    batch_questions = 0
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            quiz = Quiz.model_validate_json(line)
+        except ValidationError as e:
+            result.failed += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(QuizImportLineError(line=line_number, error=_describe(e)))
+            continue
+        batch.append(quiz)
+        batch_questions += len(quiz.questions)
+        if batch_questions >= IMPORT_BATCH_QUESTIONS or len(batch) >= IMPORT_BATCH_QUIZZES:
+            await _store_batch(db, batch, result)
+            batch, batch_questions = [], 0
+    if batch:
+        await _store_batch(db, batch, result)
+    return result
+
+async def _store_batch(db, batch: List[Quiz], result: QuizImportResponse) -> None:
+    result.imported += await run_db(db.store_quizzes, batch)
+    result.questions += sum(len(quiz.questions) for quiz in batch)
@@ -0,0 +1,70 @@
+"""
+Pre-serialized JSON responses and HTTP caching helpers for hot endpoints
+Returning these skips FastAPI's response_model re-validation and generic encoder
+"""
+import hashlib
+import os
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic_core import to_json
+
+from app.database import get_database
+
+# Clients may keep a copy but must revalidate it with If-None-Match before use
+REVALIDATE = "no-cache"
+# Extracted text never changes for a given upload
+IMMUTABLE = "private, max-age=31536000, immutable"
+# Retry-After for lookups that miss while the store is still being restored
+RESTORE_RETRY_AFTER_SECONDS = int(os.getenv("RESTORE_RETRY_AFTER_SECONDS", "1"))
+
+class RawJSONResponse(Response):
+    """Response whose body is already encoded JSON, e.g. from the storage layer's cache"""
+    media_type = "application/json"
+
+def model_response(value: Any, **kwargs) -> RawJSONResponse:
+    """Encode models, or lists and dicts of them, with pydantic-core's Rust serializer"""
+    return RawJSONResponse(to_json(value), **kwargs)
+
+def version_etag(version: int) -> str:
+    """ETag of a versioned resource; clients send it back in If-Match when editing"""
+    return f'"{version}"'
+
+def content_etag(body: bytes) -> str:
+    """ETag derived from the response body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def listing_etag(version: str, *query: Any) -> str:
+    """ETag of a listing page from the store's change counter and the query
+    parameters that select the page, so it is known before the page is built"""
+    return content_etag(repr((version, *query)).encode())
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check, using the weak comparison HTTP specifies for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def cache_headers(etag: str, cache_control: str = REVALIDATE) -> dict:
+    """Validator and caching policy headers for a response"""
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    """304 response carrying the validators the client already has"""
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
+
+def not_found(detail: str) -> HTTPException:
+    """404 for a missing record, or 503 with Retry-After while a snapshot
+    restore is running, since the record may just not be loaded yet"""
+    persistence = getattr(get_database(), "persistence", None)
+    if persistence is not None and persistence.restoring:
+        return HTTPException(
+            status_code=503,
+            detail=f"{detail} yet: the store is still being restored",
+            headers={"Retry-After": str(RESTORE_RETRY_AFTER_SECONDS)},
+        )
+    return HTTPException(status_code=404, detail=detail)
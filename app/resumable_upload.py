@@ -0,0 +1,268 @@
+"""
+Resumable uploads for large documents
+Initiate a session, PUT numbered parts in any order (and again after a
+dropped connection), then complete; parts are written in place into one
+preallocated file and hashed as they arrive
+"""
+import asyncio
+import fcntl
+import hashlib
+import math
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterable, List, Optional, Tuple
+
+from app.models import UploadPart, UploadSession
+
+# Largest document accepted through resumable uploads
+MAX_RESUMABLE_FILE_SIZE = int(float(os.getenv("MAX_RESUMABLE_UPLOAD_MB", "1024")) * 1024 * 1024)
+# Part size used when the client does not pick one, and the allowed range
+DEFAULT_PART_SIZE = int(float(os.getenv("UPLOAD_PART_SIZE_MB", "8")) * 1024 * 1024)
+MIN_PART_SIZE = 256 * 1024
+MAX_PART_SIZE = 64 * 1024 * 1024
+# Sessions not completed within this time are removed
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", 24 * 3600))
+
+# Request body bytes collected before each positioned write
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+SESSION_FILE = "session.json"
+DATA_FILE = "data"
+PARTS_DIR = "parts"
+
+class UploadSessionError(Exception):
+    """Raised when an upload session or part request is invalid"""
+    pass
+
+class UploadSessionNotFoundError(UploadSessionError):
+    """Raised for unknown, expired or already completed upload sessions"""
+    pass
+
+class ResumableUploads:
+    """Upload sessions kept under UPLOAD_SESSION_DIR (a temporary directory by default).
+
+    All session state is files: session.json, the preallocated data file,
+    and one small record per received part. Any worker on the host can
+    serve any request, and sessions survive restarts. A part only counts
+    once its record is written, so a part cut off mid-transfer is simply
+    sent again. Part writers hold a shared lock on the data file and
+    complete() an exclusive one, so no part is still being written once the
+    file is handed over.
+    """
+
+    def __init__(self, directory: Optional[str] = None,
+                 max_file_size: int = MAX_RESUMABLE_FILE_SIZE,
+                 ttl_seconds: int = UPLOAD_SESSION_TTL_SECONDS):
+        self._directory = directory or os.getenv("UPLOAD_SESSION_DIR") or None
+        self.max_file_size = max_file_size
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def directory(self) -> str:
+        """Session directory, created on first use"""
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="quiz_generator_uploads_")
+        os.makedirs(self._directory, exist_ok=True)
+        return self._directory
+
+    def create(self, filename: str, file_size: int, part_size: Optional[int] = None) -> UploadSession:
+        """Start a session and preallocate (sparsely) the file its parts are written into"""
+        part_size = part_size or DEFAULT_PART_SIZE
+        if not 0 < file_size <= self.max_file_size:
+            raise UploadSessionError(
+                f"File size must be between 1 byte and {self.max_file_size // (1024 * 1024)}MB."
+            )
+        if not MIN_PART_SIZE <= part_size <= MAX_PART_SIZE:
+            raise UploadSessionError(f"Part size must be between {MIN_PART_SIZE} and {MAX_PART_SIZE} bytes.")
+        self.sweep()
+
+        now = datetime.now()
+        session = UploadSession(
+            upload_id=str(uuid.uuid4()),
+            filename=filename,
+            file_size=file_size,
+            part_size=part_size,
+            part_count=math.ceil(file_size / part_size),
+            created_at=now,
+            expires_at=now + timedelta(seconds=self.ttl_seconds),
+        )
+        path = self._session_path(session.upload_id)
+        os.makedirs(os.path.join(path, PARTS_DIR))
+        with open(os.path.join(path, DATA_FILE), "wb") as f:
+            f.truncate(file_size)
+        _write_json(os.path.join(path, SESSION_FILE), session.model_dump_json(exclude={"parts"}))
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        """A session with the parts received so far"""
+        session = self._load(upload_id)
+        session.parts = self._parts(upload_id)
+        return session
+
+    async def write_part(self, upload_id: str, part_number: int, chunks: AsyncIterable[bytes],
+                         expected_sha256: Optional[str] = None) -> UploadPart:
+        """Stream one part into its place in the data file, hashing it on the way"""
+        session = self._load(upload_id)
+        if not 1 <= part_number <= session.part_count:
+            raise UploadSessionError(f"Part number must be between 1 and {session.part_count}.")
+        offset = (part_number - 1) * session.part_size
+        expected_size = min(session.part_size, session.file_size - offset)
+
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        data_path = os.path.join(self._session_path(upload_id), DATA_FILE)
+        try:
+            fd = os.open(data_path, os.O_WRONLY)
+        except FileNotFoundError:
+            raise UploadSessionNotFoundError(f"Upload session not found: {upload_id}")
+        try:
+            _lock_data_file(fd, data_path, fcntl.LOCK_SH, upload_id)
+            # The old bytes are about to be overwritten, so the part stops
+            # counting until the new ones are verified
+            try:
+                os.remove(self._part_path(upload_id, part_number))
+            except FileNotFoundError:
+                pass
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > expected_size:
+                    raise UploadSessionError(f"Part {part_number} must be {expected_size} bytes.")
+                digest.update(chunk)
+                buffer += chunk
+                if len(buffer) >= WRITE_BUFFER_BYTES:
+                    await asyncio.to_thread(os.pwrite, fd, bytes(buffer), offset)
+                    offset += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(os.pwrite, fd, bytes(buffer), offset)
+
+            if size != expected_size:
+                raise UploadSessionError(f"Part {part_number} must be {expected_size} bytes, got {size}.")
+            part = UploadPart(part_number=part_number, size=size, sha256=digest.hexdigest())
+            if expected_sha256 and expected_sha256.lower() != part.sha256:
+                raise UploadSessionError(f"Part {part_number} checksum mismatch; send it again.")
+            _write_json(self._part_path(upload_id, part_number), part.model_dump_json())
+        finally:
+            # Also releases the lock
+            os.close(fd)
+        return part
+
+    def complete(self, upload_id: str) -> Tuple[UploadSession, str, str]:
+        """Close a session whose parts are all in.
+
+        Returns the session, the path of the assembled file (now owned by the
+        caller) and a digest of the whole upload built from the part hashes:
+        sha256 over the concatenated part digests, suffixed with the part
+        count. The data is not read again.
+        """
+        path = self._session_path(upload_id)
+        data_path = os.path.join(path, DATA_FILE)
+        assembled = f"{path}.upload"
+        try:
+            fd = os.open(data_path, os.O_RDONLY)
+        except FileNotFoundError:
+            raise UploadSessionNotFoundError(f"Upload session not found: {upload_id}")
+        try:
+            _lock_data_file(fd, data_path, fcntl.LOCK_EX, upload_id)
+            session = self.get(upload_id)
+            received = {part.part_number for part in session.parts}
+            missing = [n for n in range(1, session.part_count + 1) if n not in received]
+            if missing:
+                shown = ", ".join(str(n) for n in missing[:10])
+                raise UploadSessionError(f"Missing parts: {shown}{'...' if len(missing) > 10 else ''}")
+            # Claims the session: later part writers and completes find no data file
+            os.rename(data_path, assembled)
+        finally:
+            os.close(fd)
+        shutil.rmtree(path, ignore_errors=True)
+
+        composite = hashlib.sha256(b"".join(bytes.fromhex(part.sha256) for part in session.parts))
+        return session, assembled, f"{composite.hexdigest()}-{session.part_count}"
+
+    def abort(self, upload_id: str) -> bool:
+        """Drop a session and everything uploaded for it"""
+        path = self._session_path(upload_id)
+        if not os.path.isdir(path):
+            return False
+        shutil.rmtree(path, ignore_errors=True)
+        return True
+
+    def sweep(self) -> int:
+        """Remove expired sessions. Returns how many were removed"""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                expired = os.path.getmtime(os.path.join(path, SESSION_FILE)) < cutoff
+            except OSError:
+                continue
+            if expired:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _load(self, upload_id: str) -> UploadSession:
+        try:
+            with open(os.path.join(self._session_path(upload_id), SESSION_FILE), "rb") as f:
+                session = UploadSession.model_validate_json(f.read())
+        except FileNotFoundError:
+            raise UploadSessionNotFoundError(f"Upload session not found: {upload_id}")
+        if session.expires_at < datetime.now():
+            self.abort(upload_id)
+            raise UploadSessionNotFoundError(f"Upload session expired: {upload_id}")
+        return session
+
+    def _parts(self, upload_id: str) -> List[UploadPart]:
+        parts_dir = os.path.join(self._session_path(upload_id), PARTS_DIR)
+        parts = []
+        for name in os.listdir(parts_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(parts_dir, name), "rb") as f:
+                    parts.append(UploadPart.model_validate_json(f.read()))
+        return sorted(parts, key=lambda part: part.part_number)
+
+    def _session_path(self, upload_id: str) -> str:
+        try:
+            # Session ids are generated UUIDs; anything else never reaches the filesystem
+            upload_id = str(uuid.UUID(upload_id))
+        except ValueError:
+            raise UploadSessionNotFoundError(f"Upload session not found: {upload_id}")
+        return os.path.join(self.directory, upload_id)
+
+    def _part_path(self, upload_id: str, part_number: int) -> str:
+        return os.path.join(self._session_path(upload_id), PARTS_DIR, f"{part_number:06d}.json")
+
+def _lock_data_file(fd: int, path: str, operation: int, upload_id: str) -> None:
+    """Lock an open data file without waiting, and check it is still the session's"""
+    try:
+        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+    except BlockingIOError:
+        if operation == fcntl.LOCK_EX:
+            raise UploadSessionError("Parts are still being written; complete the upload once they finish.")
+        raise UploadSessionError("The upload is being completed.")
+    try:
+        # complete() may have moved the file between our open and lock
+        current = os.stat(path)
+    except FileNotFoundError:
+        raise UploadSessionNotFoundError(f"Upload session not found: {upload_id}")
+    if not os.path.samestat(current, os.fstat(fd)):
+        raise UploadSessionNotFoundError(f"Upload session not found: {upload_id}")
+
+def _write_json(path: str, payload: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+# Global resumable upload store
+resumable_uploads = ResumableUploads()
+
+def get_resumable_uploads() -> ResumableUploads:
+    """Get resumable upload store instance"""
+    return resumable_uploads
@@ -0,0 +1,78 @@
+"""
+Operational endpoints for Quiz Generator
+"""
+from fastapi import APIRouter, HTTPException, Query
+
+from app.batch_upload import get_extraction_pool
+from app.database import get_database, run_db
+from app.memory import tracemalloc_report
+from app.metrics import get_metrics
+from app.pregeneration import get_pregenerator
+from app.scheduler import get_scheduler
+from app.storage.snapshot import SnapshotError
+
+router = APIRouter()
+
+@router.get("/admin/pregeneration")
+async def pregeneration_report():
+    """Report speculative pre-generation activity and how often it paid off"""
+    return get_pregenerator().report()
+
+@router.get("/admin/scheduler")
+async def scheduler_status():
+    """LLM slot usage, queue depth and queue wait time per priority class"""
+    return get_scheduler().status()
+
+@router.get("/admin/extraction")
+async def extraction_status():
+    """Text extraction pool concurrency, queue depth and outcomes"""
+    return get_extraction_pool().status()
+
+@router.get("/admin/metrics")
+async def metrics_snapshot():
+    """All in-process counters and timings"""
+    return get_metrics().snapshot()
+
+@router.get("/admin/memory")
+async def memory_report(
+    tracemalloc: bool = False,
+    top: int = Query(10, ge=1, le=100)
+):
+    """Store memory usage and evictions per collection.
+
+    tracemalloc=true starts allocation tracing on first use; later calls add
+    the top allocation sites and their growth since the previous call.
+    """
+    db = get_database()
+    report = {"backend": type(db).__name__}
+    memory = getattr(db, "memory", None)
+    if memory is not None:
+        report["store"] = memory.report()
+    elif hasattr(db, "memory_report"):
+        report["store"] = await run_db(db.memory_report)
+    blobs = getattr(db, "blobs", None)
+    if blobs is not None:
+        report["blobs"] = blobs.stats()
+    if tracemalloc:
+        report["tracemalloc"] = tracemalloc_report(top)
+    return report
+
+@router.get("/admin/snapshot")
+async def snapshot_status():
+    """Restore progress and snapshot/journal state of the in-memory store"""
+    persistence = getattr(get_database(), "persistence", None)
+    if persistence is None:
+        raise HTTPException(status_code=404, detail="Snapshots are not enabled (set SNAPSHOT_DIR)")
+    return persistence.status()
+
+@router.post("/admin/snapshot")
+async def take_snapshot():
+    """Write a snapshot now and start a fresh journal"""
+    persistence = getattr(get_database(), "persistence", None)
+    if persistence is None:
+        raise HTTPException(status_code=404, detail="Snapshots are not enabled (set SNAPSHOT_DIR)")
+    try:
+        records = await persistence.snapshot()
+    except SnapshotError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"records": records, **persistence.status()}
@@ -1,46 +1,50 @@
 """
 Quiz management endpoints for Quiz Generator
 """
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from typing import Any, Dict, List, Literal, Optional, Union
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Query, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from app.models import (
     Quiz, QuizGenerationRequest, QuizGenerationResponse, 
-    QuizUpdateRequest, ProcessingStatus
+    QuizUpdateRequest, ProcessingStatus, QuizSummary,
+    QuestionUpdateRequest, QuizPatchOperation, QuizImportResponse
+)
+from app.quiz_generator import get_quiz_generator, QuizGenerationError, MAX_BATCH_GENERATION_REQUESTS
+from app.database import InvalidCursorError, NEXT_CURSOR_HEADER, next_page, quiz_sort_key
+from app.scheduler import Priority, scheduling_context, request_tenant
+from app.disconnect import run_until_disconnected, ClientDisconnected, CLIENT_CLOSED_REQUEST
+from app.projection import parse_fields, covers, project, ProjectionError
+from app.quiz_patch import QuizPatchError, VersionConflictError
+from app.quiz_transfer import (
+    NDJSON_MEDIA_TYPE, QuizImportError, export_ndjson, import_ndjson, read_lines
+)
+from app.responses import (
+    RawJSONResponse, model_response, version_etag, etag_matches, cache_headers, not_modified,
+    not_found
 )
-from app.quiz_generator import get_quiz_generator, QuizGenerationError
 
 router = APIRouter()
 
 @router.post("/generate-quiz", response_model=QuizGenerationResponse)
 async def generate_quiz(
     request: QuizGenerationRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    http_request: Request
 ):
     """Generate a quiz from uploaded file"""
     
     try:
         quiz_generator = get_quiz_generator()
-        
-        # Validate file exists
-        file_info = quiz_generator.get_file_info(request.file_id)
-        if not file_info:
-            raise HTTPException(
-                status_code=404,
-                detail="File not found"
+        with scheduling_context(Priority.INTERACTIVE, request_tenant(http_request)):
+            return await run_until_disconnected(
+                http_request, _generate_quiz(request, quiz_generator)
             )
         
-        # Generate quiz
-        quiz = await quiz_generator.generate_quiz_from_file(request)
-        
-        return QuizGenerationResponse(
-            quiz_id=quiz.id,
-            status=ProcessingStatus.COMPLETED,
-            message="Quiz generated successfully",
-            quiz=quiz
-        )
-        
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except HTTPException:
+        raise
     except QuizGenerationError as e:
         raise HTTPException(
             status_code=422,
@@ -52,36 +56,168 @@ async def generate_quiz(
             detail=f"Failed to generate quiz: {str(e)}"
         )
 
-@router.get("/quizzes", response_model=List[Quiz])
-async def list_quizzes(file_id: Optional[str] = None):
-    """List all quizzes, optionally filtered by file ID"""
+@router.post("/generate-quiz/batch")
+async def generate_quiz_batch(requests: List[QuizGenerationRequest], http_request: Request):
+    """Generate quizzes for many requests, streaming NDJSON results as each one finishes.
+
+    Each line is a BatchQuizGenerationItem; a failed request gets a line with
+    its error and does not stop the others. Work runs at batch priority, so
+    interactive generation is served first, and requests sharing a file or
+    identical chunks share the extraction and LLM calls.
+    """
+    if not requests:
+        raise HTTPException(status_code=400, detail="No generation requests given")
+    if len(requests) > MAX_BATCH_GENERATION_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_GENERATION_REQUESTS} requests per batch"
+        )
+    
+    quiz_generator = get_quiz_generator()
+    tenant = request_tenant(http_request)
+    
+    async def results():
+        # Set here, not around the return: the body is produced after the handler returns
+        with scheduling_context(Priority.BATCH, tenant):
+            async for item in quiz_generator.generate_quiz_batch(requests):
+                yield item.model_dump_json().encode() + b"\n"
+    
+    return StreamingResponse(results(), media_type=NDJSON_MEDIA_TYPE)
+
+async def _generate_quiz(request: QuizGenerationRequest, quiz_generator) -> QuizGenerationResponse:
+    """Run single- or multi-variant generation for a request"""
+
+    # Validate file exists
+    file_info = await quiz_generator.get_file_info(request.file_id)
+    if not file_info:
+        raise not_found("File not found")
+    
+    if request.variants > 1:
+        # All variants share one LLM call per chunk
+        quizzes = await quiz_generator.generate_quiz_variants_from_file(request)
+        return QuizGenerationResponse(
+            quiz_id=quizzes[0].id,
+            status=ProcessingStatus.COMPLETED,
+            message=f"{len(quizzes)} quiz variants generated successfully",
+            quiz=quizzes[0],
+            group_id=quizzes[0].metadata["variant_group_id"],
+            variant_quizzes=quizzes
+        )
+    
+    # Generate quiz
+    quiz = await quiz_generator.generate_quiz_from_file(request)
+    
+    return QuizGenerationResponse(
+        quiz_id=quiz.id,
+        status=ProcessingStatus.COMPLETED,
+        message="Quiz generated successfully",
+        quiz=quiz
+    )
+
+@router.get("/quizzes", response_model=Union[List[Quiz], List[QuizSummary], List[Dict[str, Any]]])
+async def list_quizzes(
+    response: Response,
+    file_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    fields: Optional[str] = None
+):
+    """List quizzes newest first, optionally filtered by file ID.
+
+    view=summary returns QuizSummary objects; fields=a,b returns only those
+    fields. Both are served from stored summaries unless a requested field
+    needs the full quiz. With a limit, the cursor for the next page is
+    returned in X-Next-Cursor.
+    """
     
     try:
         quiz_generator = get_quiz_generator()
-        quizzes = quiz_generator.list_quizzes(file_id=file_id)
-        return quizzes
+        selected = parse_fields(fields, Quiz, QuizSummary)
+        use_summaries = covers(selected, QuizSummary) if selected else view == "summary"
+        list_method = quiz_generator.list_quiz_summaries if use_summaries else quiz_generator.list_quizzes
+        quizzes = await list_method(
+            file_id=file_id, limit=limit + 1 if limit else None, cursor=cursor
+        )
+        quizzes, next_cursor = next_page(quizzes, limit, quiz_sort_key)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        if not selected:
+            return quizzes
+        # Fields spanning both models: derive the summary ones from each full quiz
+        return project(quizzes, selected, None if use_summaries else QuizSummary.from_quiz)
         
+    except (InvalidCursorError, ProjectionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve quizzes: {str(e)}"
         )
 
+@router.get("/quizzes/export")
+async def export_quizzes(file_id: Optional[str] = None):
+    """Stream every quiz, or a file's quizzes, as NDJSON (one quiz per line).
+
+    Quizzes are read a page at a time, so memory use does not grow with the
+    store; the body is gzipped when the client sends Accept-Encoding: gzip.
+    """
+    quiz_generator = get_quiz_generator()
+    return StreamingResponse(
+        export_ndjson(quiz_generator.db, file_id),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="quizzes.ndjson"'}
+    )
+
+@router.post("/quizzes/import", response_model=QuizImportResponse)
+async def import_quizzes(request: Request, content_encoding: Optional[str] = Header(None)):
+    """Import quizzes from an NDJSON body, as produced by /quizzes/export.
+
+    The body is parsed as it arrives and stored in batches; it may be gzip
+    compressed (Content-Encoding: gzip or Content-Type: application/gzip).
+    Invalid lines are skipped and reported.
+    """
+    
+    try:
+        quiz_generator = get_quiz_generator()
+        gzipped = content_encoding == "gzip" or request.headers.get("content-type") in (
+            "application/gzip", "application/x-gzip"
+        )
+        lines = read_lines(request.stream(), gzipped=gzipped)
+        return await import_ndjson(quiz_generator.db, lines)
+        
+    except QuizImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to import quizzes: {str(e)}"
+        )
+
 @router.get("/quizzes/{quiz_id}", response_model=Quiz)
-async def get_quiz(quiz_id: str):
-    """Get a specific quiz by ID"""
+async def get_quiz(quiz_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get a specific quiz by ID.
+
+    The ETag is the quiz version: a matching If-None-Match gets 304, and the
+    same value can be sent as If-Match when editing.
+    """
     
     try:
         quiz_generator = get_quiz_generator()
-        quiz = quiz_generator.get_quiz(quiz_id)
+        # Read the version before the body: if an edit lands in between, the
+        # ETag is older than the body and the next poll simply refetches
+        version = await quiz_generator.get_quiz_version(quiz_id)
+        body = None
+        if version is not None:
+            etag = version_etag(version)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            body = await quiz_generator.get_quiz_json(quiz_id)
         
-        if not quiz:
-            raise HTTPException(
-                status_code=404,
-                detail="Quiz not found"
-            )
+        if body is None:
+            raise not_found("Quiz not found")
         
-        return quiz
+        return RawJSONResponse(body, headers=cache_headers(etag))
         
     except HTTPException:
         raise
@@ -92,20 +228,13 @@ async def get_quiz(quiz_id: str):
         )
 
 @router.put("/quizzes/{quiz_id}", response_model=Quiz)
-async def update_quiz(quiz_id: str, request: QuizUpdateRequest):
+async def update_quiz(quiz_id: str, request: QuizUpdateRequest,
+                      if_match: Optional[str] = Header(None)):
     """Update a quiz"""
     
     try:
         quiz_generator = get_quiz_generator()
         
-        # Check if quiz exists
-        existing_quiz = quiz_generator.get_quiz(quiz_id)
-        if not existing_quiz:
-            raise HTTPException(
-                status_code=404,
-                detail="Quiz not found"
-            )
-        
         # Prepare updates
         updates = {}
         if request.title is not None:
@@ -113,7 +242,7 @@ async def update_quiz(quiz_id: str, request: QuizUpdateRequest):
         if request.description is not None:
             updates['description'] = request.description
         if request.questions is not None:
-            updates['questions'] = [q.dict() for q in request.questions]
+            updates['questions'] = [q.model_dump() for q in request.questions]
         
         if not updates:
             raise HTTPException(
@@ -122,18 +251,88 @@ async def update_quiz(quiz_id: str, request: QuizUpdateRequest):
             )
         
         # Update quiz
-        updated_quiz = quiz_generator.update_quiz(quiz_id, updates)
+        expected_version = _expected_version(if_match, request.version)
+        updated_quiz = await quiz_generator.update_quiz(quiz_id, updates, expected_version)
+        if not updated_quiz:
+            raise not_found("Quiz not found")
         
-        return updated_quiz
+        return _quiz_response(updated_quiz)
         
     except HTTPException:
         raise
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to update quiz: {str(e)}"
+        )
+
+@router.patch("/quizzes/{quiz_id}", response_model=Quiz)
+async def patch_quiz(quiz_id: str, operations: List[QuizPatchOperation],
+                     if_match: Optional[str] = Header(None)):
+    """Apply JSON-Patch style operations to a quiz.
+
+    Question paths address questions by ID, e.g. /questions/{question_id}/correct_answer.
+    Send the quiz version in If-Match to reject edits based on a stale copy.
+    """
+    
+    if not operations:
+        raise HTTPException(status_code=400, detail="No operations provided")
+    return await _apply_patch(
+        quiz_id,
+        [operation.model_dump() for operation in operations],
+        _expected_version(if_match, None),
+    )
+
+@router.patch("/quizzes/{quiz_id}/questions/{question_id}", response_model=Quiz)
+async def update_question(quiz_id: str, question_id: str, request: QuestionUpdateRequest,
+                          if_match: Optional[str] = Header(None)):
+    """Update fields of a single question"""
+    
+    changes = request.model_dump(exclude_unset=True, exclude={"version"}, mode="json")
+    if not changes:
+        raise HTTPException(status_code=400, detail="No updates provided")
+    operations = [
+        {"op": "replace", "path": f"/questions/{question_id}/{field}", "value": value}
+        for field, value in changes.items()
+    ]
+    return await _apply_patch(quiz_id, operations, _expected_version(if_match, request.version))
+
+async def _apply_patch(quiz_id: str, operations: List[dict],
+                       expected_version: Optional[int]) -> RawJSONResponse:
+    try:
+        quiz_generator = get_quiz_generator()
+        patched_quiz = await quiz_generator.patch_quiz(quiz_id, operations, expected_version)
+        if not patched_quiz:
+            raise not_found("Quiz not found")
+        return _quiz_response(patched_quiz)
+    except HTTPException:
+        raise
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QuizPatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to update quiz: {str(e)}"
         )
 
+def _quiz_response(quiz: Quiz) -> RawJSONResponse:
+    """Edited quiz, with its new version as ETag for the next conditional request"""
+    return model_response(quiz, headers=cache_headers(version_etag(quiz.version)))
+
+def _expected_version(if_match: Optional[str], body_version: Optional[int]) -> Optional[int]:
+    """Version an edit is based on, from If-Match ("3", W/"3" or 3) or the request body"""
+    if if_match is None or if_match.strip() == "*":
+        return body_version
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    try:
+        return int(tag)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid If-Match version: {if_match}")
+
 @router.delete("/quizzes/{quiz_id}")
 async def delete_quiz(quiz_id: str):
     """Delete a quiz"""
@@ -142,15 +341,12 @@ async def delete_quiz(quiz_id: str):
         quiz_generator = get_quiz_generator()
         
         # Check if quiz exists
-        existing_quiz = quiz_generator.get_quiz(quiz_id)
+        existing_quiz = await quiz_generator.get_quiz(quiz_id)
         if not existing_quiz:
-            raise HTTPException(
-                status_code=404,
-                detail="Quiz not found"
-            )
+            raise not_found("Quiz not found")
         
         # Delete quiz
-        success = quiz_generator.delete_quiz(quiz_id)
+        success = await quiz_generator.delete_quiz(quiz_id)
         
         if not success:
             raise HTTPException(
@@ -175,35 +371,11 @@ async def duplicate_quiz(quiz_id: str):
     try:
         quiz_generator = get_quiz_generator()
         
-        # Get original quiz
-        original_quiz = quiz_generator.get_quiz(quiz_id)
-        if not original_quiz:
-            raise HTTPException(
-                status_code=404,
-                detail="Quiz not found"
-            )
-        
-        # Create duplicate
-        import uuid
-        from datetime import datetime
-        
-        duplicate_data = original_quiz.dict()
-        duplicate_data['id'] = str(uuid.uuid4())
-        duplicate_data['title'] = f"Copy of {original_quiz.title}"
-        duplicate_data['created_at'] = datetime.now()
-        duplicate_data['updated_at'] = None
-        
-        # Regenerate question IDs
-        for question in duplicate_data['questions']:
-            question['id'] = f"q_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}"
-        
-        from app.models import Quiz
-        duplicate_quiz = Quiz(**duplicate_data)
+        duplicate_quiz = await quiz_generator.duplicate_quiz(quiz_id)
+        if not duplicate_quiz:
+            raise not_found("Quiz not found")
         
-        # Store duplicate
-        stored_quiz = quiz_generator.db.store_quiz(duplicate_quiz)
-        
-        return stored_quiz
+        return _quiz_response(duplicate_quiz)
         
     except HTTPException:
         raise
@@ -212,3 +384,18 @@ async def duplicate_quiz(quiz_id: str):
             status_code=500,
             detail=f"Failed to duplicate quiz: {str(e)}"
         )
+
+@router.get("/question-bank")
+async def question_bank_stats(file_id: Optional[str] = None):
+    """Summarize the question bank, optionally for a single file"""
+    
+    quiz_generator = get_quiz_generator()
+    return quiz_generator.question_bank.stats(file_id)
+
+@router.post("/question-bank/{file_id}/mark-stale")
+async def mark_question_bank_stale(file_id: str):
+    """Tag all bank entries of a file as stale, e.g. after the source changed"""
+    
+    quiz_generator = get_quiz_generator()
+    marked = quiz_generator.question_bank.mark_stale(file_id)
+    return {"file_id": file_id, "marked_stale": marked}
@@ -1,15 +1,36 @@
 """
 File upload endpoints for Quiz Generator
 """
+import asyncio
+import os
 import uuid
-from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple, Union
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Header, Path, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic_core import to_json
 
-from app.models import UploadResponse, ProcessingStatus, FileInfo, ErrorResponse
-from app.database import get_database
+from app.models import (
+    UploadResponse, ProcessingStatus, FileInfo, ErrorResponse, TextExtractionResult, TextSlice,
+    BatchFileResult, BatchUploadStatus, UploadSessionRequest, UploadSession, UploadPart
+)
+from app.database import (
+    get_database, run_db, InvalidCursorError, next_page, NEXT_CURSOR_HEADER, file_sort_key
+)
 from app.file_parser import validate_file_type, get_file_type
 from app.quiz_generator import get_quiz_generator
+from app.pregeneration import get_pregenerator
+from app.batch_upload import (
+    BatchUploadError, MAX_BATCH_FILES, get_batch_tracker, get_extraction_pool, is_archive, iter_archive
+)
+from app.resumable_upload import (
+    UploadSessionError, UploadSessionNotFoundError, get_resumable_uploads
+)
+from app.projection import parse_fields, project, ProjectionError
+from app.responses import (
+    RawJSONResponse, model_response, listing_etag, etag_matches, cache_headers, not_modified,
+    IMMUTABLE, not_found
+)
+from app.text_window import TextRangeError, text_range, slice_text, iter_ndjson
 
 router = APIRouter()
 
@@ -17,52 +38,21 @@ router = APIRouter()
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
 @router.post("/upload", response_model=UploadResponse)
-async def upload_file(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
-):
+async def upload_file(file: UploadFile = File(...)):
     """Upload and process a study material file"""
     
     try:
-        # Validate file type
-        if not validate_file_type(file.filename):
-            raise HTTPException(
-                status_code=400,
-                detail="Unsupported file type. Please upload PDF, DOCX, or TXT files."
-            )
-        
         # Read file content
         content = await file.read()
         
-        # Validate file size
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB."
-            )
+        # Validate file type and size
+        error = _upload_error(file.filename, content)
+        if error:
+            raise error
         
-        if len(content) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Empty file uploaded."
-            )
-        
-        # Generate file ID and store file
-        file_id = str(uuid.uuid4())
-        file_type = get_file_type(file.filename)
-        
-        db = get_database()
-        file_info = db.store_file(
-            file_id=file_id,
-            filename=file.filename,
-            file_type=file_type,
-            file_size=len(content),
-            content=content
-        )
-        
-        # Schedule background text extraction
-        quiz_generator = get_quiz_generator()
-        background_tasks.add_task(extract_text_background, file_id, quiz_generator)
+        # Store file and queue text extraction
+        file_id, file_type = await _store_upload(file.filename, content)
+        get_extraction_pool().submit(file_id, get_quiz_generator())
         
         return UploadResponse(
             file_id=file_id,
@@ -81,21 +71,258 @@ async def upload_file(
             detail=f"Failed to upload file: {str(e)}"
         )
 
-async def extract_text_background(file_id: str, quiz_generator):
-    """Background task for text extraction"""
+@router.post("/upload/batch", response_model=BatchUploadStatus, status_code=202)
+async def upload_batch(files: List[UploadFile] = File(...)):
+    """Upload several files, or ZIP archives of them, in one request.
+
+    Archives are unpacked one entry at a time. Every file is validated and
+    stored like a single upload and its extraction queued on the shared,
+    bounded extraction pool; rejected files are listed as failed. Poll
+    GET /upload/batch/{batch_id} for progress.
+    """
+    
     try:
-        await quiz_generator.extract_text_from_file(file_id)
-        print(f"Text extraction completed for file: {file_id}")
+        tracker = get_batch_tracker()
+        pool = get_extraction_pool()
+        quiz_generator = get_quiz_generator()
+        batch = tracker.create()
+        
+        async for filename, content, error in _batch_entries(files):
+            if len(batch.files) >= MAX_BATCH_FILES:
+                tracker.add_file(batch, BatchFileResult(
+                    filename=filename,
+                    status=ProcessingStatus.FAILED,
+                    message=f"Batch limit of {MAX_BATCH_FILES} files reached; this and later files were skipped."
+                ))
+                break
+            if error is None:
+                upload_error = _upload_error(filename, content)
+                error = upload_error.detail if upload_error else None
+            if error:
+                tracker.add_file(batch, BatchFileResult(
+                    filename=filename, status=ProcessingStatus.FAILED, message=error
+                ))
+                continue
+            
+            file_id, _ = await _store_upload(filename, content)
+            tracker.add_file(batch, BatchFileResult(
+                filename=filename, file_id=file_id, status=ProcessingStatus.PENDING
+            ))
+            pool.submit(file_id, quiz_generator, batch.batch_id)
+        
+        if not batch.files:
+            raise HTTPException(
+                status_code=400,
+                detail="No files found in upload."
+            )
+        return batch
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Text extraction failed for file {file_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to upload files: {str(e)}"
+        )
+
+@router.get("/upload/batch/{batch_id}", response_model=BatchUploadStatus)
+async def get_batch_status(batch_id: str):
+    """Extraction progress of a batch upload, per file and in aggregate"""
+    batch = get_batch_tracker().get(batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Batch not found"
+        )
+    return batch
+
+@router.post("/uploads", response_model=UploadSession, status_code=201)
+async def create_upload_session(request: UploadSessionRequest):
+    """Start a resumable upload for files too large, or connections too flaky, for POST /upload.
+
+    PUT each part to /uploads/{upload_id}/parts/{n} (1-based, part_size bytes
+    except the last; an X-Content-SHA256 header is checked if sent), GET the
+    session to see which parts arrived, then POST /uploads/{upload_id}/complete.
+    """
+    if not validate_file_type(request.filename):
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file type. Please upload PDF, DOCX, or TXT files."
+        )
+    # Refuse up front what the storage backend could not hold once assembled
+    max_file_size = get_database().max_file_size
+    if max_file_size is not None and request.file_size > max_file_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large for the storage backend (at most {max_file_size} bytes)"
+        )
+    try:
+        return await asyncio.to_thread(
+            get_resumable_uploads().create, request.filename, request.file_size, request.part_size
+        )
+    except UploadSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/files", response_model=List[FileInfo])
-async def list_files():
-    """List all uploaded files"""
+@router.get("/uploads/{upload_id}", response_model=UploadSession)
+async def get_upload_session(upload_id: str):
+    """A resumable upload and the parts received so far"""
+    try:
+        return await asyncio.to_thread(get_resumable_uploads().get, upload_id)
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.put("/uploads/{upload_id}/parts/{part_number}", response_model=UploadPart)
+async def upload_part(
+    upload_id: str,
+    request: Request,
+    part_number: int = Path(..., ge=1),
+    x_content_sha256: Optional[str] = Header(None)
+):
+    """Store one part of a resumable upload from the raw request body; re-sending a part replaces it"""
+    try:
+        return await get_resumable_uploads().write_part(
+            upload_id, part_number, request.stream(), x_content_sha256
+        )
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/uploads/{upload_id}/complete", response_model=UploadResponse)
+async def complete_upload(upload_id: str):
+    """Turn a resumable upload whose parts are all in into a stored file and queue its extraction"""
+    uploads = get_resumable_uploads()
+    try:
+        session, path, digest = await asyncio.to_thread(uploads.complete, upload_id)
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadSessionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    try:
+        file_id = str(uuid.uuid4())
+        file_type = get_file_type(session.filename)
+        db = get_database()
+        await run_db(
+            db.store_file_from_path,
+            file_id=file_id,
+            filename=session.filename,
+            file_type=file_type,
+            file_size=session.file_size,
+            path=path
+        )
+    except Exception as e:
+        if os.path.exists(path):
+            os.remove(path)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to store upload: {str(e)}"
+        )
+    get_extraction_pool().submit(file_id, get_quiz_generator())
+    
+    return UploadResponse(
+        file_id=file_id,
+        filename=session.filename,
+        file_type=file_type,
+        file_size=session.file_size,
+        status=ProcessingStatus.PENDING,
+        message="File uploaded successfully. Text extraction in progress.",
+        digest=digest
+    )
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Cancel a resumable upload and discard its parts"""
+    try:
+        aborted = await asyncio.to_thread(get_resumable_uploads().abort, upload_id)
+    except UploadSessionNotFoundError:
+        aborted = False
+    if not aborted:
+        raise HTTPException(
+            status_code=404,
+            detail="Upload session not found"
+        )
+    return {"message": "Upload aborted"}
+
+def _upload_error(filename: Optional[str], content: bytes) -> Optional[HTTPException]:
+    """Why an upload cannot be accepted, if it cannot"""
+    if not validate_file_type(filename):
+        return HTTPException(
+            status_code=400,
+            detail="Unsupported file type. Please upload PDF, DOCX, or TXT files."
+        )
+    if len(content) > MAX_FILE_SIZE:
+        return HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB."
+        )
+    if len(content) == 0:
+        return HTTPException(
+            status_code=400,
+            detail="Empty file uploaded."
+        )
+    return None
+
+async def _store_upload(filename: str, content: bytes) -> Tuple[str, str]:
+    """Store an accepted upload under a new file ID"""
+    file_id = str(uuid.uuid4())
+    file_type = get_file_type(filename)
+    db = get_database()
+    await run_db(
+        db.store_file,
+        file_id=file_id,
+        filename=filename,
+        file_type=file_type,
+        file_size=len(content),
+        content=content
+    )
+    return file_id, file_type
+
+async def _batch_entries(files: List[UploadFile]) -> AsyncIterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """(filename, content, error) for each uploaded file and each file inside uploaded archives"""
+    for upload in files:
+        if not is_archive(upload.filename):
+            yield upload.filename, await upload.read(), None
+            continue
+        # Decompress in a worker thread, one entry per step
+        entries = iter_archive(upload.file, MAX_FILE_SIZE)
+        try:
+            while (entry := await asyncio.to_thread(next, entries, None)) is not None:
+                yield entry
+        except BatchUploadError as e:
+            yield upload.filename, None, str(e)
+
+@router.get("/files", response_model=Union[List[FileInfo], List[Dict[str, Any]]])
+async def list_files(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """List uploaded files, newest first.
+
+    fields=a,b returns only those fields. With a limit, the cursor for the
+    next page is returned in X-Next-Cursor. The ETag comes from the store's
+    file change counter, so polling with If-None-Match gets 304 without the
+    page being loaded while no file changed.
+    """
     try:
         db = get_database()
-        files = db.list_files()
-        return files
+        selected = parse_fields(fields, FileInfo)
+        # Read the counter before the page: a change landing in between makes
+        # the ETag older than the body, so the next poll simply refetches
+        etag = listing_etag(await run_db(db.get_files_version), limit, cursor, fields)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        files = await run_db(db.list_files, limit + 1 if limit else None, cursor)
+        files, next_cursor = next_page(files, limit, file_sort_key)
+        body = to_json(project(files, selected) if selected else files)
+        headers = cache_headers(etag)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return RawJSONResponse(body, headers=headers)
+    except (InvalidCursorError, ProjectionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -103,19 +330,26 @@ async def list_files():
         )
 
 @router.get("/files/{file_id}", response_model=FileInfo)
-async def get_file_info(file_id: str):
-    """Get information about a specific file"""
+async def get_file_info(file_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get information about a specific file.
+
+    The ETag is the file's version, which changes when its text is extracted
+    or evicted; a matching If-None-Match gets 304 without loading the file.
+    """
     try:
         db = get_database()
-        file_info = db.get_file_info(file_id)
+        version = await run_db(db.get_file_version, file_id)
+        file_info = None
+        if version is not None:
+            etag = f'"file-{version}"'
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            file_info = await run_db(db.get_file_info, file_id)
         
         if not file_info:
-            raise HTTPException(
-                status_code=404,
-                detail="File not found"
-            )
+            raise not_found("File not found")
         
-        return file_info
+        return model_response(file_info, headers=cache_headers(etag))
         
     except HTTPException:
         raise
@@ -125,48 +359,87 @@ async def get_file_info(file_id: str):
             detail=f"Failed to retrieve file info: {str(e)}"
         )
 
-@router.get("/files/{file_id}/text")
-async def get_extracted_text(file_id: str):
-    """Get extracted text from a file"""
+@router.get("/files/{file_id}/text", response_model=Union[TextExtractionResult, TextSlice])
+async def get_extracted_text(
+    file_id: str,
+    offset: Optional[int] = Query(None, ge=0),
+    length: Optional[int] = Query(None, ge=1),
+    page: Optional[int] = Query(None, ge=1),
+    format: Literal["json", "ndjson"] = "json",
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get extracted text from a file.
+
+    offset/length select a character window and page a PDF page; either
+    returns a TextSlice. format=ndjson streams the text (or the window) as
+    a header line plus one line per page or 64K-character chunk. Uploads are
+    immutable, so the text is too: it is served with a long max-age, and a
+    revalidation gets 304 without loading the text.
+    """
     try:
         db = get_database()
         
         # Check if file exists
-        file_info = db.get_file_info(file_id)
+        file_info = await run_db(db.get_file_info, file_id)
         if not file_info:
-            raise HTTPException(
-                status_code=404,
-                detail="File not found"
-            )
+            raise not_found("File not found")
+        
+        etag = f'"text-{file_id}"'
+        headers = cache_headers(etag, IMMUTABLE)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, IMMUTABLE)
+        
+        start = offset or 0
+        end = start + length if length is not None else None
+        windowed = offset is not None or length is not None or page is not None
+        
+        if windowed and format == "json":
+            # Backends slice in place, so only the window leaves the store
+            text_slice = await run_db(db.get_text_slice, file_id, start, end, page)
+            if text_slice is None:
+                text_slice = slice_text(await _extracted_text(file_id), start, end, page)
+            return model_response(text_slice, headers=headers)
         
         # Get extracted text
-        extracted_text = db.get_extracted_text(file_id)
+        extracted_text = await run_db(db.get_extracted_text, file_id)
         if not extracted_text:
-            # Try to extract if not already done
-            quiz_generator = get_quiz_generator()
-            try:
-                extracted_text = await quiz_generator.extract_text_from_file(file_id)
-            except Exception as e:
-                raise HTTPException(
-                    status_code=422,
-                    detail=f"Text extraction failed: {str(e)}"
-                )
-        
-        return {
+            extracted_text = await _extracted_text(file_id)
+        
+        if format == "ndjson":
+            start, end = text_range(len(extracted_text.text_content), extracted_text.page_offsets,
+                                    start, end, page)
+            return StreamingResponse(iter_ndjson(extracted_text, start, end),
+                                     media_type="application/x-ndjson", headers=headers)
+        
+        return model_response({
             "file_id": file_id,
             "text_content": extracted_text.text_content,
             "word_count": extracted_text.word_count,
-            "extraction_time": extracted_text.extraction_time
-        }
+            "extraction_time": extracted_text.extraction_time,
+            "page_offsets": extracted_text.page_offsets
+        }, headers=headers)
         
     except HTTPException:
         raise
+    except TextRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve extracted text: {str(e)}"
         )
 
+async def _extracted_text(file_id: str) -> TextExtractionResult:
+    """Extract text that has not been extracted yet (or was evicted)"""
+    quiz_generator = get_quiz_generator()
+    try:
+        return await quiz_generator.extract_text_from_file(file_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Text extraction failed: {str(e)}"
+        )
+
 @router.delete("/files/{file_id}")
 async def delete_file(file_id: str):
     """Delete an uploaded file and its associated data"""
@@ -174,26 +447,18 @@ async def delete_file(file_id: str):
         db = get_database()
         
         # Check if file exists
-        file_info = db.get_file_info(file_id)
+        file_info = await run_db(db.get_file_info, file_id)
         if not file_info:
-            raise HTTPException(
-                status_code=404,
-                detail="File not found"
-            )
+            raise not_found("File not found")
         
         # Delete associated quizzes
         quiz_generator = get_quiz_generator()
-        quizzes = quiz_generator.list_quizzes(file_id=file_id)
-        for quiz in quizzes:
-            quiz_generator.delete_quiz(quiz.id)
+        await quiz_generator.delete_quizzes_for_file(file_id)
+        quiz_generator.question_bank.remove_file(file_id)
+        get_pregenerator().cancel(file_id)
         
         # Delete file data
-        if file_id in db.files:
-            del db.files[file_id]
-        if file_id in db.file_contents:
-            del db.file_contents[file_id]
-        if file_id in db.extracted_texts:
-            del db.extracted_texts[file_id]
+        await run_db(db.delete_file, file_id)
         
         return {"message": f"File {file_id} deleted successfully"}
         
@@ -0,0 +1,216 @@
+"""
+Priority scheduler for LLM calls
+Every chunk call to a model goes through a shared scheduler so that
+interactive requests are never starved by batch or speculative work
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.metrics import get_metrics
+
+T = TypeVar("T")
+
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    SPECULATIVE = "speculative"
+
+# Dispatch order between classes (strict priority)
+PRIORITY_ORDER = [Priority.INTERACTIVE, Priority.BATCH, Priority.SPECULATIVE]
+
+DEFAULT_TENANT = "default"
+
+# Rough prompt overhead and answer size used for token estimates
+PROMPT_OVERHEAD_TOKENS = 300
+TOKENS_PER_QUESTION = 120
+
+# Set by request handlers and background jobs, read when a chunk call is queued
+current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+current_tenant: ContextVar[str] = ContextVar("llm_tenant", default=DEFAULT_TENANT)
+
+class _Ticket:
+    """A queued request for one LLM slot"""
+
+    __slots__ = ("priority", "tenant", "future", "enqueued_at", "cancelled")
+
+    def __init__(self, priority: Priority, tenant: str, future: asyncio.Future):
+        self.priority = priority
+        self.tenant = tenant
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+class LLMScheduler:
+    """Concurrency-capped LLM dispatcher with weighted fair queuing.
+
+    Classes are served in strict priority order. Within a class, tenants
+    share slots by self-clocked fair queuing: each call gets a finish tag of
+    max(class virtual time, tenant's last tag) + cost / weight, and the
+    smallest tag is dispatched first.
+    """
+
+    def __init__(self):
+        self.max_concurrency = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+        # Speculative work only ever uses spare slots
+        self.class_limits: Dict[Priority, int] = {
+            Priority.SPECULATIVE: max(1, int(os.getenv("LLM_SPECULATIVE_MAX_CONCURRENCY", "1"))),
+        }
+        self.tenant_weights = _parse_weights(os.getenv("LLM_TENANT_WEIGHTS", ""))
+        self.metrics = get_metrics()
+
+        self._active = 0
+        self._active_by_class: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._queues: Dict[Priority, List[Tuple[float, int, _Ticket]]] = {p: [] for p in Priority}
+        self._virtual_time: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self._last_finish: Dict[Tuple[Priority, str], float] = {}
+        self._sequence = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None, tenant: Optional[str] = None,
+                   cost: float = 1.0):
+        """Hold one LLM slot for the duration of the block"""
+        priority = priority or current_priority.get()
+        tenant = tenant or current_tenant.get()
+        await self._acquire(priority, tenant, cost)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    async def submit(self, call: Callable[[], Awaitable[T]], priority: Optional[Priority] = None,
+                     tenant: Optional[str] = None, cost: float = 1.0) -> T:
+        """Run an LLM call once a slot is granted"""
+        async with self.slot(priority, tenant, cost):
+            return await call()
+
+    async def _acquire(self, priority: Priority, tenant: str, cost: float) -> None:
+        """Wait for a slot, in priority and fair-share order"""
+        ticket = _Ticket(priority, tenant, asyncio.get_running_loop().create_future())
+        weight = self.tenant_weights.get(tenant, 1.0)
+        start = max(self._virtual_time[priority], self._last_finish.get((priority, tenant), 0.0))
+        finish = start + max(cost, 1e-6) / weight
+        self._last_finish[(priority, tenant)] = finish
+        heapq.heappush(self._queues[priority], (finish, next(self._sequence), ticket))
+        self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            ticket.cancelled = True
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Slot was granted just as we were cancelled: hand it back
+                self._release(priority)
+            raise
+        finally:
+            self.metrics.observe(f"scheduler.wait_seconds.{priority.value}",
+                                 time.monotonic() - ticket.enqueued_at)
+
+    def _release(self, priority: Priority) -> None:
+        self._active -= 1
+        self._active_by_class[priority] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the best waiting tickets"""
+        while self._active < self.max_concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            self._active += 1
+            self._active_by_class[ticket.priority] += 1
+            ticket.future.set_result(None)
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        for priority in PRIORITY_ORDER:
+            limit = self.class_limits.get(priority)
+            if limit is not None and self._active_by_class[priority] >= limit:
+                continue
+            queue = self._queues[priority]
+            while queue:
+                finish, _, ticket = heapq.heappop(queue)
+                self._forget_tenant(priority, ticket.tenant, finish)
+                if ticket.cancelled or ticket.future.done():
+                    continue
+                self._virtual_time[priority] = finish
+                return ticket
+        return None
+
+    def _forget_tenant(self, priority: Priority, tenant: str, finish: float) -> None:
+        """Drop a tenant's last finish tag once its last queued ticket has left the queue.
+
+        The class's virtual time has then reached the tag, so the next call
+        starts from the virtual time either way; tenants (client addresses by
+        default) would otherwise accumulate forever.
+        """
+        key = (priority, tenant)
+        if self._last_finish.get(key, float("inf")) <= finish:
+            del self._last_finish[key]
+
+    def status(self) -> dict:
+        """Current slot usage and queue depth per class"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "active_by_class": {p.value: n for p, n in self._active_by_class.items()},
+            "queued_by_class": {
+                p.value: sum(1 for _, _, t in queue if not t.cancelled)
+                for p, queue in self._queues.items()
+            },
+            "wait_seconds": {
+                p.value: self.metrics.timings[f"scheduler.wait_seconds.{p.value}"].summary()
+                for p in Priority
+                if f"scheduler.wait_seconds.{p.value}" in self.metrics.timings
+            },
+        }
+
+@contextmanager
+def scheduling_context(priority: Optional[Priority] = None, tenant: Optional[str] = None):
+    """Set the priority class and tenant for LLM calls made inside the block"""
+    tokens = []
+    if priority is not None:
+        tokens.append((current_priority, current_priority.set(priority)))
+    if tenant:
+        tokens.append((current_tenant, current_tenant.set(tenant)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def request_tenant(request) -> str:
+    """Fair-queuing key for an HTTP request: X-Tenant-ID header, else client address"""
+    tenant = request.headers.get("x-tenant-id")
+    if tenant:
+        return tenant
+    return request.client.host if request.client else DEFAULT_TENANT
+
+def estimate_cost(prompt: str) -> float:
+    """Scheduling cost of a call, in approximate prompt tokens"""
+    return max(1.0, len(prompt) / 4)
+
+def estimate_generation_tokens(text_content: str, num_questions: int) -> int:
+    """Estimate prompt plus completion tokens of a generation call (about 4 characters per token)"""
+    return len(text_content) // 4 + PROMPT_OVERHEAD_TOKENS + num_questions * TOKENS_PER_QUESTION
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "tenant=weight,tenant=weight" into a mapping"""
+    weights = {}
+    for item in spec.split(","):
+        if "=" in item:
+            tenant, weight = item.split("=", 1)
+            weights[tenant.strip()] = max(float(weight), 0.01)
+    return weights
+
+# Global scheduler instance
+scheduler = LLMScheduler()
+
+def get_scheduler() -> LLMScheduler:
+    """Get LLM scheduler instance"""
+    return scheduler
@@ -0,0 +1,55 @@
+"""
+Request coalescing
+Concurrent calls for the same key share one execution, so identical
+extractions or LLM chunk calls issued by parallel requests run once
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+from app.metrics import get_metrics
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Runs at most one call per key at a time; later callers await the first one's result.
+
+    The call runs in its own task, created in the first caller's context (so
+    an LLM call keeps that caller's priority class). It is cancelled only
+    when every caller waiting on it has been cancelled.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # key -> [task, number of callers waiting on it]
+        self._calls: Dict[Hashable, List] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Await call(), or the already running call for the same key"""
+        entry = self._calls.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(call())
+            entry = self._calls[key] = [task, 0]
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            get_metrics().increment(f"{self.name}.coalesced")
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                # Nobody wants the result any more; a later caller starts afresh
+                self._forget(key, entry[0])
+                entry[0].cancel()
+
+    def in_flight(self) -> int:
+        """Number of distinct calls running"""
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        entry = self._calls.get(key)
+        if entry is not None and entry[0] is task:
+            del self._calls[key]
+        if task.done() and not task.cancelled():
+            # Retrieve the exception so a failure nobody awaited is not logged as unhandled
+            task.exception()
@@ -0,0 +1,4 @@
+"""
+Persistent storage backends for Quiz Generator
+See app.database.StorageBackend for the interface they implement
+"""
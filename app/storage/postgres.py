@@ -0,0 +1,593 @@
+"""
+PostgreSQL storage backend for Quiz Generator
+Async (asyncpg) backend with a connection pool so several app instances
+can share one database
+"""
+import asyncio
+import os
+import struct
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import asyncpg
+
+from app.database import (
+    decode_cursor, next_page, split_questions, question_ref_changes, DUPLICATE_TITLE_PREFIX
+)
+from app.models import Quiz, QuizSummary, FileInfo, TextExtractionResult, TextSlice
+from app.quiz_patch import apply_quiz_patch, check_version, next_version
+from app.text_window import text_range
+
+# Ordered schema migrations; applied once each and recorded in schema_migrations
+MIGRATIONS = [
+    (1, """
+    CREATE TABLE files (
+        file_id TEXT PRIMARY KEY,
+        filename TEXT NOT NULL,
+        file_type TEXT NOT NULL,
+        file_size BIGINT NOT NULL,
+        upload_time TIMESTAMP NOT NULL,
+        text_extracted BOOLEAN NOT NULL DEFAULT FALSE,
+        word_count INTEGER
+    );
+    CREATE INDEX idx_files_upload_time ON files (upload_time DESC);
+
+    CREATE TABLE file_contents (
+        file_id TEXT PRIMARY KEY REFERENCES files (file_id) ON DELETE CASCADE,
+        content BYTEA NOT NULL
+    );
+
+    CREATE TABLE extracted_texts (
+        file_id TEXT PRIMARY KEY REFERENCES files (file_id) ON DELETE CASCADE,
+        text_content TEXT NOT NULL,
+        word_count INTEGER NOT NULL,
+        extraction_time DOUBLE PRECISION NOT NULL
+    );
+
+    CREATE TABLE quizzes (
+        id TEXT PRIMARY KEY,
+        source_file_id TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL,
+        updated_at TIMESTAMP,
+        data JSONB NOT NULL
+    );
+    CREATE INDEX idx_quizzes_source_file_created ON quizzes (source_file_id, created_at DESC);
+    CREATE INDEX idx_quizzes_created_at ON quizzes (created_at DESC);
+    """),
+    (2, """
+    DROP INDEX idx_quizzes_source_file_created;
+    DROP INDEX idx_quizzes_created_at;
+    DROP INDEX idx_files_upload_time;
+    CREATE INDEX idx_quizzes_file_order ON quizzes (source_file_id, created_at DESC, id DESC);
+    CREATE INDEX idx_quizzes_order ON quizzes (created_at DESC, id DESC);
+    CREATE INDEX idx_files_order ON files (upload_time DESC, file_id DESC);
+    """),
+    (3, """
+    ALTER TABLE quizzes ADD COLUMN summary JSONB;
+    UPDATE quizzes SET summary = jsonb_build_object(
+        'id', id,
+        'title', data->'title',
+        'description', data->'description',
+        'source_file_id', source_file_id,
+        'question_count', jsonb_array_length(data->'questions'),
+        'question_types', (
+            SELECT coalesce(jsonb_object_agg(question_type, n), '{}'::jsonb)
+            FROM (
+                SELECT q->>'question_type' AS question_type, count(*) AS n
+                FROM jsonb_array_elements(data->'questions') AS q
+                GROUP BY 1
+            ) AS counts
+        ),
+        'created_at', data->'created_at',
+        'updated_at', data->'updated_at',
+        'variant_group_id', data->'metadata'->'variant_group_id',
+        'variant_label', data->'metadata'->'variant_label'
+    );
+    ALTER TABLE quizzes ALTER COLUMN summary SET NOT NULL;
+    """),
+    (4, """
+    ALTER TABLE extracted_texts ADD COLUMN page_offsets INTEGER[];
+    """),
+    (5, """
+    CREATE TABLE retired_quizzes (
+        id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    );
+    """),
+    (6, """
+    CREATE TABLE store_counters (
+        name TEXT PRIMARY KEY,
+        value BIGINT NOT NULL
+    );
+    INSERT INTO store_counters (name, value) VALUES ('files', 0);
+    ALTER TABLE files ADD COLUMN version BIGINT NOT NULL DEFAULT 0;
+    """),
+    # Each distinct question once; quizzes.data lists question hashes instead.
+    # Questions moved here keep the hash of their JSONB text
+    (7, """
+    CREATE TABLE questions (
+        hash TEXT PRIMARY KEY,
+        data JSONB NOT NULL,
+        refs INTEGER NOT NULL
+    );
+    INSERT INTO questions (hash, data, refs)
+        SELECT encode(sha256(convert_to(question::text, 'UTF8')), 'hex'), question, count(*)
+        FROM quizzes, jsonb_array_elements(quizzes.data->'questions') AS question
+        GROUP BY question;
+    UPDATE quizzes SET data = jsonb_set(data, '{questions}', coalesce((
+        SELECT jsonb_agg(encode(sha256(convert_to(ref.question::text, 'UTF8')), 'hex')
+                         ORDER BY ref.position)
+        FROM jsonb_array_elements(data->'questions') WITH ORDINALITY AS ref (question, position)),
+        '[]'::jsonb));
+    """),
+]
+
+# Arbitrary key so concurrently starting instances migrate one at a time
+MIGRATION_LOCK_ID = 7_311_204
+
+# asyncpg prepares every statement it runs and keeps it in a per-connection
+# cache, so the constant SQL below is parsed once per pooled connection
+# Every file write bumps the files counter first (its row lock also orders
+# concurrent file writes); a file's version is the counter value of its last change
+BUMP_FILES_VERSION = "UPDATE store_counters SET value = value + 1 WHERE name = 'files' RETURNING value"
+SELECT_FILES_VERSION = "SELECT value FROM store_counters WHERE name = 'files'"
+SELECT_FILE_VERSION = "SELECT version FROM files WHERE file_id = $1"
+INSERT_FILE = """INSERT INTO files (file_id, filename, file_type, file_size, upload_time, version)
+    VALUES ($1, $2, $3, $4, $5, $6)
+    ON CONFLICT (file_id) DO UPDATE SET filename = $2, file_type = $3, file_size = $4,
+        upload_time = $5, text_extracted = FALSE, word_count = NULL, version = $6"""
+INSERT_CONTENT = """INSERT INTO file_contents (file_id, content) VALUES ($1, $2)
+    ON CONFLICT (file_id) DO UPDATE SET content = $2"""
+SELECT_FILE = """SELECT file_id, filename, file_type, file_size, upload_time, text_extracted, word_count
+    FROM files WHERE file_id = $1"""
+SELECT_FILES = """SELECT file_id, filename, file_type, file_size, upload_time, text_extracted, word_count
+    FROM files"""
+SELECT_CONTENT = "SELECT content FROM file_contents WHERE file_id = $1"
+INSERT_TEXT = """INSERT INTO extracted_texts
+    (file_id, text_content, word_count, extraction_time, page_offsets)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (file_id) DO UPDATE SET text_content = $2, word_count = $3, extraction_time = $4,
+        page_offsets = $5"""
+MARK_EXTRACTED = "UPDATE files SET text_extracted = TRUE, word_count = $2, version = $3 WHERE file_id = $1"
+SELECT_TEXT = """SELECT file_id, text_content, word_count, extraction_time, page_offsets
+    FROM extracted_texts WHERE file_id = $1"""
+SELECT_TEXT_INFO = """SELECT char_length(text_content) AS total_chars, word_count, page_offsets
+    FROM extracted_texts WHERE file_id = $1"""
+# substr() is 1-based and counts characters, like Python slicing does
+SELECT_TEXT_RANGE = "SELECT substr(text_content, $2, $3) FROM extracted_texts WHERE file_id = $1"
+INSERT_QUIZ = """INSERT INTO quizzes (id, source_file_id, created_at, updated_at, data, summary)
+    VALUES ($1, $2, $3, $4, $5::jsonb, $6::jsonb)
+    ON CONFLICT (id) DO UPDATE SET source_file_id = $2, created_at = $3, updated_at = $4,
+        data = $5::jsonb, summary = $6::jsonb"""
+# Full quiz JSON: the stored data with its question hashes swapped for the questions
+QUIZ_DATA = """jsonb_set(quizzes.data, '{questions}', coalesce((
+    SELECT jsonb_agg(questions.data ORDER BY ref.position)
+    FROM jsonb_array_elements_text(quizzes.data->'questions') WITH ORDINALITY AS ref (hash, position)
+    JOIN questions ON questions.hash = ref.hash), '[]'::jsonb)) AS data"""
+SELECT_QUIZ = f"SELECT {QUIZ_DATA} FROM quizzes WHERE id = $1"
+SELECT_QUIZ_VERSION = "SELECT coalesce((data->>'version')::int, 1) FROM quizzes WHERE id = $1"
+SELECT_QUIZ_FOR_UPDATE = f"SELECT {QUIZ_DATA} FROM quizzes WHERE id = $1 FOR UPDATE"
+SELECT_QUIZZES = f"SELECT {QUIZ_DATA} FROM quizzes"
+SELECT_SUMMARIES = "SELECT summary FROM quizzes"
+SELECT_QUIZ_EXPORT = f"SELECT created_at, id, {QUIZ_DATA} FROM quizzes"
+# Holds the source quiz, and so its questions' references, while it is copied
+LOCK_QUIZ = "SELECT 1 FROM quizzes WHERE id = $1 FOR SHARE"
+# Copies the stored JSONB, question hashes and all, in place instead of
+# round-tripping it through Python
+DUPLICATE_QUIZ = """INSERT INTO quizzes (id, source_file_id, created_at, updated_at, data, summary)
+    SELECT $1, source_file_id, $2, NULL,
+        data || jsonb_build_object('id', $1::text, 'title', $3::text || (data->>'title'),
+                                   'created_at', $2::timestamp, 'updated_at', NULL, 'version', 1),
+        summary || jsonb_build_object('id', $1::text, 'title', $3::text || (summary->>'title'),
+                                      'created_at', $2::timestamp, 'updated_at', NULL)
+    FROM quizzes WHERE id = $4
+    ON CONFLICT (id) DO NOTHING"""
+DELETE_QUIZ = "DELETE FROM quizzes WHERE id = $1"
+DELETE_QUIZZES_BY_FILE = "DELETE FROM quizzes WHERE source_file_id = $1"
+# Last version of deleted quizzes, so a quiz recreated under the same ID gets a fresh ETag
+SELECT_RETIRED_VERSION = "SELECT version FROM retired_quizzes WHERE id = $1 FOR UPDATE"
+RETIRE_QUIZ = """INSERT INTO retired_quizzes (id, version)
+    SELECT id, coalesce((data->>'version')::int, 1) FROM quizzes WHERE id = $1
+    ON CONFLICT (id) DO UPDATE SET version = excluded.version"""
+RETIRE_QUIZZES_BY_FILE = """INSERT INTO retired_quizzes (id, version)
+    SELECT id, coalesce((data->>'version')::int, 1) FROM quizzes WHERE source_file_id = $1
+    ON CONFLICT (id) DO UPDATE SET version = excluded.version"""
+UNRETIRE_QUIZ = "DELETE FROM retired_quizzes WHERE id = $1"
+# One row per question reference of the selected quizzes
+SELECT_QUESTION_REFS = "SELECT jsonb_array_elements_text(data->'questions') FROM quizzes WHERE id = $1"
+SELECT_QUESTION_REFS_BY_FILE = """SELECT jsonb_array_elements_text(data->'questions') FROM quizzes
+    WHERE source_file_id = $1"""
+ADD_QUESTION_REFS = """INSERT INTO questions (hash, data, refs) VALUES ($1, $2::jsonb, $3)
+    ON CONFLICT (hash) DO UPDATE SET refs = questions.refs + excluded.refs"""
+CHANGE_QUESTION_REFS = "UPDATE questions SET refs = refs + $2 WHERE hash = $1"
+# Only the rows the write touched, so it never waits on other writers' questions
+DROP_UNUSED_QUESTIONS = "DELETE FROM questions WHERE hash = ANY($1::text[]) AND refs <= 0"
+DELETE_FILE = "DELETE FROM files WHERE file_id = $1"
+DELETE_CONTENT = "DELETE FROM file_contents WHERE file_id = $1"
+
+# bytea values are varlena: at most 1 GB including their 4-byte header
+MAX_BYTEA_SIZE = 0x3FFFFFFF - 4
+# Binary COPY framing (see the COPY docs' "Binary Format") and bytes read per step
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+def _page_query(select: str, filters: List[str], params: list, time_column: str,
+                id_column: str, limit: Optional[int], cursor: Optional[str]) -> tuple:
+    """Keyset-paginated listing, newest first, that walks the (time, id) index.
+
+    Each filter uses "{}" where its parameter number goes.
+    """
+    filters = [f.format(f"${i + 1}") for i, f in enumerate(filters)]
+    if cursor:
+        timestamp, item_id = decode_cursor(cursor)
+        n = len(params)
+        filters.append(f"({time_column}, {id_column}) < (${n + 1}, ${n + 2})")
+        params = params + [timestamp, item_id]
+    sql = select
+    if filters:
+        sql += " WHERE " + " AND ".join(filters)
+    # LIMIT NULL means no limit
+    sql += f" ORDER BY {time_column} DESC, {id_column} DESC LIMIT ${len(params) + 1}"
+    return sql, params + [limit]
+
+async def _copy_content_row(file_id: str, path: str, size: int):
+    """One file_contents row in binary COPY format, read from disk a chunk at a time"""
+    key = file_id.encode()
+    yield (COPY_SIGNATURE + struct.pack("!ii", 0, 0)  # flags, header extension length
+           + struct.pack("!hi", 2, len(key)) + key + struct.pack("!i", size))
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, COPY_CHUNK_SIZE):
+            yield chunk
+    yield struct.pack("!h", -1)
+
+class PostgresDatabase:
+    """PostgreSQL implementation of the storage interface.
+
+    All methods are coroutines and share one asyncpg pool sized from
+    DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE. Call connect() before use; it
+    creates the pool and applies pending migrations.
+    """
+
+    blocking_io = False
+    max_file_size = MAX_BYTEA_SIZE
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.min_size = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+        self.max_size = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+        self.statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+        self.pool: Optional[asyncpg.Pool] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """Create the connection pool and bring the schema up to date"""
+        async with self._connect_lock:
+            if self.pool is not None:
+                return
+            self.pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                statement_cache_size=self.statement_cache_size,
+            )
+            await self.migrate()
+
+    async def migrate(self) -> List[int]:
+        """Apply pending migrations. Returns the versions applied"""
+        applied = []
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+                await conn.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    applied_at TIMESTAMP NOT NULL DEFAULT now()
+                )""")
+                done = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+                for version, sql in MIGRATIONS:
+                    if version in done:
+                        continue
+                    await conn.execute(sql)
+                    await conn.execute("INSERT INTO schema_migrations (version) VALUES ($1)", version)
+                    applied.append(version)
+        if applied:
+            print(f"Applied PostgreSQL migrations: {applied}")
+        return applied
+
+    async def _pool(self) -> asyncpg.Pool:
+        if self.pool is None:
+            await self.connect()
+        return self.pool
+
+    async def store_file(self, file_id: str, filename: str, file_type: str,
+                         file_size: int, content: bytes) -> FileInfo:
+        """Store uploaded file information and content"""
+        file_info = FileInfo(
+            file_id=file_id,
+            filename=filename,
+            file_type=file_type,
+            file_size=file_size,
+            upload_time=datetime.now(),
+            text_extracted=False
+        )
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                version = await conn.fetchval(BUMP_FILES_VERSION)
+                await conn.execute(INSERT_FILE, file_id, filename, file_info.file_type.value,
+                                   file_size, file_info.upload_time, version)
+                await conn.execute(INSERT_CONTENT, file_id, content)
+        return file_info
+
+    async def store_file_from_path(self, file_id: str, filename: str, file_type: str,
+                                   file_size: int, path: str) -> FileInfo:
+        """Store an upload assembled on disk, streaming it to the server with
+        binary COPY; the file is removed once stored"""
+        size = os.path.getsize(path)
+        if size > self.max_file_size:
+            raise ValueError(f"PostgreSQL stores files of at most {self.max_file_size} bytes")
+        file_info = FileInfo(
+            file_id=file_id,
+            filename=filename,
+            file_type=file_type,
+            file_size=file_size,
+            upload_time=datetime.now(),
+            text_extracted=False
+        )
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                version = await conn.fetchval(BUMP_FILES_VERSION)
+                await conn.execute(INSERT_FILE, file_id, filename, file_info.file_type.value,
+                                   file_size, file_info.upload_time, version)
+                # COPY cannot upsert
+                await conn.execute(DELETE_CONTENT, file_id)
+                await conn.copy_to_table("file_contents", source=_copy_content_row(file_id, path, size),
+                                         columns=["file_id", "content"], format="binary")
+        os.remove(path)
+        return file_info
+
+    async def get_file_info(self, file_id: str) -> Optional[FileInfo]:
+        """Get file information by ID"""
+        pool = await self._pool()
+        row = await pool.fetchrow(SELECT_FILE, file_id)
+        return FileInfo(**dict(row)) if row else None
+
+    async def get_files_version(self) -> str:
+        """Changes whenever a file is stored, processed or deleted"""
+        pool = await self._pool()
+        return str(await pool.fetchval(SELECT_FILES_VERSION))
+
+    async def get_file_version(self, file_id: str) -> Optional[str]:
+        """Changes whenever the file's information does; None for a missing file"""
+        pool = await self._pool()
+        version = await pool.fetchval(SELECT_FILE_VERSION, file_id)
+        return str(version) if version is not None else None
+
+    async def get_file_content(self, file_id: str) -> Optional[bytes]:
+        """Get file content by ID"""
+        pool = await self._pool()
+        return await pool.fetchval(SELECT_CONTENT, file_id)
+
+    async def list_files(self, limit: Optional[int] = None,
+                         cursor: Optional[str] = None) -> List[FileInfo]:
+        """List uploaded files, newest first"""
+        sql, params = _page_query(SELECT_FILES, [], [], "upload_time", "file_id", limit, cursor)
+        pool = await self._pool()
+        return [FileInfo(**dict(row)) for row in await pool.fetch(sql, *params)]
+
+    async def delete_file(self, file_id: str) -> bool:
+        """Delete file information, content and extracted text"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(BUMP_FILES_VERSION)
+                status = await conn.execute(DELETE_FILE, file_id)
+        return status != "DELETE 0"
+
+    async def store_extracted_text(self, result: TextExtractionResult) -> None:
+        """Store extracted text result"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                version = await conn.fetchval(BUMP_FILES_VERSION)
+                await conn.execute(INSERT_TEXT, result.file_id, result.text_content,
+                                   result.word_count, result.extraction_time, result.page_offsets)
+                await conn.execute(MARK_EXTRACTED, result.file_id, result.word_count, version)
+
+    async def get_extracted_text(self, file_id: str) -> Optional[TextExtractionResult]:
+        """Get extracted text by file ID"""
+        pool = await self._pool()
+        row = await pool.fetchrow(SELECT_TEXT, file_id)
+        return TextExtractionResult(**dict(row)) if row else None
+
+    async def get_text_slice(self, file_id: str, start: int = 0, end: Optional[int] = None,
+                             page: Optional[int] = None) -> Optional[TextSlice]:
+        """Get a character range or PDF page of the extracted text, sliced in SQL"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(SELECT_TEXT_INFO, file_id)
+            if not row:
+                return None
+            page_offsets = row["page_offsets"]
+            start, end = text_range(row["total_chars"], page_offsets, start, end, page)
+            text = await conn.fetchval(SELECT_TEXT_RANGE, file_id, start + 1, end - start)
+        return TextSlice(
+            file_id=file_id, start=start, end=end, total_chars=row["total_chars"],
+            word_count=row["word_count"], page=page,
+            page_count=len(page_offsets) if page_offsets else None, text=text,
+        )
+
+    async def store_quiz(self, quiz: Quiz) -> Quiz:
+        """Store quiz in database"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                return await self._put_quiz(conn, quiz)
+
+    async def store_quizzes(self, quizzes: List[Quiz]) -> int:
+        """Store several quizzes in a single transaction"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                for quiz in quizzes:
+                    await self._put_quiz(conn, quiz)
+        return len(quizzes)
+
+    async def _put_quiz(self, conn, quiz: Quiz) -> Quiz:
+        """Write a quiz inside the caller's transaction, bumping its version past any stored one"""
+        data = await conn.fetchval(SELECT_QUIZ_FOR_UPDATE, quiz.id)
+        current = Quiz.model_validate_json(data) if data else None
+        retired = None if data else await conn.fetchval(SELECT_RETIRED_VERSION, quiz.id)
+        quiz = next_version(quiz, current, retired)
+        await self._write_quiz(conn, quiz)
+        if retired is not None:
+            await conn.execute(UNRETIRE_QUIZ, quiz.id)
+        return quiz
+
+    async def get_quiz(self, quiz_id: str) -> Optional[Quiz]:
+        """Get quiz by ID"""
+        pool = await self._pool()
+        data = await pool.fetchval(SELECT_QUIZ, quiz_id)
+        return Quiz.model_validate_json(data) if data else None
+
+    async def get_quiz_version(self, quiz_id: str) -> Optional[int]:
+        """Get the current version of a quiz"""
+        pool = await self._pool()
+        return await pool.fetchval(SELECT_QUIZ_VERSION, quiz_id)
+
+    async def get_quiz_json(self, quiz_id: str) -> Optional[bytes]:
+        """Get a quiz as its stored JSON, without parsing it"""
+        pool = await self._pool()
+        data = await pool.fetchval(SELECT_QUIZ, quiz_id)
+        return data.encode() if data else None
+
+    async def duplicate_quiz(self, quiz_id: str, new_id: str,
+                             created_at: Optional[datetime] = None) -> Optional[Quiz]:
+        """Copy a quiz under a new ID"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                # Only the question hashes are copied; the copy adds a reference to each
+                await conn.execute(LOCK_QUIZ, quiz_id)
+                status = await conn.execute(DUPLICATE_QUIZ, new_id, created_at or datetime.now(),
+                                            DUPLICATE_TITLE_PREFIX, quiz_id)
+                if status == "INSERT 0 0":
+                    return None
+                added = await self._question_refs(conn, SELECT_QUESTION_REFS, new_id)
+                await self._change_question_refs(conn, [(key, None) for key in added], [])
+                data = await conn.fetchval(SELECT_QUIZ, new_id)
+        return Quiz.model_validate_json(data)
+
+    async def update_quiz(self, quiz_id: str, updates: dict,
+                          expected_version: Optional[int] = None) -> Optional[Quiz]:
+        """Update quiz with new data"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                data = await conn.fetchval(SELECT_QUIZ_FOR_UPDATE, quiz_id)
+                if not data:
+                    return None
+                quiz = Quiz.model_validate_json(data)
+                check_version(quiz, expected_version)
+                quiz_dict = quiz.model_dump()
+                quiz_dict.update(updates)
+                quiz_dict['updated_at'] = datetime.now()
+                quiz_dict['version'] = quiz.version + 1
+                updated_quiz = Quiz(**quiz_dict)
+                await self._write_quiz(conn, updated_quiz)
+        return updated_quiz
+
+    async def patch_quiz(self, quiz_id: str, operations: List[dict],
+                         expected_version: Optional[int] = None) -> Optional[Quiz]:
+        """Apply JSON-Patch style operations, touching only the affected questions"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                data = await conn.fetchval(SELECT_QUIZ_FOR_UPDATE, quiz_id)
+                if not data:
+                    return None
+                quiz = Quiz.model_validate_json(data)
+                check_version(quiz, expected_version)
+                patched_quiz = apply_quiz_patch(quiz, operations)
+                await self._write_quiz(conn, patched_quiz)
+        return patched_quiz
+
+    async def list_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                           cursor: Optional[str] = None) -> List[Quiz]:
+        """List quizzes newest first, optionally filtered by file ID"""
+        filters, params = (["source_file_id = {}"], [file_id]) if file_id else ([], [])
+        sql, params = _page_query(SELECT_QUIZZES, filters, params, "created_at", "id", limit, cursor)
+        pool = await self._pool()
+        rows = await pool.fetch(sql, *params)
+        return [Quiz.model_validate_json(row["data"]) for row in rows]
+
+    async def list_quiz_summaries(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                                  cursor: Optional[str] = None) -> List[QuizSummary]:
+        """List quiz summaries in the same order as list_quizzes"""
+        filters, params = (["source_file_id = {}"], [file_id]) if file_id else ([], [])
+        sql, params = _page_query(SELECT_SUMMARIES, filters, params, "created_at", "id", limit, cursor)
+        pool = await self._pool()
+        rows = await pool.fetch(sql, *params)
+        return [QuizSummary.model_validate_json(row["summary"]) for row in rows]
+
+    async def export_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                             cursor: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]:
+        """One page of quizzes as stored JSON, in list_quizzes order, and the next page's cursor"""
+        filters, params = (["source_file_id = {}"], [file_id]) if file_id else ([], [])
+        sql, params = _page_query(SELECT_QUIZ_EXPORT, filters, params, "created_at", "id",
+                                  limit + 1 if limit else None, cursor)
+        pool = await self._pool()
+        rows = await pool.fetch(sql, *params)
+        rows, next_cursor = next_page(rows, limit, lambda row: (row["created_at"], row["id"]))
+        return [row["data"].encode() for row in rows], next_cursor
+
+    async def delete_quiz(self, quiz_id: str) -> bool:
+        """Delete quiz by ID"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(RETIRE_QUIZ, quiz_id)
+                released = await self._question_refs(conn, SELECT_QUESTION_REFS, quiz_id)
+                status = await conn.execute(DELETE_QUIZ, quiz_id)
+                await self._change_question_refs(conn, [], released)
+        return status != "DELETE 0"
+
+    async def delete_quizzes_for_file(self, file_id: str) -> int:
+        """Delete every quiz generated from a file"""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(RETIRE_QUIZZES_BY_FILE, file_id)
+                released = await self._question_refs(conn, SELECT_QUESTION_REFS_BY_FILE, file_id)
+                status = await conn.execute(DELETE_QUIZZES_BY_FILE, file_id)
+                await self._change_question_refs(conn, [], released)
+        return int(status.split()[-1])
+
+    async def close(self) -> None:
+        """Close the connection pool"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def _write_quiz(self, conn, quiz: Quiz) -> None:
+        """Insert or replace a quiz, storing new questions once and releasing dropped ones"""
+        data, questions = split_questions(quiz)
+        released = await self._question_refs(conn, SELECT_QUESTION_REFS, quiz.id)
+        await conn.execute(INSERT_QUIZ, quiz.id, quiz.source_file_id, quiz.created_at,
+                           quiz.updated_at, data, QuizSummary.from_quiz(quiz).model_dump_json())
+        await self._change_question_refs(conn, questions, released)
+
+    @staticmethod
+    async def _question_refs(conn, select: str, key: str) -> List[str]:
+        return [row[0] for row in await conn.fetch(select, key)]
+
+    @staticmethod
+    async def _change_question_refs(conn, questions: List[Tuple[str, Optional[str]]],
+                                    released: List[str]) -> None:
+        changes = question_ref_changes(questions, released)
+        for key, body, delta in changes:
+            if body is not None:
+                await conn.execute(ADD_QUESTION_REFS, key, body, delta)
+            else:
+                await conn.execute(CHANGE_QUESTION_REFS, key, delta)
+        await conn.execute(DROP_UNUSED_QUESTIONS, [key for key, _, delta in changes if delta < 0])
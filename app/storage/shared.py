@@ -0,0 +1,258 @@
+"""
+Shared-state storage for multi-worker deployments
+One store process owns an InMemoryDatabase; every uvicorn worker on the host
+talks to it over a unix socket, so all workers see the same data
+"""
+import fcntl
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing.managers import BaseManager
+from typing import Dict, Optional
+
+from app.database import InMemoryDatabase
+from app.models import FileInfo
+
+# Storage methods served by the store process
+REMOTE_METHODS = [
+    "store_file_from_path", "get_file_info", "list_files", "delete_file",
+    "get_files_version", "get_file_version",
+    "store_extracted_text", "get_extracted_text", "get_text_slice",
+    "store_quiz", "store_quizzes", "get_quiz", "get_quiz_version", "get_quiz_json",
+    "duplicate_quiz", "update_quiz", "patch_quiz", "list_quizzes", "list_quiz_summaries",
+    "export_quizzes", "delete_quiz", "delete_quizzes_for_file",
+]
+
+# How often an autostarted store checks whether any worker is still attached
+IDLE_CHECK_SECONDS = 1.0
+
+# Directory holding the app package, so the spawned store can import it
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class SharedStoreError(Exception):
+    """Custom exception for shared store errors"""
+    pass
+
+class StoreServer:
+    """InMemoryDatabase served to the workers.
+
+    The manager serves every connection on its own thread. The database
+    synchronizes its own state, so read-modify-write calls such as
+    update_quiz stay atomic against a concurrent delete_quiz from another
+    worker while unrelated calls run side by side. Upload bytes never cross
+    the socket: workers write into the blob directory and pass the path.
+    """
+
+    def __init__(self):
+        self._db = InMemoryDatabase()
+        # Attached SharedDatabase instances: token -> worker pid
+        self._workers: Dict[str, int] = {}
+        self._workers_lock = threading.Lock()
+
+    def call(self, method: str, args: tuple, kwargs: dict):
+        if method not in REMOTE_METHODS:
+            raise SharedStoreError(f"Unknown storage method: {method}")
+        return getattr(self._db, method)(*args, **kwargs)
+
+    def blob_directory(self) -> str:
+        return self._db.blobs.directory
+
+    def locate_file(self, file_id: str) -> Optional[str]:
+        return self._db.blobs.locate(file_id)
+
+    def memory_report(self) -> dict:
+        with self._db._lock:
+            return {**self._db.memory.report(), "blobs": self._db.blobs.stats()}
+
+    def attach(self, token: str, pid: int) -> None:
+        with self._workers_lock:
+            self._workers[token] = pid
+
+    def detach(self, token: str) -> None:
+        with self._workers_lock:
+            self._workers.pop(token, None)
+
+    def live_workers(self) -> int:
+        """Attached workers whose process still runs; crashed ones never detach"""
+        with self._workers_lock:
+            for token, pid in list(self._workers.items()):
+                try:
+                    os.kill(pid, 0)
+                except ProcessLookupError:
+                    del self._workers[token]
+            return len(self._workers)
+
+class _StoreManager(BaseManager):
+    pass
+
+def _authkey(socket_path: str, create: bool = False) -> bytes:
+    """SHARED_STORE_AUTHKEY, or else the random key the store keeps in <socket>.key"""
+    key = os.getenv("SHARED_STORE_AUTHKEY")
+    if key:
+        return key.encode()
+    path = f"{socket_path}.key"
+    if create and not os.path.exists(path):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    info = os.stat(path)
+    # Anyone who can read the key can run code in the store through pickle
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise SharedStoreError(f"{path} must be owned by this user with mode 0600")
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip().encode()
+
+@contextmanager
+def _spawn_lock(socket_path: str):
+    """Held while a worker starts or attaches to the store, and while an idle store shuts down"""
+    with open(f"{socket_path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def _exit_when_idle(store: StoreServer, server, socket_path: str) -> None:
+    """Stop the server once no attached worker is left"""
+    while True:
+        time.sleep(IDLE_CHECK_SECONDS)
+        if store.live_workers():
+            continue
+        with _spawn_lock(socket_path):
+            # A worker may have attached while we waited for the lock
+            if store.live_workers():
+                continue
+            # Workers arriving from now on find no socket and start a new store
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            print(f"Shared store on {socket_path} has no workers left, stopping")
+            server.stop_event.set()
+            return
+
+def serve(socket_path: str, exit_when_idle: bool = False) -> None:
+    """Run the store process until killed, or with exit_when_idle until the
+    last attached worker detaches or exits"""
+    # Socket and key file are created owner-only
+    os.umask(0o077)
+    store = StoreServer()
+    _StoreManager.register("store", callable=lambda: store)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    manager = _StoreManager(address=socket_path, authkey=_authkey(socket_path, create=True))
+    server = manager.get_server()
+    os.chmod(socket_path, 0o600)
+    print(f"Shared store listening on {socket_path}")
+    if exit_when_idle:
+        threading.Thread(target=_exit_when_idle, args=(store, server, socket_path), daemon=True).start()
+    server.serve_forever()
+
+def _remote(name: str):
+    def method(self, *args, **kwargs):
+        return self._store.call(name, args, kwargs)
+    method.__name__ = name
+    method.__doc__ = f"{name} in the shared store process"
+    return method
+
+class SharedDatabase:
+    """Storage backend that forwards every call to the shared store process.
+
+    Calls are blocking socket round trips, so async callers go through
+    run_db (a worker thread each); the manager proxy opens one connection
+    per calling thread. A store started by a worker (SHARED_STORE_AUTOSTART)
+    stops once every worker attached to it has closed or exited; one started
+    by hand keeps running.
+    """
+
+    blocking_io = True
+    max_file_size = None
+
+    def __init__(self, socket_path: str, autostart: Optional[bool] = None,
+                 connect_timeout: float = 10.0):
+        self.socket_path = socket_path
+        if autostart is None:
+            autostart = os.getenv("SHARED_STORE_AUTOSTART", "true").lower() == "true"
+        _StoreManager.register("store")
+        self._token = secrets.token_hex(8)
+        self._store = self._connect(autostart, connect_timeout)
+
+    def _connect(self, autostart: bool, timeout: float):
+        # Attaching under the lock keeps an idle autostarted store from stopping
+        # between our connect and attach
+        with _spawn_lock(self.socket_path):
+            try:
+                store = self._try_connect()
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not autostart:
+                    raise SharedStoreError(f"No shared store listening on {self.socket_path}")
+                # Several workers start at once: the lock lets exactly one spawn the store
+                store = self._spawn(timeout)
+            store.attach(self._token, os.getpid())
+            return store
+
+    def _spawn(self, timeout: float):
+        process = subprocess.Popen(
+            [sys.executable, "-m", "app.storage.shared", self.socket_path, "--exit-when-idle"],
+            cwd=PROJECT_ROOT,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._try_connect()
+            except (FileNotFoundError, ConnectionRefusedError):
+                if process.poll() is not None:
+                    raise SharedStoreError(f"Shared store exited with code {process.returncode}")
+                if time.monotonic() > deadline:
+                    raise SharedStoreError(f"Shared store did not start on {self.socket_path}")
+                time.sleep(0.05)
+
+    def _try_connect(self):
+        manager = _StoreManager(address=self.socket_path, authkey=_authkey(self.socket_path))
+        manager.connect()
+        return manager.store()
+
+    def store_file(self, file_id: str, filename: str, file_type: str,
+                   file_size: int, content: bytes) -> FileInfo:
+        """Write the upload into the store's blob directory and hand over the path"""
+        fd, path = tempfile.mkstemp(prefix=".incoming-", dir=self._store.blob_directory())
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            return self.store_file_from_path(file_id, filename, file_type, file_size, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def get_file_content(self, file_id: str) -> Optional[bytes]:
+        """Read the file straight from the store's disk tier"""
+        path = self._store.locate_file(file_id)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Deleted by another worker since it was located
+            return None
+
+    def memory_report(self) -> dict:
+        """Memory usage of the shared store process"""
+        return self._store.memory_report()
+
+    def close(self) -> None:
+        """Detach from the store; an autostarted store stops after the last worker"""
+        try:
+            self._store.detach(self._token)
+        except (OSError, EOFError):
+            # The store is already gone
+            pass
+
+for _name in REMOTE_METHODS:
+    setattr(SharedDatabase, _name, _remote(_name))
+
+if __name__ == "__main__":
+    arguments = [arg for arg in sys.argv[1:] if arg != "--exit-when-idle"]
+    serve(arguments[0] if arguments else "/tmp/quiz_generator_store.sock",
+          exit_when_idle="--exit-when-idle" in sys.argv[1:])
@@ -0,0 +1,337 @@
+"""
+Snapshot and journal persistence for the in-memory store
+Periodic gzip-compressed snapshots plus an append-only change log, restored
+in the background on startup
+"""
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.models import Quiz, QuizQuestion, FileInfo, TextExtractionResult
+
+# Version 2 writes each shared question object once and refers to it after
+SNAPSHOT_VERSION = 2
+READABLE_SNAPSHOT_VERSIONS = (1, 2)
+SNAPSHOT_FILE = "store.snapshot.gz"
+JOURNAL_FILE = "store.journal"
+# Journal being folded into a snapshot; replayed too if a crash interrupts that
+ROTATED_JOURNAL_FILE = "store.journal.old"
+# Journal rotated while an older one was still waiting to be folded in
+PENDING_JOURNAL_FILE = "store.journal.pending"
+
+# Records applied per event loop turn while restoring
+RESTORE_BATCH_SIZE = 500
+
+# Quizzes are decoded by _decode_quiz; other ops carry plain JSON or nothing
+RECORD_MODELS = {"file": FileInfo, "text": TextExtractionResult}
+
+Record = Tuple[str, str, object]
+
+class SnapshotError(Exception):
+    """Custom exception for snapshot and journal errors"""
+    pass
+
+class StorePersistence:
+    """Keeps an InMemoryDatabase recoverable across restarts.
+
+    Every change is appended to a journal (flushed per write, fsynced every
+    JOURNAL_FSYNC_SECONDS). Every SNAPSHOT_INTERVAL_SECONDS, and on shutdown,
+    the whole store is written to a compressed snapshot and the journal
+    starts over. On startup the snapshot and journal are parsed on a worker
+    thread and applied in small batches, so the app serves requests while
+    the restore runs; keys written by live requests in the meantime win, and
+    lookups that miss get 503 with Retry-After rather than 404.
+    """
+
+    def __init__(self, db, directory: str):
+        self.db = db
+        self.directory = directory
+        self.snapshot_interval = float(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "300"))
+        self.fsync_interval = float(os.getenv("JOURNAL_FSYNC_SECONDS", "1"))
+        os.makedirs(directory, exist_ok=True)
+
+        self.restoring = False
+        # Snapshots are only written once the old state is fully loaded
+        self.restore_complete = False
+        self.restored_records = 0
+        self.last_snapshot_at: Optional[datetime] = None
+        self.last_snapshot_seconds: Optional[float] = None
+        self._journal = None
+        self._journal_records = 0
+        self._replaying = False
+        # Keys changed by live requests while a restore is running
+        self._changed_during_restore: Set[Tuple[str, str]] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._snapshot_lock = asyncio.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    async def start(self) -> None:
+        """Open the journal and start the background restore and snapshot loops"""
+        self._journal = open(self._path(JOURNAL_FILE), "a", encoding="utf-8")
+        self.restoring = True
+        self._tasks = [
+            asyncio.create_task(self._restore()),
+            asyncio.create_task(self._run_periodic()),
+        ]
+
+    def log(self, op: str, key: str, payload: Optional[str]) -> None:
+        """Append one change to the journal"""
+        if self._replaying or self._journal is None:
+            return
+        if self.restoring:
+            self._changed_during_restore.add(_record_scope(op, key))
+            if op == "delete_file":
+                self._changed_during_restore.add(("text", key))
+        self._journal.write(_encode(op, key, payload))
+        self._journal.flush()
+        self._journal_records += 1
+
+    async def _restore(self) -> None:
+        started = time.monotonic()
+        try:
+            records = await asyncio.to_thread(self._load_records)
+            for start in range(0, len(records), RESTORE_BATCH_SIZE):
+                self._apply(records[start:start + RESTORE_BATCH_SIZE])
+                await asyncio.sleep(0)
+            self.restored_records = len(records)
+            self.restore_complete = True
+            # Fold the replayed journal into the next scheduled snapshot
+            self._journal_records += len(records)
+            print(f"Restored {len(records)} store records in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            print(f"❌ Store restore failed: {str(e)}")
+        finally:
+            self.restoring = False
+            self._changed_during_restore.clear()
+
+    def _load_records(self) -> List[Record]:
+        """Parse snapshot and journals (worker thread; touches no shared state)"""
+        records: List[Record] = []
+        snapshot_path = self._path(SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with gzip.open(snapshot_path, "rt", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("version") not in READABLE_SNAPSHOT_VERSIONS:
+                    raise SnapshotError(f"Unsupported snapshot version: {header.get('version')}")
+                records.extend(_decode_lines(f, tolerate_tail=False))
+        for name in (ROTATED_JOURNAL_FILE, PENDING_JOURNAL_FILE, JOURNAL_FILE):
+            path = self._path(name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    # A crash can leave the last journal line half written
+                    records.extend(_decode_lines(f, tolerate_tail=True))
+        return records
+
+    def _apply(self, records: List[Record]) -> None:
+        db = self.db
+        self._replaying = True
+        try:
+            for op, key, value in records:
+                if _record_scope(op, key) in self._changed_during_restore:
+                    continue
+                if op == "file":
+                    db.restore_file(value)
+                elif op == "text":
+                    db.store_extracted_text(value)
+                elif op == "quiz":
+                    if ("file_quizzes", value.source_file_id) not in self._changed_during_restore:
+                        db.store_quiz(value)
+                elif op == "duplicate_quiz":
+                    db.duplicate_quiz(value["source_id"], key, datetime.fromisoformat(value["created_at"]))
+                elif op == "delete_quiz":
+                    db.delete_quiz(key)
+                elif op == "delete_file_quizzes":
+                    db.delete_quizzes_for_file(key)
+                elif op == "delete_file":
+                    db.delete_file(key)
+                elif op == "retired_quiz":
+                    db.restore_retired_version(key, value)
+        finally:
+            self._replaying = False
+
+    async def _run_periodic(self) -> None:
+        last_snapshot = time.monotonic()
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            try:
+                async with self._snapshot_lock:
+                    if self._journal is not None:
+                        await asyncio.to_thread(os.fsync, self._journal.fileno())
+                due = time.monotonic() - last_snapshot >= self.snapshot_interval
+                if due and self._journal_records and self.restore_complete:
+                    await self.snapshot()
+                    last_snapshot = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Store snapshot failed: {str(e)}")
+
+    async def snapshot(self) -> int:
+        """Write the whole store to a new snapshot and start a fresh journal"""
+        if not self.restore_complete:
+            raise SnapshotError("Store restore has not finished; refusing to overwrite the snapshot")
+        async with self._snapshot_lock:
+            started = time.monotonic()
+            count = await asyncio.to_thread(self._snapshot_sync)
+            self.last_snapshot_at = datetime.now()
+            self.last_snapshot_seconds = time.monotonic() - started
+            return count
+
+    def _snapshot_sync(self) -> int:
+        """Copy, rotate and write the snapshot (worker thread)"""
+        db = self.db
+        # Consistent point-in-time copy; later changes go to the new journal.
+        # Only the copy and the rename hold the store's lock; fsyncs run after
+        with db._lock:
+            files = list(db.files.values())
+            texts = list(db.extracted_texts.values())
+            quizzes = list(db.quizzes.values())
+            retired = list(db._retired_versions.items())
+            old_journal, moved_to = self._rotate_journal()
+        self._fold_journal(old_journal, moved_to)
+        count = self._write_snapshot(files, texts, quizzes, retired)
+        os.remove(self._path(ROTATED_JOURNAL_FILE))
+        return count
+
+    def _rotate_journal(self):
+        """Move the journal aside and open a fresh one; returns the old handle and its new path"""
+        self._journal.flush()
+        old_journal = self._journal
+        current, rotated = self._path(JOURNAL_FILE), self._path(ROTATED_JOURNAL_FILE)
+        # If an earlier snapshot failed its journal is still needed; park this
+        # one next to it and append it once the lock is released
+        moved_to = self._path(PENDING_JOURNAL_FILE) if os.path.exists(rotated) else rotated
+        os.replace(current, moved_to)
+        self._journal = open(current, "a", encoding="utf-8")
+        self._journal_records = 0
+        return old_journal, moved_to
+
+    def _fold_journal(self, old_journal, moved_to: str) -> None:
+        os.fsync(old_journal.fileno())
+        old_journal.close()
+        rotated = self._path(ROTATED_JOURNAL_FILE)
+        if moved_to != rotated:
+            with open(moved_to, "rb") as src, open(rotated, "ab") as dst:
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(moved_to)
+
+    def _write_snapshot(self, files, texts, quizzes, retired) -> int:
+        path = self._path(SNAPSHOT_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                header = {"version": SNAPSHOT_VERSION, "created_at": datetime.now().isoformat()}
+                f.write((json.dumps(header) + "\n").encode())
+                for op, items, key in (("file", files, "file_id"), ("text", texts, "file_id")):
+                    for item in items:
+                        f.write(_encode(op, getattr(item, key), item.model_dump_json()).encode())
+                refs: Dict[int, int] = {}
+                for quiz in quizzes:
+                    f.write(_encode("quiz", quiz.id, _quiz_payload(quiz, refs)).encode())
+                for quiz_id, version in retired:
+                    f.write(_encode("retired_quiz", quiz_id, str(version)).encode())
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+        return len(files) + len(texts) + len(quizzes) + len(retired)
+
+    def status(self) -> dict:
+        """Restore progress and snapshot/journal state"""
+        snapshot_path = self._path(SNAPSHOT_FILE)
+        return {
+            "directory": self.directory,
+            "restoring": self.restoring,
+            "restore_complete": self.restore_complete,
+            "restored_records": self.restored_records,
+            "snapshot_bytes": os.path.getsize(snapshot_path) if os.path.exists(snapshot_path) else 0,
+            "last_snapshot_at": self.last_snapshot_at.isoformat() if self.last_snapshot_at else None,
+            "last_snapshot_seconds": self.last_snapshot_seconds,
+            "journal_records": self._journal_records,
+        }
+
+    async def close(self) -> None:
+        """Stop background work and write a final snapshot"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._journal is None:
+            return
+        if self.restore_complete:
+            await self.snapshot()
+        self._journal.close()
+        self._journal = None
+
+def _record_scope(op: str, key: str) -> Tuple[str, str]:
+    """Which key a record overwrites, for conflict checks against live writes"""
+    if op in ("quiz", "duplicate_quiz", "delete_quiz", "retired_quiz"):
+        return ("quiz", key)
+    if op == "delete_file_quizzes":
+        return ("file_quizzes", key)
+    if op == "text":
+        return ("text", key)
+    return ("file", key)
+
+def _encode(op: str, key: str, payload: Optional[str]) -> str:
+    # payload is already JSON; splice it in rather than encoding it twice
+    return f'{{"op":"{op}","key":{json.dumps(key)},"data":{payload or "null"}}}\n'
+
+def _quiz_payload(quiz: Quiz, refs: Dict[int, int]) -> str:
+    """Quiz JSON where a question already written is replaced by {"$ref": n}"""
+    questions = []
+    for question in quiz.questions:
+        ref = refs.get(id(question))
+        if ref is None:
+            ref = refs[id(question)] = len(refs)
+            questions.append(f'{{"$id":{ref},{question.model_dump_json()[1:]}')
+        else:
+            questions.append(f'{{"$ref":{ref}}}')
+    header = quiz.model_dump_json(exclude={"questions"})
+    return f'{header[:-1]},"questions":[{",".join(questions)}]}}'
+
+def _decode_quiz(data: dict, shared: Dict[int, QuizQuestion]) -> Quiz:
+    questions = []
+    for item in data["questions"]:
+        if "$ref" in item:
+            questions.append(shared[item["$ref"]])
+            continue
+        ref = item.pop("$id", None)
+        question = QuizQuestion.model_validate(item)
+        if ref is not None:
+            shared[ref] = question
+        questions.append(question)
+    # Validated instances are kept as they are, so shared questions stay shared
+    return Quiz.model_validate({**data, "questions": questions})
+
+def _decode_lines(lines, tolerate_tail: bool) -> Iterator[Record]:
+    pending = None
+    shared: Dict[int, QuizQuestion] = {}
+    for line in lines:
+        if pending is not None:
+            # Only the very last line may be damaged
+            raise SnapshotError(f"Corrupt record: {pending[:80]}")
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if not tolerate_tail:
+                raise SnapshotError(f"Corrupt record: {line[:80]}")
+            pending = line
+            continue
+        op = record["op"]
+        model = RECORD_MODELS.get(op)
+        if op == "quiz":
+            value = _decode_quiz(record["data"], shared)
+        elif model:
+            value = model.model_validate(record["data"])
+        else:
+            value = record["data"]
+        yield op, record["key"], value
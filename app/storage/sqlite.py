@@ -0,0 +1,562 @@
+"""
+SQLite storage backend for Quiz Generator
+Single-file persistent storage in WAL mode, safe for concurrent readers
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from app.database import (
+    decode_cursor, next_page, split_questions, question_ref_changes, DUPLICATE_TITLE_PREFIX
+)
+from app.models import Quiz, QuizSummary, FileInfo, TextExtractionResult, TextSlice
+from app.quiz_patch import apply_quiz_patch, check_version, next_version
+from app.text_window import text_range
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    upload_time TEXT NOT NULL,
+    text_extracted INTEGER NOT NULL DEFAULT 0,
+    word_count INTEGER,
+    version INTEGER NOT NULL DEFAULT 0
+);
+DROP INDEX IF EXISTS idx_files_upload_time;
+CREATE INDEX IF NOT EXISTS idx_files_order ON files (upload_time, file_id);
+
+CREATE TABLE IF NOT EXISTS file_contents (
+    file_id TEXT PRIMARY KEY,
+    content BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS extracted_texts (
+    file_id TEXT PRIMARY KEY,
+    text_content TEXT NOT NULL,
+    word_count INTEGER NOT NULL,
+    extraction_time REAL NOT NULL,
+    page_offsets TEXT
+);
+
+CREATE TABLE IF NOT EXISTS quizzes (
+    id TEXT PRIMARY KEY,
+    source_file_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_quizzes_source_file_id;
+DROP INDEX IF EXISTS idx_quizzes_created_at;
+CREATE INDEX IF NOT EXISTS idx_quizzes_file_order ON quizzes (source_file_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_quizzes_order ON quizzes (created_at, id);
+
+-- Each distinct question once, keyed by the hash of its JSON. quizzes.data
+-- lists question hashes, so duplicates and edits share unchanged questions
+CREATE TABLE IF NOT EXISTS questions (
+    hash TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    refs INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_unused ON questions (hash) WHERE refs <= 0;
+
+CREATE TABLE IF NOT EXISTS retired_quizzes (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS store_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_counters (name, value) VALUES ('files', 0);
+"""
+
+# Statement texts are constant so sqlite3's statement cache keeps them prepared
+# Every change to the files table bumps the files counter first; a file's
+# version is the counter value of its last change
+BUMP_FILES_VERSION = "UPDATE store_counters SET value = value + 1 WHERE name = 'files'"
+FILES_VERSION = "(SELECT value FROM store_counters WHERE name = 'files')"
+SELECT_FILES_VERSION = "SELECT value FROM store_counters WHERE name = 'files'"
+SELECT_FILE_VERSION = "SELECT version FROM files WHERE file_id = ?"
+INSERT_FILE = f"""INSERT OR REPLACE INTO files
+    (file_id, filename, file_type, file_size, upload_time, text_extracted, word_count, version)
+    VALUES (?, ?, ?, ?, ?, 0, NULL, {FILES_VERSION})"""
+INSERT_CONTENT = "INSERT OR REPLACE INTO file_contents (file_id, content) VALUES (?, ?)"
+# Reserves the blob that store_file_from_path then writes through the incremental blob API
+INSERT_EMPTY_CONTENT = """INSERT OR REPLACE INTO file_contents (file_id, content) VALUES (?, zeroblob(?))
+    RETURNING rowid"""
+SELECT_FILE = """SELECT file_id, filename, file_type, file_size, upload_time, text_extracted, word_count
+    FROM files WHERE file_id = ?"""
+SELECT_FILES = """SELECT file_id, filename, file_type, file_size, upload_time, text_extracted, word_count
+    FROM files"""
+SELECT_CONTENT = "SELECT content FROM file_contents WHERE file_id = ?"
+INSERT_TEXT = """INSERT OR REPLACE INTO extracted_texts
+    (file_id, text_content, word_count, extraction_time, page_offsets) VALUES (?, ?, ?, ?, ?)"""
+MARK_EXTRACTED = f"""UPDATE files SET text_extracted = 1, word_count = ?, version = {FILES_VERSION}
+    WHERE file_id = ?"""
+SELECT_TEXT = """SELECT file_id, text_content, word_count, extraction_time, page_offsets
+    FROM extracted_texts WHERE file_id = ?"""
+SELECT_TEXT_INFO = """SELECT length(text_content), word_count, page_offsets
+    FROM extracted_texts WHERE file_id = ?"""
+# substr() is 1-based and counts characters, like Python slicing does
+SELECT_TEXT_RANGE = "SELECT substr(text_content, ?, ?) FROM extracted_texts WHERE file_id = ?"
+INSERT_QUIZ = """INSERT OR REPLACE INTO quizzes (id, source_file_id, created_at, data, summary)
+    VALUES (?, ?, ?, ?, ?)"""
+# Full quiz JSON: the stored data with its question hashes swapped for the questions
+QUIZ_DATA = """json_set(quizzes.data, '$.questions', json((
+    SELECT json_group_array(json(body)) FROM (
+        SELECT questions.data AS body FROM json_each(quizzes.data, '$.questions') AS ref
+        JOIN questions ON questions.hash = ref.value ORDER BY ref.key))))"""
+SELECT_QUIZ = f"SELECT {QUIZ_DATA} FROM quizzes WHERE id = ?"
+SELECT_QUIZ_VERSION = "SELECT coalesce(json_extract(data, '$.version'), 1) FROM quizzes WHERE id = ?"
+SELECT_QUIZZES = f"SELECT {QUIZ_DATA} FROM quizzes"
+SELECT_SUMMARIES = "SELECT summary FROM quizzes"
+SELECT_QUIZ_EXPORT = f"SELECT created_at, id, {QUIZ_DATA} FROM quizzes"
+# Copies the stored JSON, question hashes and all, in place instead of
+# round-tripping it through Python
+DUPLICATE_QUIZ = """INSERT OR REPLACE INTO quizzes (id, source_file_id, created_at, data, summary)
+    SELECT :new_id, source_file_id, :created_at,
+        json_set(data, '$.id', :new_id, '$.title', :prefix || json_extract(data, '$.title'),
+                 '$.created_at', :created_at_json, '$.updated_at', NULL, '$.version', 1),
+        json_set(summary, '$.id', :new_id, '$.title', :prefix || json_extract(summary, '$.title'),
+                 '$.created_at', :created_at_json, '$.updated_at', NULL)
+    FROM quizzes WHERE id = :quiz_id"""
+DELETE_QUIZ = "DELETE FROM quizzes WHERE id = ?"
+DELETE_QUIZZES_BY_FILE = "DELETE FROM quizzes WHERE source_file_id = ?"
+# Last version of deleted quizzes, so a quiz recreated under the same ID gets a fresh ETag
+SELECT_RETIRED_VERSION = "SELECT version FROM retired_quizzes WHERE id = ?"
+RETIRE_QUIZ = """INSERT OR REPLACE INTO retired_quizzes (id, version)
+    SELECT id, coalesce(json_extract(data, '$.version'), 1) FROM quizzes WHERE id = ?"""
+RETIRE_QUIZZES_BY_FILE = """INSERT OR REPLACE INTO retired_quizzes (id, version)
+    SELECT id, coalesce(json_extract(data, '$.version'), 1) FROM quizzes WHERE source_file_id = ?"""
+UNRETIRE_QUIZ = "DELETE FROM retired_quizzes WHERE id = ?"
+# One row per question reference of the selected quizzes
+SELECT_QUESTION_REFS = """SELECT ref.value FROM quizzes, json_each(quizzes.data, '$.questions') AS ref
+    WHERE quizzes.id = ?"""
+SELECT_QUESTION_REFS_BY_FILE = """SELECT ref.value FROM quizzes, json_each(quizzes.data, '$.questions') AS ref
+    WHERE quizzes.source_file_id = ?"""
+ADD_QUESTION_REFS = """INSERT INTO questions (hash, data, refs) VALUES (?, ?, ?)
+    ON CONFLICT (hash) DO UPDATE SET refs = refs + excluded.refs"""
+CHANGE_QUESTION_REFS = "UPDATE questions SET refs = refs + ? WHERE hash = ?"
+DROP_UNUSED_QUESTIONS = "DELETE FROM questions WHERE refs <= 0"
+
+# Bytes copied per step when streaming a file into a blob
+BLOB_CHUNK_SIZE = 1024 * 1024
+
+def _dump_offsets(offsets: Optional[List[int]]) -> Optional[str]:
+    return json.dumps(offsets) if offsets is not None else None
+
+def _load_offsets(value: Optional[str]) -> Optional[List[int]]:
+    return json.loads(value) if value else None
+
+def _timestamp(value: datetime) -> str:
+    """Fixed-width ISO timestamp so text ordering matches time ordering"""
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+def _page_query(select: str, filters: List[str], params: list, time_column: str,
+                id_column: str, limit: Optional[int], cursor: Optional[str]) -> tuple:
+    """Keyset-paginated listing, newest first, that walks the (time, id) index"""
+    filters = list(filters)
+    if cursor:
+        timestamp, item_id = decode_cursor(cursor)
+        filters.append(f"({time_column}, {id_column}) < (?, ?)")
+        params = params + [_timestamp(timestamp), item_id]
+    sql = select
+    if filters:
+        sql += " WHERE " + " AND ".join(filters)
+    sql += f" ORDER BY {time_column} DESC, {id_column} DESC LIMIT ?"
+    return sql, params + [-1 if limit is None else limit]
+
+class SQLiteDatabase:
+    """SQLite implementation of the storage interface.
+
+    Each worker thread gets its own connection (WAL lets readers run while a
+    write is in progress); writes are serialized by a lock. Every method
+    blocks, so async callers must go through app.database.run_db.
+    """
+
+    blocking_io = True
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        conn = self._connection()
+        # SQLITE_MAX_LENGTH caps a single blob (1,000,000,000 bytes unless compiled otherwise)
+        self.max_file_size = conn.getlimit(sqlite3.SQLITE_LIMIT_LENGTH)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        self._add_summary_column(conn)
+        self._add_page_offsets_column(conn)
+        self._add_file_version_column(conn)
+        self._share_questions(conn)
+        conn.commit()
+
+    def _add_summary_column(self, conn: sqlite3.Connection) -> None:
+        """Upgrade databases created before quiz summaries were stored"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(quizzes)")]
+        if "summary" in columns:
+            return
+        conn.execute("ALTER TABLE quizzes ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+        rows = conn.execute("SELECT id, data FROM quizzes").fetchall()
+        conn.executemany("UPDATE quizzes SET summary = ? WHERE id = ?", [
+            (QuizSummary.from_quiz(Quiz.model_validate_json(data)).model_dump_json(), quiz_id)
+            for quiz_id, data in rows
+        ])
+
+    def _add_page_offsets_column(self, conn: sqlite3.Connection) -> None:
+        """Upgrade databases created before PDF page offsets were stored"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(extracted_texts)")]
+        if "page_offsets" not in columns:
+            conn.execute("ALTER TABLE extracted_texts ADD COLUMN page_offsets TEXT")
+
+    def _add_file_version_column(self, conn: sqlite3.Connection) -> None:
+        """Upgrade databases created before file versions were tracked"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+        if "version" not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _share_questions(self, conn: sqlite3.Connection) -> None:
+        """Upgrade databases whose quizzes embed their questions"""
+        rows = conn.execute(
+            "SELECT data FROM quizzes WHERE json_type(data, '$.questions[0]') = 'object'"
+        ).fetchall()
+        for (data,) in rows:
+            self._write_quiz(conn, Quiz.model_validate_json(data))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=256,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write(self, statements) -> None:
+        """Run (sql, params) pairs in one transaction"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                for sql, params in statements:
+                    conn.execute(sql, params)
+
+    def store_file(self, file_id: str, filename: str, file_type: str,
+                   file_size: int, content: bytes) -> FileInfo:
+        """Store uploaded file information and content"""
+        file_info = FileInfo(
+            file_id=file_id,
+            filename=filename,
+            file_type=file_type,
+            file_size=file_size,
+            upload_time=datetime.now(),
+            text_extracted=False
+        )
+        self._write([
+            (BUMP_FILES_VERSION, ()),
+            (INSERT_FILE, (file_id, filename, file_info.file_type.value, file_size,
+                           _timestamp(file_info.upload_time))),
+            (INSERT_CONTENT, (file_id, sqlite3.Binary(content))),
+        ])
+        return file_info
+
+    def store_file_from_path(self, file_id: str, filename: str, file_type: str,
+                             file_size: int, path: str) -> FileInfo:
+        """Store an upload assembled on disk, streaming it into the blob a chunk
+        at a time; the file is removed once stored"""
+        file_info = FileInfo(
+            file_id=file_id,
+            filename=filename,
+            file_type=file_type,
+            file_size=file_size,
+            upload_time=datetime.now(),
+            text_extracted=False
+        )
+        size = os.path.getsize(path)
+        if size > self.max_file_size:
+            raise ValueError(f"SQLite stores files of at most {self.max_file_size} bytes")
+        conn = self._connection()
+        with self._write_lock:
+            with conn, open(path, "rb") as f:
+                conn.execute(BUMP_FILES_VERSION)
+                conn.execute(INSERT_FILE, (file_id, filename, file_info.file_type.value, file_size,
+                                           _timestamp(file_info.upload_time)))
+                rowid = conn.execute(INSERT_EMPTY_CONTENT, (file_id, size)).fetchone()[0]
+                with conn.blobopen("file_contents", "content", rowid) as blob:
+                    while chunk := f.read(BLOB_CHUNK_SIZE):
+                        blob.write(chunk)
+        os.remove(path)
+        return file_info
+
+    def get_file_info(self, file_id: str) -> Optional[FileInfo]:
+        """Get file information by ID"""
+        row = self._connection().execute(SELECT_FILE, (file_id,)).fetchone()
+        return self._file_from_row(row) if row else None
+
+    def get_files_version(self) -> str:
+        """Changes whenever a file is stored, processed or deleted"""
+        return str(self._connection().execute(SELECT_FILES_VERSION).fetchone()[0])
+
+    def get_file_version(self, file_id: str) -> Optional[str]:
+        """Changes whenever the file's information does; None for a missing file"""
+        row = self._connection().execute(SELECT_FILE_VERSION, (file_id,)).fetchone()
+        return str(row[0]) if row else None
+
+    def get_file_content(self, file_id: str) -> Optional[bytes]:
+        """Get file content by ID"""
+        row = self._connection().execute(SELECT_CONTENT, (file_id,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def list_files(self, limit: Optional[int] = None,
+                   cursor: Optional[str] = None) -> List[FileInfo]:
+        """List uploaded files, newest first"""
+        sql, params = _page_query(SELECT_FILES, [], [], "upload_time", "file_id", limit, cursor)
+        rows = self._connection().execute(sql, params).fetchall()
+        return [self._file_from_row(row) for row in rows]
+
+    def delete_file(self, file_id: str) -> bool:
+        """Delete file information, content and extracted text"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                deleted = conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,)).rowcount
+                if deleted:
+                    conn.execute(BUMP_FILES_VERSION)
+                conn.execute("DELETE FROM file_contents WHERE file_id = ?", (file_id,))
+                conn.execute("DELETE FROM extracted_texts WHERE file_id = ?", (file_id,))
+        return deleted > 0
+
+    def store_extracted_text(self, result: TextExtractionResult) -> None:
+        """Store extracted text result"""
+        self._write([
+            (INSERT_TEXT, (result.file_id, result.text_content, result.word_count,
+                           result.extraction_time, _dump_offsets(result.page_offsets))),
+            (BUMP_FILES_VERSION, ()),
+            (MARK_EXTRACTED, (result.word_count, result.file_id)),
+        ])
+
+    def get_extracted_text(self, file_id: str) -> Optional[TextExtractionResult]:
+        """Get extracted text by file ID"""
+        row = self._connection().execute(SELECT_TEXT, (file_id,)).fetchone()
+        if not row:
+            return None
+        return TextExtractionResult(
+            file_id=row[0], text_content=row[1], word_count=row[2], extraction_time=row[3],
+            page_offsets=_load_offsets(row[4])
+        )
+
+    def get_text_slice(self, file_id: str, start: int = 0, end: Optional[int] = None,
+                       page: Optional[int] = None) -> Optional[TextSlice]:
+        """Get a character range or PDF page of the extracted text, sliced in SQL"""
+        conn = self._connection()
+        row = conn.execute(SELECT_TEXT_INFO, (file_id,)).fetchone()
+        if not row:
+            return None
+        total_chars, word_count, page_offsets = row[0], row[1], _load_offsets(row[2])
+        start, end = text_range(total_chars, page_offsets, start, end, page)
+        text = conn.execute(SELECT_TEXT_RANGE, (start + 1, end - start, file_id)).fetchone()[0]
+        return TextSlice(
+            file_id=file_id, start=start, end=end, total_chars=total_chars,
+            word_count=word_count, page=page,
+            page_count=len(page_offsets) if page_offsets else None, text=text,
+        )
+
+    def store_quiz(self, quiz: Quiz) -> Quiz:
+        """Store quiz in database"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                return self._put_quiz(conn, quiz)
+
+    def store_quizzes(self, quizzes: List[Quiz]) -> int:
+        """Store several quizzes in a single transaction"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                for quiz in quizzes:
+                    self._put_quiz(conn, quiz)
+        return len(quizzes)
+
+    def _put_quiz(self, conn: sqlite3.Connection, quiz: Quiz) -> Quiz:
+        """Write a quiz inside the caller's transaction, bumping its version past any stored one"""
+        row = conn.execute(SELECT_QUIZ, (quiz.id,)).fetchone()
+        current = Quiz.model_validate_json(row[0]) if row else None
+        retired = None if row else conn.execute(SELECT_RETIRED_VERSION, (quiz.id,)).fetchone()
+        quiz = next_version(quiz, current, retired[0] if retired else None)
+        self._write_quiz(conn, quiz)
+        if retired:
+            conn.execute(UNRETIRE_QUIZ, (quiz.id,))
+        return quiz
+
+    def get_quiz(self, quiz_id: str) -> Optional[Quiz]:
+        """Get quiz by ID"""
+        row = self._connection().execute(SELECT_QUIZ, (quiz_id,)).fetchone()
+        return Quiz.model_validate_json(row[0]) if row else None
+
+    def get_quiz_version(self, quiz_id: str) -> Optional[int]:
+        """Get the current version of a quiz"""
+        row = self._connection().execute(SELECT_QUIZ_VERSION, (quiz_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_quiz_json(self, quiz_id: str) -> Optional[bytes]:
+        """Get a quiz as its stored JSON, without parsing it"""
+        row = self._connection().execute(SELECT_QUIZ, (quiz_id,)).fetchone()
+        return row[0].encode() if row else None
+
+    def duplicate_quiz(self, quiz_id: str, new_id: str,
+                       created_at: Optional[datetime] = None) -> Optional[Quiz]:
+        """Copy a quiz under a new ID"""
+        created_at = created_at or datetime.now()
+        params = {
+            "quiz_id": quiz_id, "new_id": new_id, "prefix": DUPLICATE_TITLE_PREFIX,
+            "created_at": _timestamp(created_at), "created_at_json": created_at.isoformat(),
+        }
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                # Only the question hashes are copied; the copy adds a reference to each
+                released = self._question_refs(conn, SELECT_QUESTION_REFS, new_id)
+                if not conn.execute(DUPLICATE_QUIZ, params).rowcount:
+                    return None
+                added = self._question_refs(conn, SELECT_QUESTION_REFS, new_id)
+                self._change_question_refs(conn, [(key, None) for key in added], released)
+                row = conn.execute(SELECT_QUIZ, (new_id,)).fetchone()
+        return Quiz.model_validate_json(row[0])
+
+    def update_quiz(self, quiz_id: str, updates: dict,
+                    expected_version: Optional[int] = None) -> Optional[Quiz]:
+        """Update quiz with new data"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                row = conn.execute(SELECT_QUIZ, (quiz_id,)).fetchone()
+                if not row:
+                    return None
+                quiz = Quiz.model_validate_json(row[0])
+                check_version(quiz, expected_version)
+                quiz_dict = quiz.model_dump()
+                quiz_dict.update(updates)
+                quiz_dict['updated_at'] = datetime.now()
+                quiz_dict['version'] = quiz.version + 1
+                updated_quiz = Quiz(**quiz_dict)
+                self._write_quiz(conn, updated_quiz)
+        return updated_quiz
+
+    def patch_quiz(self, quiz_id: str, operations: List[dict],
+                   expected_version: Optional[int] = None) -> Optional[Quiz]:
+        """Apply JSON-Patch style operations, touching only the affected questions"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                row = conn.execute(SELECT_QUIZ, (quiz_id,)).fetchone()
+                if not row:
+                    return None
+                quiz = Quiz.model_validate_json(row[0])
+                check_version(quiz, expected_version)
+                patched_quiz = apply_quiz_patch(quiz, operations)
+                self._write_quiz(conn, patched_quiz)
+        return patched_quiz
+
+    def list_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                     cursor: Optional[str] = None) -> List[Quiz]:
+        """List quizzes newest first, optionally filtered by file ID"""
+        filters, params = (["source_file_id = ?"], [file_id]) if file_id else ([], [])
+        sql, params = _page_query(SELECT_QUIZZES, filters, params, "created_at", "id", limit, cursor)
+        rows = self._connection().execute(sql, params).fetchall()
+        return [Quiz.model_validate_json(row[0]) for row in rows]
+
+    def list_quiz_summaries(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                            cursor: Optional[str] = None) -> List[QuizSummary]:
+        """List quiz summaries in the same order as list_quizzes"""
+        filters, params = (["source_file_id = ?"], [file_id]) if file_id else ([], [])
+        sql, params = _page_query(SELECT_SUMMARIES, filters, params, "created_at", "id", limit, cursor)
+        rows = self._connection().execute(sql, params).fetchall()
+        return [QuizSummary.model_validate_json(row[0]) for row in rows]
+
+    def export_quizzes(self, file_id: Optional[str] = None, limit: Optional[int] = None,
+                       cursor: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]:
+        """One page of quizzes as stored JSON, in list_quizzes order, and the next page's cursor"""
+        filters, params = (["source_file_id = ?"], [file_id]) if file_id else ([], [])
+        sql, params = _page_query(SELECT_QUIZ_EXPORT, filters, params, "created_at", "id",
+                                  limit + 1 if limit else None, cursor)
+        rows = self._connection().execute(sql, params).fetchall()
+        rows, next_cursor = next_page(rows, limit, lambda row: (datetime.fromisoformat(row[0]), row[1]))
+        return [row[2].encode() for row in rows], next_cursor
+
+    def delete_quiz(self, quiz_id: str) -> bool:
+        """Delete quiz by ID"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                conn.execute(RETIRE_QUIZ, (quiz_id,))
+                released = self._question_refs(conn, SELECT_QUESTION_REFS, quiz_id)
+                deleted = conn.execute(DELETE_QUIZ, (quiz_id,)).rowcount
+                self._change_question_refs(conn, [], released)
+        return deleted > 0
+
+    def delete_quizzes_for_file(self, file_id: str) -> int:
+        """Delete every quiz generated from a file"""
+        conn = self._connection()
+        with self._write_lock:
+            with conn:
+                conn.execute(RETIRE_QUIZZES_BY_FILE, (file_id,))
+                released = self._question_refs(conn, SELECT_QUESTION_REFS_BY_FILE, file_id)
+                deleted = conn.execute(DELETE_QUIZZES_BY_FILE, (file_id,)).rowcount
+                self._change_question_refs(conn, [], released)
+        return deleted
+
+    def close(self) -> None:
+        """Close every thread's connection"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _write_quiz(self, conn: sqlite3.Connection, quiz: Quiz) -> None:
+        """Insert or replace a quiz, storing new questions once and releasing dropped ones"""
+        data, questions = split_questions(quiz)
+        released = self._question_refs(conn, SELECT_QUESTION_REFS, quiz.id)
+        conn.execute(INSERT_QUIZ, (quiz.id, quiz.source_file_id, _timestamp(quiz.created_at), data,
+                                   QuizSummary.from_quiz(quiz).model_dump_json()))
+        self._change_question_refs(conn, questions, released)
+
+    @staticmethod
+    def _question_refs(conn: sqlite3.Connection, select: str, key: str) -> List[str]:
+        return [row[0] for row in conn.execute(select, (key,))]
+
+    @staticmethod
+    def _change_question_refs(conn: sqlite3.Connection, questions: List[Tuple[str, Optional[str]]],
+                              released: List[str]) -> None:
+        for key, body, delta in question_ref_changes(questions, released):
+            if body is not None:
+                conn.execute(ADD_QUESTION_REFS, (key, body, delta))
+            else:
+                conn.execute(CHANGE_QUESTION_REFS, (delta, key))
+        conn.execute(DROP_UNUSED_QUESTIONS)
+
+    @staticmethod
+    def _file_from_row(row) -> FileInfo:
+        return FileInfo(
+            file_id=row[0],
+            filename=row[1],
+            file_type=row[2],
+            file_size=row[3],
+            upload_time=datetime.fromisoformat(row[4]),
+            text_extracted=bool(row[5]),
+            word_count=row[6]
+        )
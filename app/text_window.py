@@ -0,0 +1,84 @@
+"""
+Windowed access to extracted text
+Character ranges, PDF pages and NDJSON streaming over a file's extracted text
+"""
+import bisect
+from typing import Iterator, List, Optional, Tuple
+
+from pydantic_core import to_json
+
+from app.models import TextExtractionResult, TextSlice
+
+# Characters per record when streaming text as NDJSON
+DEFAULT_CHUNK_CHARS = 64 * 1024
+
+class TextRangeError(ValueError):
+    """Raised when a requested page or character range does not exist"""
+    pass
+
+def text_range(total_chars: int, page_offsets: Optional[List[int]], start: int = 0,
+               end: Optional[int] = None, page: Optional[int] = None) -> Tuple[int, int]:
+    """Resolve a character range, or a 1-based PDF page, to [start, end) offsets"""
+    if page is not None:
+        if not page_offsets:
+            raise TextRangeError("Page access is only available for PDF uploads")
+        if not 1 <= page <= len(page_offsets):
+            raise TextRangeError(f"Page {page} out of range (1-{len(page_offsets)})")
+        start = page_offsets[page - 1]
+        end = page_offsets[page] if page < len(page_offsets) else total_chars
+    if start < 0 or (end is not None and end < start):
+        raise TextRangeError(f"Invalid range: {start}-{end}")
+    return min(start, total_chars), min(total_chars if end is None else end, total_chars)
+
+def slice_text(result: TextExtractionResult, start: int = 0, end: Optional[int] = None,
+               page: Optional[int] = None) -> TextSlice:
+    """Cut a window out of an extraction result held in memory"""
+    total = len(result.text_content)
+    start, end = text_range(total, result.page_offsets, start, end, page)
+    return TextSlice(
+        file_id=result.file_id,
+        start=start,
+        end=end,
+        total_chars=total,
+        word_count=result.word_count,
+        page=page,
+        page_count=len(result.page_offsets) if result.page_offsets else None,
+        text=result.text_content[start:end],
+    )
+
+def page_at(page_offsets: Optional[List[int]], offset: int) -> Optional[int]:
+    """1-based page containing a character offset, if the text has pages"""
+    if not page_offsets:
+        return None
+    return max(1, bisect.bisect_right(page_offsets, offset))
+
+def iter_ndjson(result: TextExtractionResult, start: int, end: int,
+                chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[bytes]:
+    """Header line, then one {"offset", "page", "text"} line per chunk of [start, end).
+
+    Chunks never cross a page boundary, so PDF text arrives a page (or less)
+    at a time; only one chunk is encoded at a time.
+    """
+    offsets = result.page_offsets or []
+    yield to_json({
+        "file_id": result.file_id,
+        "start": start,
+        "end": end,
+        "total_chars": len(result.text_content),
+        "word_count": result.word_count,
+        "page_count": len(offsets) or None,
+    }) + b"\n"
+    boundaries = [offset for offset in offsets if start < offset < end]
+    position = start
+    page = page_at(offsets, start)
+    for stop in boundaries + [end]:
+        while position < stop:
+            chunk_end = min(position + chunk_chars, stop)
+            yield to_json({
+                "offset": position,
+                "page": page,
+                "text": result.text_content[position:chunk_end],
+            }) + b"\n"
+            position = chunk_end
+        if page is not None:
+            page += 1
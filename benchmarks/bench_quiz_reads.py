@@ -0,0 +1,82 @@
+"""
+Quiz read benchmark: response_model serialization versus cached JSON bytes
+
+Serves the same quizzes two ways from one FastAPI app: the old path, which
+returns the Quiz model and lets FastAPI validate and encode it, and the
+GET /api/quizzes/{id} path, which returns the storage layer's cached bytes.
+
+Usage:
+    python -m benchmarks.bench_quiz_reads --quizzes 1000 --questions 50 --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.database import InMemoryDatabase
+from app.models import Quiz
+from app.responses import RawJSONResponse
+from benchmarks.bench_storage import make_quizzes
+
+def build_app(db: InMemoryDatabase) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/model/{quiz_id}", response_model=Quiz)
+    async def model_path(quiz_id: str):
+        return db.get_quiz(quiz_id)
+
+    @app.get("/cached/{quiz_id}", response_model=Quiz)
+    async def cached_path(quiz_id: str):
+        return RawJSONResponse(db.get_quiz_json(quiz_id))
+
+    return app
+
+async def measure(app: FastAPI, prefix: str, ids, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm-up fills the cache, so the timed loop measures steady-state reads
+        for quiz_id in ids:
+            (await client.get(f"/{prefix}/{quiz_id}")).raise_for_status()
+        started = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/{prefix}/{ids[i % len(ids)]}")
+        return time.perf_counter() - started
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quizzes", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = InMemoryDatabase()
+    quizzes = make_quizzes(args.quizzes, args.questions, files=10)
+    db.store_quizzes(quizzes)
+    ids = [quiz.id for quiz in quizzes]
+    app = build_app(db)
+    body_kb = len(db.get_quiz_json(ids[0])) / 1024
+
+    print(f"{args.quizzes} quizzes x {args.questions} questions ({body_kb:.1f} KB each), "
+          f"{args.requests} requests through the ASGI stack")
+    baseline = None
+    for label, prefix in (("response_model=Quiz", "model"), ("cached JSON bytes", "cached")):
+        elapsed = asyncio.run(measure(app, prefix, ids, args.requests))
+        baseline = baseline or elapsed
+        print(f"  {label:<22} {args.requests / elapsed:9.0f} req/s  "
+              f"{elapsed / args.requests * 1e6:8.1f} us/req  x{baseline / elapsed:4.1f}")
+
+    started = time.perf_counter()
+    for i in range(args.requests):
+        db.get_quiz(ids[i % len(ids)]).model_dump_json()
+    serialize = time.perf_counter() - started
+    started = time.perf_counter()
+    for i in range(args.requests):
+        db.get_quiz_json(ids[i % len(ids)])
+    cached = time.perf_counter() - started
+    print(f"  serialization only: model_dump_json {serialize / args.requests * 1e6:.1f} us, "
+          f"cache lookup {cached / args.requests * 1e6:.2f} us")
+
+if __name__ == "__main__":
+    main()
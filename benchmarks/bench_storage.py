@@ -0,0 +1,90 @@
+"""
+Storage backend benchmark: in-memory versus SQLite (WAL)
+
+Usage:
+    python -m benchmarks.bench_storage --quizzes 100000 --questions 5
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.database import InMemoryDatabase
+from app.models import Quiz, QuizQuestion, QuestionType
+from app.storage.sqlite import SQLiteDatabase
+
+def make_quizzes(count: int, questions: int, files: int):
+    """Build synthetic quizzes spread over `files` source files"""
+    start = datetime.now()
+    return [
+        Quiz(
+            id=str(uuid.uuid4()),
+            title=f"Quiz {i}",
+            description="Benchmark quiz",
+            source_file_id=f"file-{i % files}",
+            questions=[
+                QuizQuestion(
+                    id=f"q{i}-{j}",
+                    question=f"Question {j} of quiz {i}?",
+                    question_type=QuestionType.MULTIPLE_CHOICE,
+                    options=["A", "B", "C", "D"],
+                    correct_answer="A",
+                    explanation="Because."
+                )
+                for j in range(questions)
+            ],
+            created_at=start + timedelta(microseconds=i),
+        )
+        for i in range(count)
+    ]
+
+def timed(label: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<28} {elapsed * 1000:10.1f} ms")
+    return result
+
+def run(db, name: str, quizzes, lookups: int, files: int) -> None:
+    print(f"\n{name}")
+    batch = 1000
+    timed(f"store {len(quizzes)} (batches of {batch})", lambda: [
+        db.store_quizzes(quizzes[i:i + batch]) for i in range(0, len(quizzes), batch)
+    ])
+    ids = [quizzes[(i * 7919) % len(quizzes)].id for i in range(lookups)]
+    timed(f"get_quiz x{lookups}", lambda: [db.get_quiz(quiz_id) for quiz_id in ids])
+    timed(f"list_quizzes(file) x{min(files, 100)}", lambda: [
+        db.list_quizzes(f"file-{i}") for i in range(min(files, 100))
+    ])
+    timed("list_quizzes() all", db.list_quizzes)
+    timed("list_quizzes(limit=50) x100", lambda: [db.list_quizzes(None, 50) for _ in range(100)])
+    timed("update_quiz x100", lambda: [db.update_quiz(quiz_id, {"title": "Updated"}) for quiz_id in ids[:100]])
+    timed("delete_quiz x100", lambda: [db.delete_quiz(quiz_id) for quiz_id in ids[:100]])
+    timed("delete_quizzes_for_file x10", lambda: [
+        db.delete_quizzes_for_file(f"file-{i}") for i in range(min(files, 10))
+    ])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quizzes", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"Building {args.quizzes} quizzes with {args.questions} questions each...")
+    quizzes = make_quizzes(args.quizzes, args.questions, args.files)
+
+    run(InMemoryDatabase(), "InMemoryDatabase", quizzes, args.lookups, args.files)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        db = SQLiteDatabase(path)
+        run(db, "SQLiteDatabase (WAL)", quizzes, args.lookups, args.files)
+        db.close()
+        print(f"\n  database size: {os.path.getsize(path) / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Multi-worker load test against the shared store
+
+Starts `uvicorn main:app --workers N` with DATABASE_URL=shared://..., seeds
+quizzes through the store, then drives read traffic and reports throughput.
+
+Usage:
+    python -m benchmarks.bench_workers --workers 1 2 4 --duration 10 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from app.models import Quiz, QuizQuestion, QuestionType
+from app.storage.shared import SharedDatabase
+
+def make_quiz(i: int, questions: int) -> Quiz:
+    return Quiz(
+        id=str(uuid.uuid4()),
+        title=f"Quiz {i}",
+        source_file_id=f"file-{i % 20}",
+        questions=[
+            QuizQuestion(
+                id=f"q{i}-{j}",
+                question=f"Question {j} of quiz {i}?",
+                question_type=QuestionType.MULTIPLE_CHOICE,
+                options=["A", "B", "C", "D"],
+                correct_answer="A",
+                explanation="Because."
+            )
+            for j in range(questions)
+        ],
+        created_at=datetime.now(),
+    )
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("server did not become ready")
+            await asyncio.sleep(0.2)
+
+async def drive(base_url: str, quiz_ids, duration: float, concurrency: int) -> dict:
+    """Closed-loop load: `concurrency` clients issuing requests back to back"""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def user():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                if random.random() < 0.8:
+                    path = f"/api/quizzes/{random.choice(quiz_ids)}"
+                else:
+                    path = "/api/quizzes?view=summary&limit=20"
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        "errors": errors,
+    }
+
+def run_workers(workers: int, args, socket_path: str, quiz_ids) -> dict:
+    port = args.port
+    env = {**os.environ, "DATABASE_URL": f"shared://{socket_path}",
+           "SHARED_STORE_AUTOSTART": "false", "LLM_MOCK_MODE": "true"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        asyncio.run(wait_ready(base_url))
+        return asyncio.run(drive(base_url, quiz_ids, args.duration, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--quizzes", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "store.sock")
+        store = subprocess.Popen([sys.executable, "-m", "app.storage.shared", socket_path])
+        try:
+            _wait_for_socket(socket_path)
+            db = SharedDatabase(socket_path, autostart=False)
+            quizzes = [make_quiz(i, args.questions) for i in range(args.quizzes)]
+            for start in range(0, len(quizzes), 500):
+                db.store_quizzes(quizzes[start:start + 500])
+            quiz_ids = [quiz.id for quiz in quizzes]
+
+            print(f"{os.cpu_count()} CPUs, {args.quizzes} quizzes, "
+                  f"{args.concurrency} concurrent clients, {args.duration:.0f}s per run")
+            baseline = None
+            for workers in args.workers:
+                result = run_workers(workers, args, socket_path, quiz_ids)
+                baseline = baseline or result["rps"]
+                print(f"  workers={workers:<3} {result['rps']:9.1f} req/s  "
+                      f"x{result['rps'] / baseline:4.2f}  p50 {result['p50_ms']:6.1f} ms  "
+                      f"p95 {result['p95_ms']:6.1f} ms  errors {result['errors']}")
+        finally:
+            store.terminate()
+            store.wait()
+
+def _wait_for_socket(path: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("store process did not start")
+        time.sleep(0.05)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+End-to-end load test for the upload, generation and read endpoints
+Drives a mix of requests at stepped concurrency (closed loop) or arrival rate
+(open loop) against one server backed by the simulated LLM provider, and
+reports throughput and p50/p95/p99 latency per endpoint
+
+Starts `python -m app.mock_provider` and `uvicorn main:app` pointed at it
+(GEMINI_API_BASE), unless --url targets a running server. Server settings
+such as DATABASE_URL or LLM_MAX_CONCURRENCY are taken from the environment.
+
+Usage:
+    python -m benchmarks.loadtest --concurrency 5 10 20 40 --duration 60 --output results.json
+    python -m benchmarks.loadtest --rate 2 5 10 --mix upload=1,generate=2,read_quiz=6
+    python -m benchmarks.loadtest --concurrency 20 --baseline results.json   # compare to an earlier run
+
+Closed loop: N simulated teachers each issue a request, wait for it, think
+for --think-ms and repeat, so N answers "how many concurrent teachers".
+Open loop: requests arrive as a Poisson process at R/s regardless of how
+fast the server answers; latency is measured from the scheduled arrival, so
+queueing is not hidden by a slowed-down client (coordinated omission).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.bench_workers import wait_ready
+
+ENDPOINTS = {
+    "upload": "POST /api/upload",
+    "generate": "POST /api/generate-quiz",
+    "generate_direct": "POST /api/generate-quiz-direct",
+    "read_quiz": "GET /api/quizzes/{id}",
+    "list_quizzes": "GET /api/quizzes?view=summary",
+    "read_text": "GET /api/files/{id}/text",
+}
+DEFAULT_MIX = "upload=1,generate=1,generate_direct=1,read_quiz=4,list_quizzes=2,read_text=1"
+
+WORDS = ("cell membrane protein energy enzyme reaction gene molecule structure function "
+         "process system pressure force motion wave field current charge market price "
+         "demand supply theory evidence model analysis history period source").split()
+
+def make_document(rng: random.Random, size: int) -> str:
+    """Unique study text of about size characters, so no cache or coalescing answers for free"""
+    sentences = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+class Recorder:
+    """Latencies and status codes per endpoint inside the measured window"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in ENDPOINTS}
+        self.measuring = False
+
+    def record(self, name: str, latency: float, status: str) -> None:
+        if not self.measuring:
+            return
+        self.latencies[name].append(latency)
+        self.statuses[name][status] = self.statuses[name].get(status, 0) + 1
+
+    def summary(self, duration: float) -> Dict[str, dict]:
+        result = {}
+        for name, latencies in self.latencies.items():
+            if not latencies:
+                continue
+            ordered = sorted(latencies)
+            ok = sum(count for status, count in self.statuses[name].items() if status.startswith("2"))
+            result[name] = {
+                "endpoint": ENDPOINTS[name],
+                "requests": len(ordered),
+                "errors": len(ordered) - ok,
+                "status": self.statuses[name],
+                "throughput_rps": round(ok / duration, 3),
+                "latency_ms": {
+                    "mean": round(sum(ordered) / len(ordered) * 1000, 1),
+                    "p50": round(percentile(ordered, 0.50) * 1000, 1),
+                    "p95": round(percentile(ordered, 0.95) * 1000, 1),
+                    "p99": round(percentile(ordered, 0.99) * 1000, 1),
+                    "max": round(ordered[-1] * 1000, 1),
+                },
+            }
+        return result
+
+class Workload:
+    """The request mix, and the file and quiz IDs it builds up while running"""
+
+    def __init__(self, client: httpx.AsyncClient, args, recorder: Recorder):
+        self.client = client
+        self.args = args
+        self.recorder = recorder
+        self.rng = random.Random(args.seed)
+        self.mix = parse_mix(args.mix)
+        self.file_ids: List[str] = []
+        self.quiz_ids: List[str] = []
+        self.operations: Dict[str, Callable[[], Awaitable[httpx.Response]]] = {
+            "upload": self.upload,
+            "generate": self.generate,
+            "generate_direct": self.generate_direct,
+            "read_quiz": lambda: self.client.get(f"/api/quizzes/{self.rng.choice(self.quiz_ids)}"),
+            "list_quizzes": lambda: self.client.get("/api/quizzes", params={"view": "summary", "limit": 20}),
+            "read_text": lambda: self.client.get(f"/api/files/{self.rng.choice(self.file_ids)}/text",
+                                                 params={"offset": 0, "length": 2000}),
+        }
+
+    def _document(self) -> str:
+        return make_document(self.rng, self.args.doc_kb * 1024)
+
+    async def upload(self) -> httpx.Response:
+        name = f"notes-{self.rng.getrandbits(32):08x}.txt"
+        response = await self.client.post("/api/upload", files={"file": (name, self._document().encode(), "text/plain")})
+        if response.status_code == 200:
+            self.file_ids.append(response.json()["file_id"])
+        return response
+
+    async def generate(self) -> httpx.Response:
+        response = await self.client.post("/api/generate-quiz", json={
+            "file_id": self.rng.choice(self.file_ids),
+            "num_questions": self.args.num_questions,
+            "use_question_bank": self.args.question_bank,
+        })
+        if response.status_code == 200:
+            self.quiz_ids.append(response.json()["quiz_id"])
+        return response
+
+    async def generate_direct(self) -> httpx.Response:
+        return await self.client.post("/api/generate-quiz-direct", json={
+            "text_content": self._document(), "num_questions": self.args.num_questions
+        })
+
+    def choose(self) -> str:
+        names = list(self.mix)
+        return self.rng.choices(names, weights=[self.mix[name] for name in names])[0]
+
+    async def call(self, name: str, started: Optional[float] = None) -> None:
+        """Run one operation; latency counts from started (the scheduled arrival) if given"""
+        started = time.perf_counter() if started is None else started
+        try:
+            response = await self.operations[name]()
+            status = str(response.status_code)
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.TransportError as e:
+            status = type(e).__name__
+        self.recorder.record(name, time.perf_counter() - started, status)
+
+    async def prepare(self) -> None:
+        """Upload --seed-files documents and generate a quiz from each, so every operation has targets"""
+        await asyncio.gather(*(self.upload() for _ in range(self.args.seed_files)))
+        if not self.file_ids:
+            raise RuntimeError("seed uploads failed")
+        for response in await asyncio.gather(*(self.client.post("/api/generate-quiz", json={
+                    "file_id": file_id, "num_questions": self.args.num_questions,
+                    "use_question_bank": False,
+                }) for file_id in list(self.file_ids))):
+            if response.status_code == 200:
+                self.quiz_ids.append(response.json()["quiz_id"])
+        if not self.quiz_ids:
+            raise RuntimeError(f"seed generation failed: {response.status_code} {response.text[:200]}")
+
+async def closed_loop(workload: Workload, users: int, deadline: float, think: float) -> None:
+    async def teacher():
+        while time.perf_counter() < deadline:
+            await workload.call(workload.choose())
+            if think:
+                await asyncio.sleep(workload.rng.expovariate(1 / think))
+
+    await asyncio.gather(*(teacher() for _ in range(users)))
+
+async def open_loop(workload: Workload, rate: float, deadline: float, max_in_flight: int) -> int:
+    """Poisson arrivals at rate/s; returns arrivals dropped because max_in_flight were outstanding"""
+    in_flight = set()
+    dropped = 0
+    arrival = time.perf_counter()
+    while True:
+        arrival += workload.rng.expovariate(rate)
+        if arrival >= deadline:
+            break
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        if len(in_flight) >= max_in_flight:
+            dropped += 1
+            continue
+        task = asyncio.ensure_future(workload.call(workload.choose(), started=arrival))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return dropped
+
+async def run_step(base_url: str, args, level: float) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        workload = Workload(client, args, recorder)
+        await workload.prepare()
+
+        # Warm-up requests run the same way but are not recorded
+        started = time.perf_counter()
+        warmup_end = started + args.warmup
+
+        async def start_measuring():
+            await asyncio.sleep(args.warmup)
+            recorder.measuring = True
+
+        measuring = asyncio.ensure_future(start_measuring())
+        deadline = warmup_end + args.duration
+        dropped = 0
+        if args.rate:
+            dropped = await open_loop(workload, level, deadline, args.max_in_flight)
+        else:
+            await closed_loop(workload, int(level), deadline, args.think_ms / 1000)
+        await measuring
+        # In-flight requests finishing after the deadline still count, over the time they took
+        elapsed = max(args.duration, time.perf_counter() - warmup_end)
+
+        mock_stats = server_metrics = None
+        if args.mock_url:
+            try:
+                async with httpx.AsyncClient(base_url=args.mock_url) as mock:
+                    mock_stats = (await mock.get("/mock/stats")).json()["stats"]
+            except httpx.HTTPError:
+                pass
+        response = await client.get("/api/admin/metrics")
+        if response.status_code == 200:
+            server_metrics = response.json()
+
+    endpoints = recorder.summary(elapsed)
+    completed = sum(e["requests"] - e["errors"] for e in endpoints.values())
+    return {
+        "mode": "open" if args.rate else "closed",
+        "rate" if args.rate else "concurrency": level,
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(completed / elapsed, 3),
+        "dropped_arrivals": dropped,
+        "endpoints": endpoints,
+        "mock_llm": mock_stats,
+        "server_metrics": server_metrics,
+    }
+
+def start_servers(args) -> List[subprocess.Popen]:
+    """Mock provider and application server, the latter pointed at the former"""
+    mock = subprocess.Popen([
+        sys.executable, "-m", "app.mock_provider", "--port", str(args.mock_port),
+        "--seed", str(args.seed), "--latency-ms", str(args.llm_latency_ms),
+        "--tokens-per-second", str(args.llm_tokens_per_second),
+        "--rate-limit-rate", str(args.llm_rate_limit_rate),
+        "--server-error-rate", str(args.llm_server_error_rate),
+        "--malformed-rate", str(args.llm_malformed_rate),
+    ])
+    env = {**os.environ, "LLM_MOCK_MODE": "false", "USE_GEMINI": "true",
+           "GEMINI_API_KEY": "loadtest", "GEMINI_API_BASE": f"{args.mock_url}/v1beta"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    return [server, mock]
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_step(step: dict, baseline: Optional[dict]) -> None:
+    level = step.get("concurrency", step.get("rate"))
+    unit = "teachers" if step["mode"] == "closed" else "req/s offered"
+    print(f"\n{level:g} {unit}: {step['throughput_rps']:.2f} req/s"
+          + (f", {step['dropped_arrivals']} arrivals dropped" if step["dropped_arrivals"] else ""))
+    print(f"  {'endpoint':<34}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in step["endpoints"].items():
+        latency = result["latency_ms"]
+        line = (f"  {result['endpoint']:<34}{result['throughput_rps']:>8.2f}{latency['p50']:>10.1f}"
+                f"{latency['p95']:>10.1f}{latency['p99']:>10.1f}{result['errors']:>8}")
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous:
+            line += (f"   vs baseline: req/s {_change(result['throughput_rps'], previous['throughput_rps'])}, "
+                     f"p95 {_change(latency['p95'], previous['latency_ms']['p95'])}, "
+                     f"p99 {_change(latency['p99'], previous['latency_ms']['p99'])}")
+        print(line)
+
+def _change(current: float, previous: float) -> str:
+    return f"{(current - previous) / previous * 100:+.0f}%" if previous else "n/a"
+
+def _baseline_step(baseline: Optional[dict], step: dict) -> Optional[dict]:
+    """The earlier run's step at the same mode and level"""
+    for previous in (baseline or {}).get("steps", []):
+        if previous["mode"] == step["mode"] and \
+                previous.get("concurrency", previous.get("rate")) == step.get("concurrency", step.get("rate")):
+            return previous
+    return None
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, nargs="+", default=[5, 10, 20],
+                      help="Closed loop: simulated teachers per step")
+    load.add_argument("--rate", type=float, nargs="+", help="Open loop: arrivals per second per step")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unrecorded seconds before each step")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted endpoints: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="Closed loop: mean pause between requests")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open loop: outstanding request cap")
+    parser.add_argument("--num-questions", type=int, default=5)
+    parser.add_argument("--doc-kb", type=int, default=8, help="Size of generated documents")
+    parser.add_argument("--question-bank", action="store_true", help="Let /generate-quiz reuse banked questions")
+    parser.add_argument("--seed-files", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="Seeds the request mix, documents and mock LLM")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (>1 needs a shared DATABASE_URL)")
+    parser.add_argument("--mock-port", type=int, default=8767)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--llm-server-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--output", "-o", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    processes = []
+    args.mock_url = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        base_url = f"http://127.0.0.1:{args.port}"
+        args.mock_url = f"http://127.0.0.1:{args.mock_port}"
+        processes = start_servers(args)
+    try:
+        asyncio.run(wait_ready(base_url))
+        levels = args.rate or args.concurrency
+        print(f"{os.cpu_count()} CPUs, {len(levels)} steps of {args.duration:.0f}s "
+              f"(+{args.warmup:.0f}s warm-up), mix {args.mix}")
+        steps = []
+        for level in levels:
+            step = asyncio.run(run_step(base_url, args, level))
+            print_step(step, _baseline_step(baseline, step))
+            steps.append(step)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "version": git_revision(),
+                "timestamp": datetime.now().isoformat(),
+                "host": {"cpus": os.cpu_count(), "python": platform.python_version(),
+                         "platform": platform.platform()},
+                "config": {name: value for name, value in vars(args).items()
+                           if name not in ("output", "baseline")},
+                "steps": steps,
+            }, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
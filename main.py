@@ -3,14 +3,17 @@ FastAPI main application entry point for Quiz Generator
 """
 import os
 import socket
-from fastapi import FastAPI, HTTPException
+import tracemalloc
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 import uvicorn
 
-from app.routers import upload, quiz
-from app.database import init_db
+from app.routers import upload, quiz, admin
+from app.compression import FlushingGZipMiddleware
+from app.database import init_db, close_db, get_database, NEXT_CURSOR_HEADER
+from app.disconnect import run_until_disconnected, ClientDisconnected, CLIENT_CLOSED_REQUEST
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -26,11 +29,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+)
+
+# Compress responses for clients that send Accept-Encoding: gzip (extracted
+# text, quiz lists); small bodies are not worth the CPU. Streamed NDJSON is
+# flushed per chunk so each line still arrives as soon as it is produced
+app.add_middleware(
+    FlushingGZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", 1024)),
+    compresslevel=int(os.getenv("GZIP_LEVEL", 6)),
 )
 
 # Include API routers
 app.include_router(upload.router, prefix="/api", tags=["upload"])
 app.include_router(quiz.router, prefix="/api", tags=["quiz"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
 
 # Serve static files from the built frontend if available
 if os.path.exists("dist"):
@@ -122,7 +136,7 @@ async def llm_status():
             "status": "ready",
             "message": "Running in mock mode - generates sample questions",
             "provider": "mock",
-            "model": "Mock Generator"
+            "model": "Simulated Gemini" if client.mock_provider == "simulated" else "Mock Generator"
         }
     
     # Check Gemini service
@@ -176,11 +190,12 @@ class DirectQuizRequest(BaseModel):
     ai_service: str = "auto"  # auto or gemini
 
 @app.post("/api/generate-quiz-direct")
-async def generate_quiz_direct(request: DirectQuizRequest):
+async def generate_quiz_direct(request: DirectQuizRequest, http_request: Request):
     """Generate quiz directly from text content (for client-side storage)"""
     try:
         from app.quiz_generator import get_quiz_generator
         from app.models import QuestionType
+        from app.scheduler import Priority, scheduling_context, request_tenant
         
         # Convert string question types to enum
         question_type_map = {
@@ -200,13 +215,14 @@ async def generate_quiz_direct(request: DirectQuizRequest):
             ai_client = quiz_generator.llm_client
         
         # Generate questions using selected AI service
-        questions = await ai_client.generate_quiz(
-            text_content=request.text_content,
-            num_questions=request.num_questions,
-            question_types=question_types,
-            difficulty_level=request.difficulty_level,
-            language=request.language
-        )
+        with scheduling_context(Priority.INTERACTIVE, request_tenant(http_request)):
+            questions = await run_until_disconnected(http_request, ai_client.generate_quiz(
+                text_content=request.text_content,
+                num_questions=request.num_questions,
+                question_types=question_types,
+                difficulty_level=request.difficulty_level,
+                language=request.language
+            ))
         
         # Create a quiz structure that matches frontend expectations
         import uuid
@@ -228,13 +244,22 @@ async def generate_quiz_direct(request: DirectQuizRequest):
         
         return {"quiz": quiz}
         
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Quiz generation failed: {str(e)}")
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup"""
-    init_db()
+    await init_db()
+    if os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true":
+        tracemalloc.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release storage resources on shutdown"""
+    await close_db()
 
 if __name__ == "__main__":
     def find_available_port(start_port: int) -> int:
@@ -89,7 +89,8 @@ const QuizEditor: React.FC<QuizEditorProps> = ({ quiz, onSave, onCancel }) => {
     const updates = {
       title,
       description,
-      questions
+      questions,
+      version: quiz.version
     };
     onSave(updates);
   };
@@ -4,7 +4,13 @@ import {
   Quiz, 
   QuizGenerationRequest, 
   QuizGenerationResponse,
-  QuizUpdateRequest 
+  QuizUpdateRequest,
+  QuestionUpdateRequest,
+  TextSlice,
+  TextWindowParams,
+  BatchUploadStatus,
+  UploadResponse,
+  UploadSession
 } from '../types';
 
 const API_BASE_URL = 'http://localhost:8000/api';
@@ -59,6 +65,54 @@ export const apiService = {
     return response.data;
   },
 
+  async uploadBatch(files: File[]): Promise<BatchUploadStatus> {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    
+    const response = await apiClient.post<BatchUploadStatus>('/upload/batch', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    
+    return response.data;
+  },
+
+  // Resumable upload: only parts the server has not acknowledged are sent,
+  // so calling this again with the same uploadId resumes an interrupted upload
+  async uploadResumable(
+    file: File,
+    onProgress?: (sentBytes: number) => void,
+    uploadId?: string
+  ): Promise<UploadResponse> {
+    const session = uploadId
+      ? (await apiClient.get<UploadSession>(`/uploads/${uploadId}`)).data
+      : (await apiClient.post<UploadSession>('/uploads', {
+          filename: file.name,
+          file_size: file.size,
+        })).data;
+    const received = new Set(session.parts.map((part) => part.part_number));
+    let sent = session.parts.reduce((total, part) => total + part.size, 0);
+    
+    for (let n = 1; n <= session.part_count; n++) {
+      if (received.has(n)) continue;
+      const part = file.slice((n - 1) * session.part_size, n * session.part_size);
+      await apiClient.put(`/uploads/${session.upload_id}/parts/${n}`, part, {
+        headers: { 'Content-Type': 'application/octet-stream' },
+      });
+      sent += part.size;
+      onProgress?.(sent);
+    }
+    
+    const response = await apiClient.post<UploadResponse>(`/uploads/${session.upload_id}/complete`);
+    return response.data;
+  },
+
+  async getBatchStatus(batchId: string): Promise<BatchUploadStatus> {
+    const response = await apiClient.get<BatchUploadStatus>(`/upload/batch/${batchId}`);
+    return response.data;
+  },
+
   async getFiles(): Promise<FileInfo[]> {
     const response = await apiClient.get('/files');
     return response.data;
@@ -74,6 +128,11 @@ export const apiService = {
     return response.data;
   },
 
+  async getTextWindow(fileId: string, params: TextWindowParams): Promise<TextSlice> {
+    const response = await apiClient.get<TextSlice>(`/files/${fileId}/text`, { params });
+    return response.data;
+  },
+
   async deleteFile(fileId: string): Promise<void> {
     await apiClient.delete(`/files/${fileId}`);
   },
@@ -105,6 +164,11 @@ export const apiService = {
     return response.data;
   },
 
+  async updateQuestion(quizId: string, questionId: string, updates: QuestionUpdateRequest): Promise<Quiz> {
+    const response = await apiClient.patch(`/quizzes/${quizId}/questions/${questionId}`, updates);
+    return response.data;
+  },
+
   async deleteQuiz(quizId: string): Promise<void> {
     await apiClient.delete(`/quizzes/${quizId}`);
   },
@@ -46,6 +46,7 @@ export interface Quiz {
   created_at: string;
   updated_at?: string;
   metadata?: Record<string, any>;
+  version?: number;
 }
 
 export interface QuizGenerationRequest {
@@ -67,6 +68,11 @@ export interface QuizUpdateRequest {
   title?: string;
   description?: string;
   questions?: QuizQuestion[];
+  version?: number;
+}
+
+export interface QuestionUpdateRequest extends Partial<Omit<QuizQuestion, 'id'>> {
+  version?: number;
 }
 
 export interface UploadResponse {
@@ -76,6 +82,41 @@ export interface UploadResponse {
   file_size: number;
   status: ProcessingStatus;
   message: string;
+  digest?: string | null;
+}
+
+export interface UploadPart {
+  part_number: number;
+  size: number;
+  sha256: string;
+}
+
+export interface UploadSession {
+  upload_id: string;
+  filename: string;
+  file_size: number;
+  part_size: number;
+  part_count: number;
+  created_at: string;
+  expires_at: string;
+  parts: UploadPart[];
+}
+
+export interface BatchFileResult {
+  filename: string;
+  file_id?: string | null;
+  status: ProcessingStatus;
+  message?: string | null;
+  word_count?: number | null;
+}
+
+export interface BatchUploadStatus {
+  batch_id: string;
+  status: ProcessingStatus;
+  total: number;
+  completed: number;
+  failed: number;
+  files: BatchFileResult[];
 }
 
 export interface ErrorResponse {
@@ -89,6 +130,24 @@ export interface TextExtractionResult {
   text_content: string;
   word_count: number;
   extraction_time: number;
+  page_offsets?: number[] | null;
+}
+
+export interface TextSlice {
+  file_id: string;
+  start: number;
+  end: number;
+  total_chars: number;
+  word_count: number;
+  page?: number | null;
+  page_count?: number | null;
+  text: string;
+}
+
+export interface TextWindowParams {
+  offset?: number;
+  length?: number;
+  page?: number;
 }
 
 export interface ApiError {
@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.models import Quiz, QuizQuestion, QuestionType
+
+
+@pytest.fixture
+def make_quiz():
+    """Build a quiz; by default one true/false question, a fresh ID and the current time"""
+    def make(file_id="f1", created_at=None, *, quiz_id=None, title="Sample",
+             questions=None, question_text="Is water wet?", question_count=1, **fields):
+        if questions is None:
+            questions = [
+                QuizQuestion(id=f"q{i + 1}", question=question_text,
+                             question_type=QuestionType.TRUE_FALSE, correct_answer="True")
+                for i in range(question_count)
+            ]
+        return Quiz(
+            id=quiz_id or str(uuid.uuid4()),
+            title=title,
+            source_file_id=file_id,
+            questions=questions,
+            created_at=created_at or datetime.now(),
+            **fields,
+        )
+    return make
+
+
+@pytest.fixture
+def open_stream():
+    """Call an ASGI app directly and hand back its messages as they are sent.
+
+    TestClient and httpx's ASGITransport only return once the whole body is
+    in, so they cannot show whether a streamed response arrives incrementally.
+    """
+    async def start(app, method, path, *, query=b"", headers=(), body=b""):
+        messages = asyncio.Queue()
+        finished = asyncio.Event()
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if pending:
+                return pending.pop()
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            await messages.put(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "root_path": "", "query_string": query,
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+            "client": ("testclient", 50000), "server": ("testserver", 80),
+        }
+        return messages, asyncio.create_task(app(scope, receive, send))
+    return start
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import zlib
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import InMemoryDatabase
+from app.gemini_client import GeminiClient
+from app.mock_provider import MockProvider, MockProviderConfig
+from app.models import (
+    BatchQuizGenerationItem, QuizGenerationRequest, QuizQuestion, QuestionType, ProcessingStatus
+)
+from app.quiz_generator import QuizGeneratorService
+from app.scheduler import Priority, current_priority, scheduling_context
+from app.single_flight import SingleFlight
+from main import app
+
+
+@pytest.mark.asyncio
+async def test_single_flight_runs_identical_calls_once():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(flight.run("k", call) for _ in range(3))) == [1, 1, 1]
+    assert await flight.run("k", call) == 2
+    assert flight.in_flight() == 0
+
+    # A cancelled caller does not cancel the call for the others
+    first = asyncio.ensure_future(flight.run("k", call))
+    second = asyncio.ensure_future(flight.run("k", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 3
+
+
+@pytest.mark.asyncio
+async def test_requests_for_the_same_chunk_share_one_provider_call(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    mock = MockProvider(MockProviderConfig(latency_ms=50, latency_sigma=0, tokens_per_second=0))
+
+    def client_for_request():
+        # A client is created per request, so coalescing has to work across instances
+        client = GeminiClient()
+        client.transport = httpx.ASGITransport(app=mock.app)
+        return client
+
+    text = "Enzymes lower the activation energy of reactions. " * 20
+    first, second = await asyncio.gather(
+        client_for_request().generate_quiz(text, 3, [QuestionType.TRUE_FALSE]),
+        client_for_request().generate_quiz(text, 3, [QuestionType.TRUE_FALSE]),
+    )
+    assert mock.stats["requests"] == 1
+    assert [q.question for q in first] == [q.question for q in second]
+
+
+class FakeLLM:
+    def __init__(self):
+        self.priorities = []
+
+    async def generate_quiz(self, text_content, num_questions, **kwargs):
+        self.priorities.append(current_priority.get())
+        await asyncio.sleep(0.01)
+        return [QuizQuestion(id=f"q{i}", question=f"{text_content[:10]} {i}?",
+                             question_type=QuestionType.TRUE_FALSE, correct_answer="True")
+                for i in range(num_questions)]
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_results_and_shares_extraction():
+    db = InMemoryDatabase()
+    for file_id in ("f1", "f2"):
+        content = f"Notes for {file_id}: cells divide by mitosis.".encode()
+        db.store_file(file_id, f"{file_id}.txt", "txt", len(content), content)
+    service = QuizGeneratorService()
+    service.db = db
+    service.llm_client = FakeLLM()
+    extractions = []
+    extract = service._extract_text
+
+    async def counting_extract(file_id):
+        extractions.append(file_id)
+        await asyncio.sleep(0.01)
+        return await extract(file_id)
+
+    service._extract_text = counting_extract
+    requests = [QuizGenerationRequest(file_id=file_id, num_questions=2, use_question_bank=False)
+                for file_id in ("f1", "f1", "missing", "f2")]
+
+    with scheduling_context(Priority.BATCH):
+        items = [item async for item in service.generate_quiz_batch(requests)]
+
+    assert sorted(item.index for item in items) == [0, 1, 2, 3]
+    by_index = {item.index: item for item in items}
+    assert by_index[2].status == ProcessingStatus.FAILED and "not found" in by_index[2].error
+    assert all(by_index[i].status == ProcessingStatus.COMPLETED for i in (0, 1, 3))
+    assert db.get_quiz(by_index[3].quiz.id) is not None
+    assert sorted(extractions) == ["f1", "f2", "missing"]
+    assert set(service.llm_client.priorities) == {Priority.BATCH}
+
+
+def test_batch_endpoint_streams_per_item_errors():
+    client = TestClient(app)
+    assert client.post("/api/generate-quiz/batch", json=[]).status_code == 400
+
+    response = client.post("/api/generate-quiz/batch", json=[{"file_id": "missing"}])
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["index"], line["status"]) for line in lines] == [(0, "failed")]
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_sends_each_item_as_it_finishes(monkeypatch, open_stream):
+    release = asyncio.Event()
+
+    class SlowGenerator:
+        async def generate_quiz_batch(self, requests):
+            yield BatchQuizGenerationItem(index=0, file_id="f1", status=ProcessingStatus.FAILED, error="first")
+            await release.wait()
+            yield BatchQuizGenerationItem(index=1, file_id="f2", status=ProcessingStatus.FAILED, error="second")
+
+    monkeypatch.setattr("app.routers.quiz.get_quiz_generator", SlowGenerator)
+    body = json.dumps([{"file_id": "f1"}, {"file_id": "f2"}]).encode()
+    messages, response = await open_stream(
+        app, "POST", "/api/generate-quiz/batch", body=body,
+        headers=[("Content-Type", "application/json"), ("Accept-Encoding", "gzip")],
+    )
+    start = await asyncio.wait_for(messages.get(), 5)
+    assert start["status"] == 200
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = await asyncio.wait_for(messages.get(), 5)
+    assert json.loads(decoder.decompress(first["body"]))["error"] == "first"
+    assert not response.done()
+
+    release.set()
+    rest = b""
+    while True:
+        message = await asyncio.wait_for(messages.get(), 5)
+        rest += decoder.decompress(message["body"])
+        if not message.get("more_body", False):
+            break
+    await response
+    assert [json.loads(line)["index"] for line in rest.splitlines()] == [1]
@@ -0,0 +1,90 @@
+import asyncio
+import io
+import time
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.batch_upload import BatchTracker, ExtractionPool, iter_archive
+from app.models import BatchFileResult, ProcessingStatus
+from main import app
+
+
+def make_zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in entries.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def test_archive_entries_are_read_one_by_one():
+    archive = make_zip({
+        "week1/notes.txt": "cells divide",
+        "week1/": "",
+        "__MACOSX/week1/._notes.txt": "junk",
+        "week2/big.txt": "x" * 100,
+    })
+    entries = list(iter_archive(archive, max_file_size=50))
+    assert entries == [("notes.txt", b"cells divide", None), ("big.txt", None, "File too large.")]
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def extract_text_from_file(self, file_id):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if file_id == "bad":
+            raise ValueError("unreadable")
+        return type("Result", (), {"word_count": 3})()
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrency_and_tracks_the_batch():
+    tracker = BatchTracker()
+    pool = ExtractionPool(concurrency=2, tracker=tracker)
+    generator = FakeGenerator()
+    batch = tracker.create()
+    tracker.add_file(batch, BatchFileResult(filename="x.exe", status=ProcessingStatus.FAILED))
+    for file_id in ["a", "b", "c", "d", "bad"]:
+        tracker.add_file(batch, BatchFileResult(filename=f"{file_id}.txt", file_id=file_id,
+                                                status=ProcessingStatus.PENDING))
+        pool.submit(file_id, generator, batch.batch_id)
+
+    assert batch.status == ProcessingStatus.PROCESSING
+    await pool.join()
+    assert generator.peak == 2
+    assert (batch.status, batch.total, batch.completed, batch.failed) == (ProcessingStatus.COMPLETED, 6, 4, 2)
+    assert batch.files[1].word_count == 3 and batch.files[-1].message == "unreadable"
+    assert pool.status()["queued"] == 0
+
+
+def test_batch_endpoint_accepts_files_and_archives():
+    archive = make_zip({"a.txt": "alpha beta", "b.txt": "gamma"})
+    with TestClient(app) as client:
+        response = client.post("/api/upload/batch", files=[
+            ("files", ("week.zip", archive, "application/zip")),
+            ("files", ("c.txt", b"delta epsilon zeta", "text/plain")),
+            ("files", ("d.exe", b"MZ", "application/octet-stream")),
+        ])
+        assert response.status_code == 202
+        batch = response.json()
+        assert [item["filename"] for item in batch["files"]] == ["a.txt", "b.txt", "c.txt", "d.exe"]
+
+        for _ in range(100):
+            batch = client.get(f"/api/upload/batch/{batch['batch_id']}").json()
+            if batch["status"] == "completed":
+                break
+            time.sleep(0.05)
+        assert (batch["completed"], batch["failed"]) == (3, 1)
+        assert [item["word_count"] for item in batch["files"]][:3] == [2, 1, 3]
+        for item in batch["files"][:3]:
+            client.delete(f"/api/files/{item['file_id']}")
+        assert client.get("/api/upload/batch/missing").status_code == 404
@@ -0,0 +1,67 @@
+import gc
+import os
+import threading
+
+import pytest
+
+from app.blob_store import BlobStore
+from app.database import InMemoryDatabase, run_db
+from app.models import TextExtractionResult
+
+
+def test_memory_budget_spills_least_recently_used(tmp_path):
+    store = BlobStore(str(tmp_path), memory_budget=10)
+    store.put("a", b"aaaa")
+    store.put("b", b"bbbb")
+    store.get("a")
+    store.put("c", b"cccc")
+
+    stats = store.stats()
+    assert stats["memory_bytes"] <= 10 and stats["disk_blobs"] == 1
+    assert (tmp_path / "b").read_bytes() == b"bbbb"
+    assert [store.get(key) for key in "abc"] == [b"aaaa", b"bbbb", b"cccc"]
+
+    store.put("big", b"x" * 11)
+    assert store.stats()["memory_bytes"] == 8 and store.get("big") == b"x" * 11
+    assert store.delete("big") and not (tmp_path / "big").exists()
+
+
+def test_extraction_demotes_upload_to_disk():
+    db = InMemoryDatabase()
+    db.store_file("f1", "notes.txt", "txt", 5, b"hello")
+    assert db.blobs.stats()["memory_blobs"] == 1
+
+    db.store_extracted_text(TextExtractionResult(file_id="f1", text_content="hello",
+                                                 word_count=1, extraction_time=0.1))
+    assert db.blobs.stats()["memory_bytes"] == 0
+    assert db.get_file_content("f1") == b"hello"
+
+    db.delete_file("f1")
+    assert db.get_file_content("f1") is None
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_blob_io_runs_off_the_event_loop():
+    db = InMemoryDatabase()
+    threads = []
+    put = db.blobs.put
+    db.blobs.put = lambda *args: threads.append(threading.current_thread()) or put(*args)
+
+    await run_db(db.store_file, "f1", "notes.txt", "txt", 5, b"hello")
+    await run_db(db.store_extracted_text, TextExtractionResult(
+        file_id="f1", text_content="hello", word_count=1, extraction_time=0.1))
+    assert threads and threads[0] is not threading.main_thread()
+    assert await run_db(db.get_file_content, "f1") == b"hello"
+    assert await run_db(db.get_file_info, "f1") is not None
+    db.close()
+
+
+def test_unclosed_store_removes_its_temp_dir():
+    store = BlobStore(memory_budget=0)
+    store.put("a", b"aaaa")
+    directory = store.directory
+    assert os.path.isdir(directory)
+    del store
+    gc.collect()
+    assert not os.path.exists(directory)
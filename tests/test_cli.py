@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+
+import app.quiz_generator
+from app import cli
+from app.llm_client import LocalLLMClient
+from app.models import Quiz
+
+TEXT = "Mitochondria produce most of the cell's energy through respiration. " * 20
+
+
+@pytest.fixture
+def course(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_MOCK_MODE", "true")
+    monkeypatch.setattr(app.quiz_generator, "get_llm_client", LocalLLMClient)
+    root = tmp_path / "course"
+    (root / "week1").mkdir(parents=True)
+    (root / "week1" / "cells.txt").write_text(TEXT)
+    (root / "week1" / "energy.txt").write_text(TEXT.upper())
+    (root / "syllabus.txt").write_text(TEXT.lower())
+    (root / "empty.txt").write_text("")
+    (root / "slides.pptx").write_bytes(b"skipped")
+    (root / ".hidden").mkdir()
+    (root / ".hidden" / "notes.txt").write_text(TEXT)
+    return root
+
+
+def run(root, output, *extra):
+    args = cli.parse_args([str(root), "--output", str(output), "--num-questions", "3",
+                           "--workers", "1", *extra])
+    return cli.asyncio.run(cli.main_async(args))
+
+
+def test_documents_are_found_sorted_and_filtered(course):
+    assert cli.find_documents(str(course)) == [
+        "empty.txt", "syllabus.txt", "week1/cells.txt", "week1/energy.txt"
+    ]
+
+
+def test_interrupted_runs_resume_from_the_checkpoint(course, tmp_path):
+    output = tmp_path / "quizzes.jsonl"
+    first = run(course, output, "--limit", "2")
+    assert (first.completed, first.failed) == (1, 1)  # empty.txt has no text
+
+    second = run(course, output)
+    assert (second.skipped, second.completed, second.failed) == (1, 2, 1)
+    quizzes = [Quiz.model_validate_json(line) for line in output.read_text().splitlines()]
+    assert len(quizzes) == 3 and all(len(quiz.questions) == 3 for quiz in quizzes)
+    assert "Files: 4 found, 1 skipped" in second.summary()
+
+    (course / "week1" / "cells.txt").write_text(TEXT + " Changed.")
+    third = run(course, output)
+    assert (third.skipped, third.completed) == (2, 1)
+    records = [json.loads(line) for line in (tmp_path / "quizzes.jsonl.checkpoint").read_text().splitlines()]
+    assert [r["path"] for r in records if r["status"] == "failed"] == ["empty.txt"] * 3
+
+
+def test_files_vanishing_before_the_checkpoint_check_are_recorded_as_failed(course, tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "find_documents", lambda directory: ["gone.txt", "syllabus.txt"])
+    stats = run(course, tmp_path / "quizzes.jsonl")
+    assert (stats.completed, stats.failed) == (1, 1)
+    records = [json.loads(line) for line in (tmp_path / "quizzes.jsonl.checkpoint").read_text().splitlines()]
+    assert [r["path"] for r in records if r["status"] == "failed"] == ["gone.txt"]
+
+
+def test_invalid_arguments_exit_with_an_error(course, capsys):
+    assert cli.main([str(course / "missing"), "--output", "x.jsonl"]) == 2
+    assert cli.main([str(course), "--output", "x.jsonl", "--question-types", "essay"]) == 2
+    assert "essay" in capsys.readouterr().err
+
+
+def test_scratch_records_and_vanished_files_are_cleaned_up(course, tmp_path):
+    args = cli.parse_args([str(course), "--output", str(tmp_path / "quizzes.jsonl"), "--num-questions", "3"])
+    generator = cli.BulkGenerator(args, cli.InMemoryDatabase(), io.StringIO(), io.StringIO())
+    with cli.ProcessPoolExecutor(max_workers=1) as pool:
+        stats = cli.asyncio.run(generator.run(["week1/cells.txt", "gone.txt"], pool))
+
+    assert (stats.completed, stats.failed) == (1, 1)
+    assert generator.service.question_bank.stats()["total"] == 0
+    assert generator.db.list_files() == [] and generator.db.list_quizzes() == []
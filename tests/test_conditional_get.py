@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import InMemoryDatabase, get_database
+from app.models import Quiz, QuizQuestion, QuestionType, TextExtractionResult
+from app.responses import etag_matches
+from app.storage.sqlite import SQLiteDatabase
+from main import app
+
+
+@pytest.fixture
+def client():
+    db = get_database()
+    db.store_quiz(Quiz(
+        id="etag-quiz",
+        title="Cells",
+        source_file_id="etag-file",
+        questions=[QuizQuestion(id="q1", question="Is a cell alive?",
+                                question_type=QuestionType.TRUE_FALSE, correct_answer="True")],
+        created_at=datetime.now(),
+    ))
+    db.store_file("etag-file", "notes.txt", "txt", 5, b"hello")
+    db.store_extracted_text(TextExtractionResult(file_id="etag-file", text_content="hello",
+                                                 word_count=1, extraction_time=0.1))
+    yield TestClient(app)
+    db.delete_quiz("etag-quiz")
+    db.delete_file("etag-file")
+
+
+def test_etag_matching():
+    assert etag_matches('"a", W/"3"', '"3"')
+    assert etag_matches("*", '"3"')
+    assert not etag_matches('"4"', '"3"')
+    assert not etag_matches(None, '"3"')
+
+
+def test_quiz_etag_follows_version(client):
+    response = client.get("/api/quizzes/etag-quiz")
+    etag = response.headers["etag"]
+    assert (etag, response.headers["cache-control"]) == ('"1"', "no-cache")
+
+    cached = client.get("/api/quizzes/etag-quiz", headers={"If-None-Match": etag})
+    assert (cached.status_code, cached.content) == (304, b"")
+
+    edited = client.patch("/api/quizzes/etag-quiz/questions/q1", json={"correct_answer": "False"},
+                          headers={"If-Match": etag})
+    assert edited.headers["etag"] == '"2"'
+    assert client.get("/api/quizzes/etag-quiz", headers={"If-None-Match": etag}).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/api/files", "/api/files/etag-file", "/api/files/etag-file/text"])
+def test_file_endpoints_revalidate(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    cached = client.get(path, headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.headers["cache-control"] == response.headers["cache-control"]
+
+
+def test_file_revalidation_loads_nothing(client, monkeypatch):
+    etags = {path: client.get(path).headers["etag"] for path in ("/api/files", "/api/files/etag-file")}
+
+    def unexpected(*args):
+        raise AssertionError("loaded on revalidation")
+
+    db = get_database()
+    monkeypatch.setattr(db, "list_files", unexpected)
+    monkeypatch.setattr(db, "get_file_info", unexpected)
+    for path, etag in etags.items():
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_file_versions_follow_changes(backend, tmp_path):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    assert db.get_file_version("f1") is None
+    listing = db.get_files_version()
+
+    db.store_file("f1", "notes.txt", "txt", 5, b"hello")
+    db.store_file("f2", "other.txt", "txt", 5, b"hello")
+    uploaded, other = db.get_file_version("f1"), db.get_file_version("f2")
+    db.store_extracted_text(TextExtractionResult(file_id="f1", text_content="hello",
+                                                 word_count=1, extraction_time=0.1))
+    assert db.get_file_version("f1") not in (None, uploaded)
+    assert db.get_file_version("f2") == other
+
+    extracted = db.get_files_version()
+    assert extracted != listing
+    db.delete_file("f2")
+    assert db.get_file_version("f2") is None
+    assert db.get_files_version() != extracted
+
+
+def test_extracted_text_is_immutable(client):
+    response = client.get("/api/files/etag-file/text")
+    assert "immutable" in response.headers["cache-control"]
+    assert response.json()["text_content"] == "hello"
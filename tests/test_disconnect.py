@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+
+from app.disconnect import run_until_disconnected, ClientDisconnected
+from app.gemini_client import GeminiClient
+from app.metrics import get_metrics
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+RESPONSE = """QUESTION:
+Type: true_false
+Question: Statement number {n}.
+Answer: True
+"""
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_remaining_chunks(monkeypatch):
+    monkeypatch.setenv("DISCONNECT_POLL_INTERVAL", "0.01")
+    request = FakeRequest()
+    client = GeminiClient()
+    client.api_token = "test"
+    client.chunk_size = 100
+    calls = []
+
+    async def fake_completion(prompt, payload):
+        calls.append(prompt)
+        if len(calls) == 1:
+            return RESPONSE.format(n=1)
+        request.disconnected = True
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(client, "_request_completion", fake_completion)
+    completed_chunks = []
+    metrics = get_metrics()
+    cancelled_before = metrics.counters.get("llm.cancelled_calls", 0)
+
+    with pytest.raises(ClientDisconnected):
+        await run_until_disconnected(request, client.generate_quiz(
+            "x" * 300, num_questions=3,
+            on_chunk=lambda chunk, questions: completed_chunks.append(questions)
+        ))
+
+    assert len(calls) == 2  # the third chunk was never sent, no retry of the second
+    assert len(completed_chunks) == 1
+    assert metrics.counters["llm.cancelled_calls"] - cancelled_before == 2
+    assert metrics.counters["llm.tokens_saved"] > 0
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from app.database import InMemoryDatabase
+from app.memory import tracemalloc_report, stop_tracemalloc
+from app.models import TextExtractionResult
+
+
+@pytest.fixture
+def make_quiz(make_quiz):
+    return lambda: make_quiz(question_text="Is water wet?" * 20)
+
+
+def make_db(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    return InMemoryDatabase()
+
+
+def test_accounting_tracks_stores_and_deletes(monkeypatch, make_quiz):
+    db = make_db(monkeypatch)
+    quiz = db.store_quiz(make_quiz())
+    db.store_file("f1", "notes.txt", "txt", 5, b"hello")
+    db.store_extracted_text(TextExtractionResult(file_id="f1", text_content="x" * 1000,
+                                                 word_count=1, extraction_time=0.1))
+    collections = db.memory.report()["collections"]
+    assert collections["quizzes"]["bytes"] > len(quiz.questions[0].question)
+    assert collections["extracted_texts"]["bytes"] > 1000
+
+    db.delete_quiz(quiz.id)
+    db.delete_file("f1")
+    assert db.memory.used_bytes == 0
+
+
+def test_budget_evicts_only_rebuildable_data(monkeypatch, make_quiz):
+    db = make_db(monkeypatch, MEMORY_BUDGET_MB=0.008, MEMORY_PIN_SECONDS=0)  # ~8 KB
+    db.store_file("f1", "notes.txt", "txt", 5, b"hello")
+    db.store_extracted_text(TextExtractionResult(file_id="f1", text_content="x" * 3000,
+                                                 word_count=1, extraction_time=0.1))
+    quizzes = [db.store_quiz(make_quiz()) for _ in range(4)]
+    for quiz in quizzes:
+        db.get_quiz_json(quiz.id)
+    for _ in range(4):
+        db.store_quiz(make_quiz())
+
+    collections = db.memory.report()["collections"]
+    assert collections["quiz_json"]["evicted_lru"] > 0
+    assert collections["extracted_texts"]["evicted_lru"] == 1
+    assert db.get_extracted_text("f1") is None and not db.get_file_info("f1").text_extracted
+    # Quizzes and files are never dropped, even over budget
+    assert len(db.list_quizzes()) == 8 and db.get_file_content("f1") == b"hello"
+    assert collections["quizzes"]["evicted_lru"] == 0
+    assert db.get_quiz_json(quizzes[0].id) is not None
+    db.close()
+
+
+def test_ttl_expires_idle_text_on_reads(monkeypatch, make_quiz):
+    monkeypatch.setattr("app.memory.READ_ENFORCE_INTERVAL_SECONDS", 0)
+    db = make_db(monkeypatch, MEMORY_TTL_EXTRACTED_TEXTS_SECONDS=0.05, MEMORY_TTL_QUIZZES_SECONDS=0.05)
+    quiz = db.store_quiz(make_quiz())
+    db.store_extracted_text(TextExtractionResult(file_id="f2", text_content="text",
+                                                 word_count=1, extraction_time=0.1))
+    time.sleep(0.1)
+    assert db.get_quiz(quiz.id) is not None
+    assert db.get_extracted_text("f2") is None
+    assert db.memory.report()["collections"]["extracted_texts"]["evicted_ttl"] == 1
+
+
+def test_tracemalloc_report_shows_growth():
+    try:
+        assert tracemalloc_report()["started"]
+        tracemalloc_report()
+        hoard = [bytearray(1024) for _ in range(200)]
+        report = tracemalloc_report(top=5)
+        assert report["growth"] and report["traced_bytes"] > 0
+        del hoard
+    finally:
+        stop_tracemalloc()
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.gemini_client import GeminiClient
+from app.llm_client import LocalLLMClient
+from app.mock_provider import MockProvider, MockProviderConfig, MockProviderError
+from app.models import QuestionType
+
+TEXT = "Enzymes lower the activation energy of reactions. Each enzyme binds a specific substrate. " * 60
+
+
+def provider(**config):
+    return MockProvider(MockProviderConfig(**{"latency_ms": 0, "tokens_per_second": 0, **config}))
+
+
+def prompt(num_questions=4):
+    return GeminiClient()._create_quiz_prompt(
+        TEXT[:3000], num_questions, [QuestionType.MULTIPLE_CHOICE, QuestionType.TRUE_FALSE], "medium", [], "english"
+    )
+
+
+@pytest.mark.asyncio
+async def test_same_seed_gives_the_same_run():
+    config = dict(seed=7, rate_limit_rate=0.3, server_error_rate=0.2, malformed_rate=0.3)
+
+    async def run(mock):
+        outcomes = []
+        for _ in range(10):
+            try:
+                outcomes.append(await mock.complete(prompt()))
+            except MockProviderError as e:
+                outcomes.append(e.status_code)
+        return outcomes
+
+    first, second = await run(provider(**config)), await run(provider(**config))
+    assert first == second
+    assert {429, 500} <= set(first)
+    assert await run(provider(**{**config, "seed": 8})) != first
+
+    parsed = GeminiClient()._parse_quiz_response(await provider().complete(prompt(4)))
+    assert [q.question_type for q in parsed] == [QuestionType.MULTIPLE_CHOICE, QuestionType.TRUE_FALSE] * 2
+    assert all(q.correct_answer in q.options for q in parsed if q.options)
+
+
+@pytest.mark.asyncio
+async def test_latency_follows_first_token_and_throughput(monkeypatch):
+    mock = provider(latency_ms=1000, latency_sigma=0, tokens_per_second=100, stream_chunk_tokens=10)
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr("app.mock_provider.asyncio.sleep", sleep)
+    pieces = [piece async for piece in mock.stream(prompt())]
+    monkeypatch.undo()
+    assert delays[0] == 1.0 and all(d == pytest.approx(0.1) for d in delays[1:-1])
+    assert len("".join(pieces)) // 4 == mock.stats["output_tokens"]
+
+
+def test_http_stand_in_speaks_the_gemini_api():
+    client = TestClient(provider(seed=1).app)
+    body = {"contents": [{"parts": [{"text": prompt(2)}]}]}
+    response = client.post("/v1beta/models/gemini-2.0-flash:generateContent", json=body)
+    assert response.json()["candidates"][0]["content"]["parts"][0]["text"].startswith("QUESTION 1:")
+
+    streamed = client.post("/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse", json=body)
+    events = [json.loads(line[6:]) for line in streamed.text.splitlines() if line.startswith("data: ")]
+    assert events[-1]["candidates"][0]["finishReason"] == "STOP"
+    assert "".join(e["candidates"][0]["content"]["parts"][0]["text"] for e in events).startswith("QUESTION 1:")
+
+    limited = TestClient(provider(rate_limit_rate=1).app)
+    response = limited.post("/v1beta/models/gemini-2.0-flash:generateContent", json=body)
+    assert response.status_code == 429 and response.json()["error"]["status"] == "RESOURCE_EXHAUSTED"
+    assert limited.get("/mock/stats").json()["stats"]["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_simulated_mock_mode_runs_the_gemini_pipeline(monkeypatch):
+    monkeypatch.setenv("LLM_MOCK_MODE", "true")
+    monkeypatch.setenv("LLM_MOCK_PROVIDER", "simulated")
+    mock = provider(seed=3)
+    monkeypatch.setattr("app.mock_provider.mock_provider", mock)
+
+    questions = await LocalLLMClient().generate_quiz(TEXT, 6, [QuestionType.TRUE_FALSE])
+    assert len(questions) == 6 and questions[0].question_type == QuestionType.TRUE_FALSE
+    # Two 4000-character chunks, one call each
+    assert mock.stats["requests"] == 2
+    variants = await LocalLLMClient().generate_quiz_variants(TEXT[:2000], 3, variants=2)
+    assert [len(v) for v in variants] == [3, 3]
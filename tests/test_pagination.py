@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import (
+    InMemoryDatabase, InvalidCursorError, next_page, quiz_sort_key, file_sort_key
+)
+from app.storage.sqlite import SQLiteDatabase
+
+
+def read_all_pages(db, file_id, limit):
+    """Walk a listing the way the API does: fetch limit + 1, follow the cursor"""
+    ids, cursor = [], None
+    while True:
+        page, cursor = next_page(db.list_quizzes(file_id, limit + 1, cursor), limit, quiz_sort_key)
+        ids += [quiz.id for quiz in page]
+        if cursor is None:
+            return ids
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def db(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryDatabase()
+    else:
+        database = SQLiteDatabase(str(tmp_path / "quiz.db"))
+        yield database
+        database.close()
+
+
+def test_pages_follow_creation_order(db, make_quiz):
+    now = datetime.now()
+    # Two quizzes share a timestamp: the id breaks the tie so none is skipped
+    quizzes = [make_quiz(f"f{i % 2}", now - timedelta(seconds=i // 2)) for i in range(9)]
+    db.store_quizzes(quizzes)
+
+    newest_first = [q.id for q in sorted(quizzes, key=quiz_sort_key, reverse=True)]
+    assert read_all_pages(db, None, 4) == newest_first
+    assert read_all_pages(db, "f1", 2) == [i for i in newest_first if db.get_quiz(i).source_file_id == "f1"]
+    assert [q.id for q in db.list_quizzes()] == newest_first
+
+
+def test_indexes_follow_updates_and_deletes(db, make_quiz):
+    now = datetime.now()
+    kept, removed = make_quiz("f1", now), make_quiz("f1", now - timedelta(seconds=1))
+    db.store_quizzes([kept, removed, make_quiz("f2", now)])
+
+    db.update_quiz(kept.id, {"title": "Renamed"})
+    assert db.delete_quiz(removed.id)
+    assert [q.title for q in db.list_quizzes("f1")] == ["Renamed"]
+
+    assert db.delete_quizzes_for_file("f2") == 1
+    assert [q.id for q in db.list_quizzes()] == [kept.id]
+
+
+def test_file_listing_pages(db):
+    for i in range(5):
+        db.store_file(f"f{i}", f"notes{i}.txt", "txt", 1, b"x")
+    first = db.list_files(2)
+    rest = db.list_files(None, next_page(db.list_files(3), 2, file_sort_key)[1])
+    assert [f.file_id for f in first + rest] == [f.file_id for f in db.list_files()]
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        InMemoryDatabase().list_quizzes(cursor="not-a-cursor")
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+
+from app.models import TextExtractionResult
+from app.pregeneration import PreGenerator
+from app.question_bank import QuestionBank
+from app.scheduler import estimate_generation_tokens
+
+
+class FakeDatabase:
+    def get_extracted_text(self, file_id):
+        return TextExtractionResult(file_id=file_id, text_content="word " * 400,
+                                    word_count=400, extraction_time=0.0)
+
+
+class SlowGenerator:
+    def __init__(self):
+        self.db = FakeDatabase()
+        self.question_bank = QuestionBank()
+        self.started = asyncio.Event()
+        self.calls = 0
+
+    async def pregenerate_questions(self, file_id, num_questions, question_types):
+        self.calls += 1
+        self.started.set()
+        await asyncio.sleep(0.05)
+        return num_questions
+
+
+@pytest.mark.asyncio
+async def test_interactive_work_preempts_and_run_resumes():
+    pregenerator = PreGenerator()
+    pregenerator.enabled = True
+    generator = SlowGenerator()
+
+    assert pregenerator.schedule("file-1", generator)
+    await generator.started.wait()
+    async with pregenerator.interactive():
+        await asyncio.sleep(0.01)
+        assert pregenerator.stats["preempted"] == 1
+
+    await asyncio.wait_for(asyncio.gather(*pregenerator._tasks.values()), 1)
+    assert generator.calls == 2
+    assert pregenerator.stats["completed"] == 1
+    # The retry is covered by the first attempt's reservation
+    assert pregenerator.report()["tokens_used_today"] == estimate_generation_tokens("word " * 400, 10)
+
+    pregenerator.record_use("file-1", 3)
+    assert pregenerator.report()["usage_ratio"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_daily_budget_is_enforced():
+    pregenerator = PreGenerator()
+    pregenerator.enabled = True
+    pregenerator.daily_token_budget = 100
+    generator = SlowGenerator()
+
+    pregenerator.schedule("file-1", generator)
+    await asyncio.gather(*pregenerator._tasks.values())
+
+    assert generator.calls == 0
+    assert pregenerator.stats["skipped_budget"] == 1
@@ -0,0 +1,79 @@
+import uuid
+import pytest
+
+from app.pregeneration import PreGenerator
+from app.question_bank import QuestionBank, chunk_hash
+from app.quiz_generator import QuizGeneratorService
+from app.database import InMemoryDatabase
+from app.llm_client import LocalLLMClient
+from app.models import QuizGenerationRequest, QuizQuestion, QuestionType
+
+
+def make_question(text, question_type=QuestionType.TRUE_FALSE):
+    return QuizQuestion(
+        id=str(uuid.uuid4()),
+        question=text,
+        question_type=question_type,
+        correct_answer="True",
+    )
+
+
+def test_select_rotates_and_skips_stale():
+    bank = QuestionBank()
+    bank.add("file-1", chunk_hash("chunk one"), [make_question("Q1"), make_question("Q2")], "medium")
+    bank.add("file-1", chunk_hash("chunk two"), [make_question("Q3")], "medium")
+
+    first = bank.select("file-1", [QuestionType.TRUE_FALSE], "medium", 2)
+    second = bank.select("file-1", [QuestionType.TRUE_FALSE], "medium", 2)
+    assert [q.question for q, _ in first] == ["Q1", "Q2"]
+    assert [q.question for q, _ in second] == ["Q3", "Q1"]
+    assert bank.select("file-1", [QuestionType.MULTIPLE_CHOICE], "medium", 2) == []
+
+    assert bank.mark_stale("file-1", keep_chunk_hashes={chunk_hash("chunk two")}) == 2
+    assert [q.question for q, _ in bank.select("file-1", [QuestionType.TRUE_FALSE], "medium", 5)] == ["Q3"]
+
+
+def test_select_never_mixes_languages():
+    bank = QuestionBank()
+    bank.add("file-1", chunk_hash("chunk"), [make_question("Q1")], "medium")
+    bank.add("file-1", chunk_hash("chunk"), [make_question("Q1 es")], "medium", language="Spanish")
+
+    assert bank.select("file-1", [QuestionType.TRUE_FALSE], "medium", 5, language="french") == []
+    assert [q.question for q, _ in bank.select("file-1", [QuestionType.TRUE_FALSE], "medium", 5,
+                                            language=" spanish")] == ["Q1 es"]
+    assert [q.question for q, _ in bank.select("file-1", [QuestionType.TRUE_FALSE], "medium", 5)] == ["Q1"]
+    assert bank.mark_stale("file-1") == 2 and bank.fresh_count("file-1") == 0
+
+
+@pytest.mark.asyncio
+async def test_second_request_is_served_from_bank(monkeypatch):
+    monkeypatch.setenv("LLM_MOCK_MODE", "true")
+    content = ("Mitochondria produce most of the cell's ATP. " * 30).encode()
+    file_id = str(uuid.uuid4())
+
+    db = InMemoryDatabase()
+    db.store_file(file_id=file_id, filename="cells.txt", file_type="txt",
+                  file_size=len(content), content=content)
+
+    service = QuizGeneratorService()
+    service.db = db
+    service.llm_client = LocalLLMClient()
+    service.question_bank = QuestionBank()
+    service.pregenerator = PreGenerator()
+    # Pre-generation also ran for this file, but the bank only holds interactive questions
+    service.pregenerator.pregenerated_files.add(file_id)
+
+    request = QuizGenerationRequest(
+        file_id=file_id,
+        num_questions=2,
+        question_types=[QuestionType.MULTIPLE_CHOICE, QuestionType.TRUE_FALSE],
+    )
+    first = await service.generate_quiz_from_file(request)
+    second = await service.generate_quiz_from_file(request)
+
+    assert first.metadata["question_bank_hits"] == 0
+    assert second.metadata["question_bank_hits"] == 2
+    assert {q.question for q in first.questions} == {q.question for q in second.questions}
+    assert not {q.id for q in first.questions} & {q.id for q in second.questions}
+    assert service.pregenerator.stats["questions_served"] == 0
+    assert service.pregenerator.report()["usage_ratio"] == 0
@@ -0,0 +1,109 @@
+import asyncio
+import os
+
+import pytest
+
+from app.blob_store import BlobStore
+from app.database import InMemoryDatabase
+from app.storage.snapshot import StorePersistence
+from app.storage.sqlite import SQLiteDatabase
+
+
+@pytest.fixture
+def make_quiz(make_quiz):
+    return lambda: make_quiz(quiz_id="quiz-1", title="Cells", question_count=20,
+                             question_text="Question about cells?" * 5)
+
+
+async def open_store(directory):
+    db = InMemoryDatabase()
+    db.blobs = BlobStore(os.path.join(directory, "blobs"), write_through=True)
+    db.persistence = StorePersistence(db, directory)
+    await db.persistence.start()
+    while db.persistence.restoring:
+        await asyncio.sleep(0.01)
+    return db
+
+
+def test_duplicate_shares_questions_until_edited(make_quiz):
+    db = InMemoryDatabase()
+    original = db.store_quiz(make_quiz())
+    before = db.memory.used_bytes
+
+    copy = db.duplicate_quiz("quiz-1", "quiz-2")
+    assert (copy.title, copy.version, copy.updated_at) == ("Copy of Cells", 1, None)
+    assert all(a is b for a, b in zip(copy.questions, original.questions))
+    # The copy is charged for its own fields, not for the shared questions
+    assert db.memory.used_bytes - before < before / 10
+
+    edit = [{"op": "replace", "path": "/questions/q3/correct_answer", "value": "False"}]
+    edited = db.patch_quiz("quiz-2", edit)
+    assert [a is b for a, b in zip(edited.questions, original.questions)].count(False) == 1
+    assert db.get_quiz("quiz-1").questions[3].correct_answer == "True"
+    assert db.list_quiz_summaries()[0].title == "Copy of Cells"
+
+    db.delete_quiz("quiz-1")
+    db.delete_quiz("quiz-2")
+    assert db.memory.used_bytes == 0
+
+
+def test_put_keeps_unchanged_questions_shared(make_quiz):
+    db = InMemoryDatabase()
+    original = db.store_quiz(make_quiz())
+    db.duplicate_quiz("quiz-1", "quiz-2")
+    questions = [q.model_dump() for q in original.questions]
+    questions[0]["question"] = "Edited?"
+    updated = db.update_quiz("quiz-2", {"questions": questions})
+    shared = [a is b for a, b in zip(updated.questions, original.questions)]
+    assert shared.count(False) == 1 and not shared[0]
+
+
+@pytest.mark.asyncio
+async def test_sharing_survives_snapshot_and_journal(tmp_path, make_quiz):
+    directory = str(tmp_path)
+    db = await open_store(directory)
+    db.store_quiz(make_quiz())
+    db.duplicate_quiz("quiz-1", "quiz-2")
+    await db.persistence.snapshot()
+    # After the snapshot: one more copy, journaled as a duplicate record
+    db.duplicate_quiz("quiz-2", "quiz-3")
+    db.patch_quiz("quiz-3", [{"op": "replace", "path": "/title", "value": "Third"}])
+    for task in db.persistence._tasks:
+        task.cancel()
+
+    restored = await open_store(directory)
+    quizzes = [restored.get_quiz(quiz_id) for quiz_id in ("quiz-1", "quiz-2", "quiz-3")]
+    assert [q.title for q in quizzes] == ["Cells", "Copy of Cells", "Third"]
+    assert all(a is b is c for a, b, c in zip(*(q.questions for q in quizzes)))
+    assert len(restored._question_refs) == 20
+
+
+def test_sqlite_duplicates_in_place(tmp_path, make_quiz):
+    db = SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_quiz(make_quiz())
+    db.update_quiz("quiz-1", {"title": "Biology"})
+    copy = db.duplicate_quiz("quiz-1", "quiz-2")
+    assert (copy.id, copy.title, copy.version, copy.updated_at) == ("quiz-2", "Copy of Biology", 1, None)
+    assert copy.questions == db.get_quiz("quiz-1").questions
+    assert [s.id for s in db.list_quiz_summaries()] == ["quiz-2", "quiz-1"]
+    assert db.list_quiz_summaries()[0].title == "Copy of Biology"
+    assert db.duplicate_quiz("missing", "quiz-3") is None
+
+
+def test_sqlite_stores_shared_questions_once(tmp_path, make_quiz):
+    db = SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_quiz(make_quiz())
+    db.duplicate_quiz("quiz-1", "quiz-2")
+    conn = db._connection()
+    assert conn.execute("SELECT count(*), sum(refs) FROM questions").fetchone() == (20, 40)
+
+    db.patch_quiz("quiz-2", [{"op": "replace", "path": "/questions/q3/correct_answer", "value": "False"}])
+    assert db.get_quiz("quiz-2").questions[2].correct_answer == "False"
+    assert db.get_quiz("quiz-1").questions[2].correct_answer == "True"
+    refs = [row[0] for row in conn.execute("SELECT refs FROM questions ORDER BY refs")]
+    assert refs == [1, 1] + [2] * 19
+
+    db.delete_quiz("quiz-2")
+    assert conn.execute("SELECT count(*), sum(refs) FROM questions").fetchone() == (20, 20)
+    db.delete_quizzes_for_file("f1")
+    assert conn.execute("SELECT count(*) FROM questions").fetchone() == (0,)
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from app.database import ENTRY_OVERHEAD_BYTES, InMemoryDatabase
+from app.models import Quiz
+from app.storage.sqlite import SQLiteDatabase
+
+
+@pytest.fixture
+def make_quiz(make_quiz):
+    return lambda: make_quiz(quiz_id="quiz-1", title="Cells", question_text="Is a cell alive?")
+
+
+def test_cached_body_is_reused_until_the_quiz_changes(make_quiz):
+    db = InMemoryDatabase()
+    db.store_quiz(make_quiz())
+    before = db.memory.used_bytes
+
+    body = db.get_quiz_json("quiz-1")
+    assert db.get_quiz_json("quiz-1") is body
+    assert Quiz.model_validate_json(body) == db.get_quiz("quiz-1")
+    assert db.memory.used_bytes == before + ENTRY_OVERHEAD_BYTES + len(body)
+
+    db.patch_quiz("quiz-1", [{"op": "replace", "path": "/title", "value": "Biology"}])
+    assert json.loads(db.get_quiz_json("quiz-1"))["title"] == "Biology"
+    db.update_quiz("quiz-1", {"title": "Anatomy"})
+    assert json.loads(db.get_quiz_json("quiz-1"))["version"] == 3
+
+    db.duplicate_quiz("quiz-1", "quiz-2")
+    assert json.loads(db.get_quiz_json("quiz-2"))["title"] == "Copy of Anatomy"
+    db.delete_quiz("quiz-1")
+    db.delete_quizzes_for_file("f1")
+    assert db.get_quiz_json("quiz-1") is None and db.get_quiz_json("quiz-2") is None
+    assert db.memory.used_bytes == 0
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_backends_return_the_stored_quiz(backend, tmp_path, make_quiz):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    quiz = db.store_quiz(make_quiz())
+    assert Quiz.model_validate_json(db.get_quiz_json("quiz-1")) == quiz
+    assert db.get_quiz_json("missing") is None
@@ -0,0 +1,102 @@
+import pytest
+
+from app.database import InMemoryDatabase
+from app.models import QuizQuestion, QuestionType
+from app.quiz_patch import apply_quiz_patch, QuizPatchError, VersionConflictError
+from app.storage.sqlite import SQLiteDatabase
+
+
+@pytest.fixture
+def make_quiz(make_quiz):
+    def make():
+        return make_quiz(quiz_id="quiz-1", title="Cells", questions=[
+            QuizQuestion(id="q1", question="Is a cell alive?",
+                         question_type=QuestionType.TRUE_FALSE, correct_answer="True"),
+            QuizQuestion(id="q2", question="Which organelle makes ATP?",
+                         question_type=QuestionType.MULTIPLE_CHOICE,
+                         options=["Mitochondria", "Nucleus"], correct_answer="Mitochondria",
+                         explanation="Powerhouse"),
+        ])
+    return make
+
+
+def test_patch_replaces_only_the_touched_question(make_quiz):
+    quiz = make_quiz()
+    patched = apply_quiz_patch(quiz, [
+        {"op": "replace", "path": "/questions/q2/correct_answer", "value": "Nucleus"},
+        {"op": "remove", "path": "/questions/q2/explanation"},
+        {"op": "replace", "path": "/title", "value": "Biology"},
+    ])
+    assert patched.title == "Biology"
+    assert patched.version == 2
+    assert patched.questions[0] is quiz.questions[0]
+    assert (patched.questions[1].correct_answer, patched.questions[1].explanation) == ("Nucleus", None)
+    assert quiz.questions[1].correct_answer == "Mitochondria"
+
+
+def test_patch_adds_and_removes_questions(make_quiz):
+    new_question = {"id": "q3", "question": "Is DNA in the nucleus?",
+                    "question_type": "true_false", "correct_answer": "True"}
+    patched = apply_quiz_patch(make_quiz(), [
+        {"op": "add", "path": "/questions/-", "value": new_question},
+        {"op": "remove", "path": "/questions/q1"},
+    ])
+    assert [q.id for q in patched.questions] == ["q2", "q3"]
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "replace", "path": "/questions/missing/question", "value": "?"},
+    {"op": "replace", "path": "/questions/q1/question_type", "value": "essay"},
+    {"op": "remove", "path": "/questions/q1/correct_answer"},
+    {"op": "replace", "path": "/questions/q1/id", "value": "q9"},
+    {"op": "replace", "path": "/source_file_id", "value": "f2"},
+    {"op": "test", "path": "/questions/q1/correct_answer", "value": "False"},
+    {"op": "move", "path": "/title"},
+    {"op": "replace", "path": "/description", "value": {"a": 1}},
+])
+def test_invalid_operations_are_rejected(operation, make_quiz):
+    with pytest.raises(QuizPatchError):
+        apply_quiz_patch(make_quiz(), [operation])
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_backends_enforce_versions(backend, tmp_path, make_quiz):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_quiz(make_quiz())
+
+    edit = [{"op": "replace", "path": "/questions/q1/question", "value": "Are cells alive?"}]
+    assert db.patch_quiz("quiz-1", edit, expected_version=1).version == 2
+    with pytest.raises(VersionConflictError) as conflict:
+        db.patch_quiz("quiz-1", edit, expected_version=1)
+    assert conflict.value.current_version == 2
+    with pytest.raises(VersionConflictError):
+        db.update_quiz("quiz-1", {"title": "Stale"}, expected_version=1)
+
+    assert db.update_quiz("quiz-1", {"title": "Fresh"}, expected_version=2).version == 3
+    stored = db.get_quiz("quiz-1")
+    assert (stored.title, stored.version, stored.questions[0].question) == ("Fresh", 3, "Are cells alive?")
+    assert db.patch_quiz("missing", edit) is None
+
+
+def test_rejected_patch_leaves_the_stored_quiz_alone(make_quiz):
+    db = InMemoryDatabase()
+    db.store_quiz(make_quiz())
+    with pytest.raises(QuizPatchError):
+        db.patch_quiz("quiz-1", [{"op": "replace", "path": "/description", "value": {"a": 1}}])
+    stored = db.get_quiz("quiz-1")
+    assert (stored.version, stored.description) == (1, None)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_every_content_change_gets_a_new_version(backend, tmp_path, make_quiz):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_quiz(make_quiz())
+    assert db.store_quiz(make_quiz().model_copy(update={"title": "Biology"})).version == 2
+    # Storing the same content again keeps the version, and so the ETag
+    assert db.store_quiz(db.get_quiz("quiz-1")).version == 2
+
+    db.delete_quiz("quiz-1")
+    assert db.store_quiz(make_quiz()).version == 3
+    db.delete_quizzes_for_file("f1")
+    db.store_quizzes([make_quiz()])
+    assert db.get_quiz_version("quiz-1") == 4
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from app.database import InMemoryDatabase
+from app.models import Quiz, QuizQuestion, QuizSummary, QuestionType
+from app.projection import parse_fields, covers, project, ProjectionError
+from app.storage.sqlite import SQLiteDatabase
+
+
+@pytest.fixture
+def make_quiz(make_quiz):
+    def make():
+        return make_quiz(quiz_id="quiz-1", title="Cells", questions=[
+            QuizQuestion(id="q1", question="Is a cell alive?",
+                         question_type=QuestionType.TRUE_FALSE, correct_answer="True"),
+            QuizQuestion(id="q2", question="Which organelle makes ATP?",
+                         question_type=QuestionType.MULTIPLE_CHOICE,
+                         options=["Mitochondria", "Nucleus"], correct_answer="Mitochondria"),
+            QuizQuestion(id="q3", question="Is DNA in the nucleus?",
+                         question_type=QuestionType.TRUE_FALSE, correct_answer="True"),
+        ], metadata={"variant_group_id": "g1", "variant_label": "A"})
+    return make
+
+
+def test_summary_counts_questions(make_quiz):
+    summary = QuizSummary.from_quiz(make_quiz())
+    assert summary.question_count == 3
+    assert summary.question_types == {"true_false": 2, "multiple_choice": 1}
+    assert (summary.variant_group_id, summary.variant_label) == ("g1", "A")
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_summaries_follow_stores_and_updates(backend, tmp_path, make_quiz):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_quiz(make_quiz())
+    db.update_quiz("quiz-1", {"title": "Renamed"})
+    assert [(s.title, s.question_count) for s in db.list_quiz_summaries("f1")] == [("Renamed", 3)]
+    db.delete_quiz("quiz-1")
+    assert db.list_quiz_summaries() == []
+
+
+def test_sqlite_backfills_summaries_for_old_databases(tmp_path, make_quiz):
+    path = str(tmp_path / "quiz.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE quizzes (id TEXT PRIMARY KEY, source_file_id TEXT NOT NULL,
+                    created_at TEXT NOT NULL, data TEXT NOT NULL)""")
+    quiz = make_quiz()
+    conn.execute("INSERT INTO quizzes VALUES (?, ?, ?, ?)",
+                 (quiz.id, quiz.source_file_id, quiz.created_at.isoformat(), quiz.model_dump_json()))
+    conn.commit()
+    conn.close()
+
+    db = SQLiteDatabase(path)
+    assert db.list_quiz_summaries()[0] == QuizSummary.from_quiz(quiz)
+    db.close()
+
+
+def test_field_projection(make_quiz):
+    fields = parse_fields("id, question_count", Quiz, QuizSummary)
+    assert covers(fields, QuizSummary) and not covers({"id", "questions"}, QuizSummary)
+    assert project([QuizSummary.from_quiz(make_quiz())], fields) == [{"id": "quiz-1", "question_count": 3}]
+    with pytest.raises(ProjectionError):
+        parse_fields("id,answers", Quiz, QuizSummary)
+
+    mixed = parse_fields("question_count,questions", Quiz, QuizSummary)
+    assert not covers(mixed, QuizSummary)
+    row, = project([make_quiz()], mixed, QuizSummary.from_quiz)
+    assert row["question_count"] == 3 and len(row["questions"]) == 3
@@ -0,0 +1,89 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import InMemoryDatabase
+from app.models import Quiz
+from app.quiz_transfer import QuizImportError, export_ndjson, import_ndjson, read_lines
+from app.storage.sqlite import SQLiteDatabase
+
+
+@pytest.fixture
+def make_quiz(make_quiz):
+    """Quiz n: odd ones come from f1, even ones from f2, a minute apart"""
+    return lambda n: make_quiz("f1" if n % 2 else "f2", datetime(2024, 1, 1) + timedelta(minutes=n),
+                               quiz_id=f"quiz-{n}", title=f"Quiz {n}", question_text="Is a cell alive?")
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_export_pages_through_every_quiz(backend, tmp_path, make_quiz):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_quizzes([make_quiz(n) for n in range(5)])
+
+    pages = await collect(export_ndjson(db, page_size=2))
+    assert len(pages) == 3
+    ids = [json.loads(line)["id"] for page in pages for line in page.splitlines()]
+    assert ids == [f"quiz-{n}" for n in (4, 3, 2, 1, 0)]
+
+    odd = b"".join(await collect(export_ndjson(db, "f1", page_size=1)))
+    assert [json.loads(line)["id"] for line in odd.splitlines()] == ["quiz-3", "quiz-1"]
+
+
+@pytest.mark.asyncio
+async def test_import_round_trips_a_gzipped_export(tmp_path, make_quiz):
+    source = InMemoryDatabase()
+    source.store_quizzes([make_quiz(n) for n in range(5)])
+    body = gzip.compress(b"".join(await collect(export_ndjson(source, page_size=2))))
+    target = SQLiteDatabase(str(tmp_path / "quiz.db"))
+
+    # Split mid-line so lines straddle chunk boundaries
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    result = await import_ndjson(target, read_lines(stream(*chunks), gzipped=True))
+    assert (result.imported, result.questions, result.failed) == (5, 5, 0)
+    assert target.get_quiz("quiz-3") == source.get_quiz("quiz-3")
+
+
+@pytest.mark.asyncio
+async def test_invalid_lines_are_skipped_and_reported(make_quiz):
+    db = InMemoryDatabase()
+    lines = stream(make_quiz(1).model_dump_json().encode() + b"\n\n{\"id\": \"x\"}\nnot json\n")
+    result = await import_ndjson(db, read_lines(lines))
+    assert (result.imported, result.failed) == (1, 2)
+    assert [error.line for error in result.errors] == [3, 4]
+    assert "title" in result.errors[0].error
+    assert db.get_quiz("quiz-1") is not None
+
+
+@pytest.mark.asyncio
+async def test_unreadable_streams_are_rejected():
+    with pytest.raises(QuizImportError):
+        await collect(read_lines(stream(b"x" * 100), max_line_bytes=10))
+    with pytest.raises(QuizImportError):
+        await collect(read_lines(stream(b"not gzip"), gzipped=True))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_importing_over_a_quiz_moves_its_version_forward(backend, tmp_path, make_quiz):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_quizzes([make_quiz(1), make_quiz(2).model_copy(update={"version": 2})])
+    db.update_quiz("quiz-1", {"title": "Edited"})
+    db.update_quiz("quiz-1", {"title": "Edited again"})
+
+    lines = [make_quiz(1), make_quiz(2).model_copy(update={"version": 5}), make_quiz(3)]
+    result = await import_ndjson(db, read_lines(stream(*(q.model_dump_json().encode() + b"\n" for q in lines))))
+    assert result.imported == 3
+    assert [db.get_quiz_version(f"quiz-{n}") for n in (1, 2, 3)] == [4, 5, 1]
+    assert db.get_quiz("quiz-1").title == "Quiz 1"
@@ -0,0 +1,69 @@
+import uuid
+import pytest
+
+from app.quiz_generator import QuizGeneratorService
+from app.database import InMemoryDatabase
+from app.gemini_client import GeminiClient
+from app.llm_client import LocalLLMClient
+from app.models import QuizGenerationRequest, QuestionType
+
+
+SAMPLE_TEXT = (
+    "Photosynthesis converts light energy into chemical energy. "
+    "Chlorophyll absorbs mostly blue and red light. "
+) * 20
+
+
+@pytest.mark.asyncio
+async def test_variants_are_linked_and_disjoint(monkeypatch):
+    monkeypatch.setenv("LLM_MOCK_MODE", "true")
+    content = SAMPLE_TEXT.encode()
+    file_id = str(uuid.uuid4())
+
+    db = InMemoryDatabase()
+    db.store_file(
+        file_id=file_id,
+        filename="notes.txt",
+        file_type="txt",
+        file_size=len(content),
+        content=content,
+    )
+
+    service = QuizGeneratorService()
+    service.db = db
+    service.llm_client = LocalLLMClient()
+
+    request = QuizGenerationRequest(
+        file_id=file_id,
+        num_questions=3,
+        question_types=[QuestionType.MULTIPLE_CHOICE, QuestionType.TRUE_FALSE],
+        variants=3,
+    )
+    quizzes = await service.generate_quiz_variants_from_file(request)
+
+    assert len(quizzes) == 3
+    assert len({q.metadata["variant_group_id"] for q in quizzes}) == 1
+    texts = [question.question for quiz in quizzes for question in quiz.questions]
+    assert len(texts) == len(set(texts)) == 9
+    assert all(db.get_quiz(q.id) for q in quizzes)
+
+
+def test_parse_variants_response():
+    response = """VARIANT A:
+QUESTION:
+Type: true_false
+Question: Chlorophyll absorbs green light.
+Answer: False
+Explanation: It reflects green light.
+
+VARIANT B:
+QUESTION:
+Type: short_answer
+Question: What does photosynthesis convert light into?
+Answer: Chemical energy
+"""
+    parsed = GeminiClient()._parse_variants_response(response, 2)
+
+    assert [len(questions) for questions in parsed] == [1, 1]
+    assert parsed[0][0].question_type == QuestionType.TRUE_FALSE
+    assert parsed[1][0].correct_answer == "Chemical energy"
@@ -0,0 +1,143 @@
+import hashlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import InMemoryDatabase, get_database
+from app.resumable_upload import (
+    MIN_PART_SIZE, ResumableUploads, UploadSessionError, UploadSessionNotFoundError
+)
+from app.storage.sqlite import SQLiteDatabase
+from main import app
+
+CONTENT = os.urandom(MIN_PART_SIZE * 2 + 1000)
+
+
+async def stream(data, size=65536):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def part(n):
+    return CONTENT[(n - 1) * MIN_PART_SIZE:n * MIN_PART_SIZE]
+
+
+@pytest.mark.asyncio
+async def test_parts_arrive_in_any_order_and_assemble_in_place(tmp_path):
+    uploads = ResumableUploads(str(tmp_path))
+    session = uploads.create("book.pdf", len(CONTENT), MIN_PART_SIZE)
+    assert session.part_count == 3
+
+    await uploads.write_part(session.upload_id, 3, stream(part(3)))
+    with pytest.raises(UploadSessionError):
+        await uploads.write_part(session.upload_id, 1, stream(part(1)[:-1]))
+    with pytest.raises(UploadSessionError):
+        await uploads.write_part(session.upload_id, 1, stream(part(1)), expected_sha256="00")
+    with pytest.raises(UploadSessionError):
+        uploads.complete(session.upload_id)
+    assert [p.part_number for p in uploads.get(session.upload_id).parts] == [3]
+
+    for n in (1, 2, 2):
+        await uploads.write_part(session.upload_id, n, stream(part(n)),
+                                 expected_sha256=hashlib.sha256(part(n)).hexdigest())
+    completed, path, digest = uploads.complete(session.upload_id)
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    part_digests = b"".join(hashlib.sha256(part(n)).digest() for n in (1, 2, 3))
+    assert digest == f"{hashlib.sha256(part_digests).hexdigest()}-3"
+    with pytest.raises(UploadSessionNotFoundError):
+        uploads.get(session.upload_id)
+    with pytest.raises(UploadSessionNotFoundError):
+        uploads.get("../../etc")
+
+
+@pytest.mark.asyncio
+async def test_a_bad_retry_or_a_write_in_flight_blocks_completion(tmp_path):
+    uploads = ResumableUploads(str(tmp_path))
+    session = uploads.create("book.pdf", len(CONTENT), MIN_PART_SIZE)
+    for n in (1, 2, 3):
+        await uploads.write_part(session.upload_id, n, stream(part(n)))
+
+    # The retry overwrote part 2's bytes, so the old record must not count
+    with pytest.raises(UploadSessionError):
+        await uploads.write_part(session.upload_id, 2, stream(part(1)), expected_sha256="00")
+    with pytest.raises(UploadSessionError):
+        uploads.complete(session.upload_id)
+
+    async def stalled():
+        yield part(2)[:1000]
+        with pytest.raises(UploadSessionError):
+            uploads.complete(session.upload_id)
+        yield part(2)[1000:]
+
+    await uploads.write_part(session.upload_id, 2, stalled())
+    _, path, _ = uploads.complete(session.upload_id)
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+
+
+def test_limits_and_expiry(tmp_path):
+    uploads = ResumableUploads(str(tmp_path), max_file_size=1000, ttl_seconds=-1)
+    with pytest.raises(UploadSessionError):
+        uploads.create("book.pdf", 1001, MIN_PART_SIZE)
+    with pytest.raises(UploadSessionError):
+        uploads.create("book.pdf", 1000, 10)
+    session = uploads.create("book.pdf", 1000, MIN_PART_SIZE)
+    with pytest.raises(UploadSessionNotFoundError):
+        uploads.get(session.upload_id)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_backends_take_ownership_of_the_assembled_file(backend, tmp_path):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    path = tmp_path / "book.upload"
+    path.write_bytes(CONTENT)
+    db.store_file_from_path("f1", "book.pdf", "pdf", len(CONTENT), str(path))
+    assert not path.exists()
+    assert db.get_file_content("f1") == CONTENT
+    assert db.get_file_info("f1").file_size == len(CONTENT)
+
+
+def test_sqlite_refuses_files_past_its_blob_limit(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.max_file_size = len(CONTENT) - 1
+    path = tmp_path / "book.upload"
+    path.write_bytes(CONTENT)
+    with pytest.raises(ValueError):
+        db.store_file_from_path("f1", "book.pdf", "pdf", len(CONTENT), str(path))
+    assert db.get_file_info("f1") is None
+
+
+def test_uploads_larger_than_the_backend_holds_are_refused(monkeypatch):
+    monkeypatch.setattr(get_database(), "max_file_size", 1000)
+    client = TestClient(app)
+    response = client.post("/api/uploads", json={"filename": "book.pdf", "file_size": 1001})
+    assert response.status_code == 413
+    accepted = client.post("/api/uploads", json={"filename": "book.pdf", "file_size": 1000})
+    assert accepted.status_code == 201
+    client.delete(f"/api/uploads/{accepted.json()['upload_id']}")
+
+
+def test_resumable_upload_endpoints():
+    with TestClient(app) as client:
+        session = client.post("/api/uploads", json={
+            "filename": "notes.txt", "file_size": len(CONTENT), "part_size": MIN_PART_SIZE
+        }).json()
+        upload_id = session["upload_id"]
+        for n in (2, 1, 3):
+            response = client.put(f"/api/uploads/{upload_id}/parts/{n}", content=part(n))
+            assert response.json()["size"] == len(part(n))
+        assert client.put(f"/api/uploads/{upload_id}/parts/4", content=b"x").status_code == 400
+        assert len(client.get(f"/api/uploads/{upload_id}").json()["parts"]) == 3
+
+        result = client.post(f"/api/uploads/{upload_id}/complete").json()
+        assert result["file_size"] == len(CONTENT) and result["digest"].endswith("-3")
+        assert get_database().get_file_content(result["file_id"]) == CONTENT
+        assert client.post(f"/api/uploads/{upload_id}/complete").status_code == 404
+        client.delete(f"/api/files/{result['file_id']}")
+
+        assert client.post("/api/uploads", json={"filename": "a.exe", "file_size": 10}).status_code == 400
+        other = client.post("/api/uploads", json={"filename": "a.txt", "file_size": 10}).json()
+        assert client.delete(f"/api/uploads/{other['upload_id']}").status_code == 200
+        assert client.get(f"/api/uploads/{other['upload_id']}").status_code == 404
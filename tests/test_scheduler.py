@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+
+from app.metrics import Metrics
+from app.scheduler import LLMScheduler, Priority
+
+
+def make_scheduler(max_concurrency=1):
+    scheduler = LLMScheduler()
+    scheduler.max_concurrency = max_concurrency
+    scheduler.metrics = Metrics()
+    return scheduler
+
+
+async def run_jobs(scheduler, jobs):
+    """Hold the only slot, queue `jobs`, then release and record dispatch order"""
+    order = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with scheduler.slot(Priority.INTERACTIVE, "blocker"):
+            await gate.wait()
+
+    async def job(name, priority, tenant):
+        async with scheduler.slot(priority, tenant):
+            order.append(name)
+
+    holder = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(job(*spec)) for spec in jobs]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_classes_dispatch_in_priority_order():
+    order = await run_jobs(make_scheduler(), [
+        ("spec", Priority.SPECULATIVE, "a"),
+        ("batch", Priority.BATCH, "a"),
+        ("interactive", Priority.INTERACTIVE, "a"),
+    ])
+    assert order == ["interactive", "batch", "spec"]
+
+
+@pytest.mark.asyncio
+async def test_idle_tenants_are_forgotten():
+    scheduler = make_scheduler()
+    await run_jobs(scheduler, [(f"job{i}", Priority.BATCH, f"10.0.0.{i}") for i in range(20)])
+    assert scheduler._last_finish == {}
+
+
+@pytest.mark.asyncio
+async def test_tenants_share_a_class_fairly():
+    scheduler = make_scheduler()
+    jobs = [(f"big{i}", Priority.BATCH, "big") for i in range(4)]
+    jobs += [("small0", Priority.BATCH, "small"), ("small1", Priority.BATCH, "small")]
+    order = await run_jobs(scheduler, jobs)
+    assert order[:4] == ["big0", "small0", "big1", "small1"]
+    assert scheduler.status()["wait_seconds"]["batch"]["count"] == 6
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    scheduler = make_scheduler()
+    async with scheduler.slot(Priority.INTERACTIVE, "a"):
+        waiter = asyncio.create_task(scheduler.submit(asyncio.sleep, Priority.BATCH, "b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+    assert scheduler.status()["active"] == 0
+    await asyncio.wait_for(scheduler.submit(lambda: asyncio.sleep(0)), 1)
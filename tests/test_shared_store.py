@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+
+import pytest
+
+from app.storage.shared import IDLE_CHECK_SECONDS, SharedDatabase, SharedStoreError
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "store.sock")
+    server = subprocess.Popen([sys.executable, "-m", "app.storage.shared", path])
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            SharedDatabase(path, autostart=False)
+            break
+        except SharedStoreError:
+            assert time.monotonic() < deadline, "store process did not start"
+            time.sleep(0.05)
+    yield path
+    server.terminate()
+    server.wait()
+
+
+def test_workers_see_each_others_writes(socket_path, make_quiz):
+    worker_1 = SharedDatabase(socket_path, autostart=False)
+    worker_2 = SharedDatabase(socket_path, autostart=False)
+
+    worker_1.store_file("f1", "notes.txt", "txt", 5, b"hello")
+    quiz = worker_1.store_quiz(make_quiz())
+    assert worker_2.get_file_content("f1") == b"hello"
+    assert [q.id for q in worker_2.list_quizzes("f1")] == [quiz.id]
+    assert worker_2.delete_quiz(quiz.id)
+    assert worker_1.get_quiz(quiz.id) is None
+
+
+def test_concurrent_updates_and_deletes_are_atomic(socket_path, make_quiz):
+    workers = [SharedDatabase(socket_path, autostart=False) for _ in range(2)]
+    quiz = workers[0].store_quiz(make_quiz())
+
+    def update(i):
+        return workers[i % 2].update_quiz(quiz.id, {"title": f"Title {i}"})
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(update, range(40)))
+        deleted = pool.submit(workers[1].delete_quiz, quiz.id).result()
+        late = list(pool.map(update, range(4)))
+
+    assert all(r is not None for r in results) and deleted
+    assert late == [None] * 4 and workers[0].get_quiz(quiz.id) is None
+
+
+def test_socket_and_key_are_private(socket_path, monkeypatch):
+    assert os.stat(socket_path).st_mode & 0o777 == 0o600
+    assert os.stat(f"{socket_path}.key").st_mode & 0o777 == 0o600
+    monkeypatch.setenv("SHARED_STORE_AUTHKEY", "quiz-generator")
+    with pytest.raises(AuthenticationError):
+        SharedDatabase(socket_path, autostart=False)
+
+
+def test_autostarted_store_stops_after_the_last_worker(tmp_path):
+    path = str(tmp_path / "auto.sock")
+    worker_1 = SharedDatabase(path, autostart=True)
+    worker_2 = SharedDatabase(path, autostart=True)
+    worker_1.store_file("f1", "notes.txt", "txt", 5, b"hello")
+
+    worker_1.close()
+    time.sleep(IDLE_CHECK_SECONDS * 1.5)
+    assert worker_2.get_file_content("f1") == b"hello"
+
+    worker_2.close()
+    deadline = time.monotonic() + 10
+    while os.path.exists(path):
+        assert time.monotonic() < deadline, "store process did not stop"
+        time.sleep(0.05)
+    with pytest.raises(SharedStoreError):
+        SharedDatabase(path, autostart=False)
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.blob_store import BlobStore
+from app.database import InMemoryDatabase, get_database
+from app.models import TextExtractionResult
+from app.storage.snapshot import StorePersistence, JOURNAL_FILE, ROTATED_JOURNAL_FILE, SNAPSHOT_FILE
+from main import app
+
+
+async def open_store(directory):
+    db = InMemoryDatabase()
+    db.blobs = BlobStore(os.path.join(directory, "blobs"), write_through=True)
+    db.persistence = StorePersistence(db, directory)
+    await db.persistence.start()
+    while db.persistence.restoring:
+        await asyncio.sleep(0.01)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_snapshot_and_journal_survive_restart(tmp_path, make_quiz):
+    directory = str(tmp_path)
+    db = await open_store(directory)
+    db.store_file("f1", "notes.txt", "txt", 5, b"hello")
+    db.store_extracted_text(TextExtractionResult(file_id="f1", text_content="hello",
+                                                 word_count=1, extraction_time=0.1))
+    kept, removed = db.store_quiz(make_quiz()), db.store_quiz(make_quiz())
+    assert await db.persistence.snapshot() == 4
+    assert os.path.getsize(tmp_path / JOURNAL_FILE) == 0
+
+    # Changes after the snapshot only exist in the journal
+    db.delete_quiz(removed.id)
+    db.update_quiz(kept.id, {"title": "Renamed"})
+    added = db.store_quiz(make_quiz("f2"))
+    with open(tmp_path / JOURNAL_FILE, "a") as f:
+        f.write('{"op":"quiz","key":"torn')  # crash mid-write
+    for task in db.persistence._tasks:
+        task.cancel()
+
+    restored = await open_store(directory)
+    assert restored.persistence.restore_complete
+    assert restored.get_file_content("f1") == b"hello"
+    assert restored.get_file_info("f1").text_extracted
+    assert restored.get_quiz(removed.id) is None
+    assert restored.store_quiz(removed).version == 2  # not a repeat of the deleted ETag
+    assert restored.get_quiz(kept.id).title == "Renamed"
+    assert [q.id for q in restored.list_quizzes("f2")] == [added.id]
+    await restored.persistence.close()
+    assert os.path.exists(tmp_path / SNAPSHOT_FILE)
+
+
+@pytest.mark.asyncio
+async def test_live_writes_win_over_restore(tmp_path, make_quiz):
+    directory = str(tmp_path)
+    db = await open_store(directory)
+    quiz = db.store_quiz(make_quiz())
+    await db.persistence.close()
+
+    restored = InMemoryDatabase()
+    restored.persistence = StorePersistence(restored, directory)
+    await restored.persistence.start()
+    restored.delete_quiz(quiz.id)  # arrives before the background restore has run
+    restored.store_quiz(quiz.model_copy(update={"title": "Live"}))
+    while restored.persistence.restoring:
+        await asyncio.sleep(0.01)
+    assert restored.get_quiz(quiz.id).title == "Live"
+    await restored.persistence.close()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_fsyncs_off_the_event_loop(tmp_path, monkeypatch, make_quiz):
+    directory = str(tmp_path)
+    db = await open_store(directory)
+    quiz = db.store_quiz(make_quiz())
+    # A journal left over from a failed snapshot is extended, not replaced
+    with open(tmp_path / ROTATED_JOURNAL_FILE, "w") as f:
+        f.write(open(tmp_path / JOURNAL_FILE).read())
+    threads = []
+    fsync = os.fsync
+    monkeypatch.setattr("app.storage.snapshot.os.fsync",
+                        lambda fd: threads.append(threading.current_thread()) or fsync(fd))
+
+    assert await db.persistence.snapshot() == 1
+    assert threads and threading.main_thread() not in threads
+    assert not os.path.exists(tmp_path / ROTATED_JOURNAL_FILE)
+    await db.persistence.close()
+    restored = await open_store(directory)
+    assert restored.get_quiz(quiz.id) is not None
+    await restored.persistence.close()
+
+
+def test_misses_during_a_restore_ask_clients_to_retry(monkeypatch):
+    persistence = SimpleNamespace(restoring=True)
+    monkeypatch.setattr(get_database(), "persistence", persistence)
+    client = TestClient(app)
+    for method, path in [("GET", "/api/quizzes/missing"), ("PUT", "/api/quizzes/missing"),
+                         ("PATCH", "/api/quizzes/missing"), ("DELETE", "/api/quizzes/missing"),
+                         ("POST", "/api/quizzes/missing/duplicate"), ("GET", "/api/files/missing"),
+                         ("DELETE", "/api/files/missing")]:
+        body = [{"op": "replace", "path": "/title", "value": "x"}] if method == "PATCH" else {"title": "x"}
+        response = client.request(method, path, json=body if method in ("PUT", "PATCH") else None)
+        assert (response.status_code, response.headers.get("Retry-After")) == (503, "1"), (method, path)
+
+    persistence.restoring = False
+    assert client.get("/api/quizzes/missing").status_code == 404
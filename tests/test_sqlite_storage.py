@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import TextExtractionResult
+from app.quiz_generator import QuizGeneratorService
+from app.llm_client import LocalLLMClient
+from app.models import QuizGenerationRequest
+from app.storage.sqlite import SQLiteDatabase
+
+
+def test_roundtrip_and_ordering(tmp_path, make_quiz):
+    db = SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_file("f1", "notes.txt", "txt", 5, b"hello")
+    db.store_extracted_text(TextExtractionResult(file_id="f1", text_content="hello",
+                                                 word_count=1, extraction_time=0.1))
+    assert db.get_file_content("f1") == b"hello"
+    assert db.get_file_info("f1").text_extracted
+
+    now = datetime.now()
+    older, newer = make_quiz("f1", now - timedelta(minutes=1)), make_quiz("f1", now)
+    db.store_quizzes([older, newer])
+    db.store_quiz(make_quiz("f2", now))
+
+    assert [q.id for q in db.list_quizzes("f1")] == [newer.id, older.id]
+    assert len(db.list_quizzes()) == 3
+    assert db.update_quiz(older.id, {"title": "Renamed"}).title == "Renamed"
+    assert db.get_quiz(older.id).title == "Renamed"
+    assert db.delete_quiz(older.id) and db.get_quiz(older.id) is None
+    assert db.delete_file("f1") and db.get_extracted_text("f1") is None
+    db.close()
+
+    reopened = SQLiteDatabase(str(tmp_path / "quiz.db"))
+    assert reopened.get_quiz(newer.id).questions[0].question == "Is water wet?"
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_service_runs_on_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_MOCK_MODE", "true")
+    db = SQLiteDatabase(str(tmp_path / "quiz.db"))
+    content = ("Plate tectonics explains earthquakes and mountain building. " * 20).encode()
+    db.store_file("f1", "geo.txt", "txt", len(content), content)
+
+    service = QuizGeneratorService()
+    service.db = db
+    service.llm_client = LocalLLMClient()
+
+    quiz = await service.generate_quiz_from_file(
+        QuizGenerationRequest(file_id="f1", num_questions=2, use_question_bank=False)
+    )
+    assert (await service.get_quiz(quiz.id)).id == quiz.id
+    assert db.get_file_info("f1").word_count > 0
+    db.close()
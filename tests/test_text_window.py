@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import InMemoryDatabase, get_database
+from app.file_parser import FileParser, PAGE_MARK
+from app.models import TextExtractionResult
+from app.storage.sqlite import SQLiteDatabase
+from app.text_window import TextRangeError, iter_ndjson, text_range
+from main import app
+
+# Three pages: "alpha beta " / "gamma " / "delta"
+TEXT = "alpha beta gamma delta"
+OFFSETS = [0, 11, 17]
+
+
+def make_result(file_id="f1"):
+    return TextExtractionResult(file_id=file_id, text_content=TEXT, word_count=4,
+                                extraction_time=0.1, page_offsets=OFFSETS)
+
+
+def test_page_marks_become_offsets():
+    text = FileParser._clean_text(f"{PAGE_MARK}a  b\n{PAGE_MARK}{PAGE_MARK}  cd")
+    assert FileParser._split_pages(text) == ("a b cd", [0, 4, 4])
+
+
+def test_text_range():
+    assert text_range(len(TEXT), OFFSETS, page=2) == (11, 17)
+    assert text_range(len(TEXT), OFFSETS, page=3) == (17, 22)
+    assert text_range(len(TEXT), None, 5, 500) == (5, 22)
+    with pytest.raises(TextRangeError):
+        text_range(len(TEXT), OFFSETS, page=4)
+    with pytest.raises(TextRangeError):
+        text_range(len(TEXT), None, page=1)
+
+
+def test_ndjson_chunks_stop_at_pages():
+    lines = [json.loads(line) for line in iter_ndjson(make_result(), 6, 22, chunk_chars=4)]
+    assert lines[0]["page_count"] == 3 and (lines[0]["start"], lines[0]["end"]) == (6, 22)
+    assert [(line["offset"], line["page"]) for line in lines[1:]] == [
+        (6, 1), (10, 1), (11, 2), (15, 2), (17, 3), (21, 3)
+    ]
+    assert "".join(line["text"] for line in lines[1:]) == TEXT[6:]
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_backends_slice_in_place(backend, tmp_path):
+    db = InMemoryDatabase() if backend == "memory" else SQLiteDatabase(str(tmp_path / "quiz.db"))
+    db.store_file("f1", "notes.pdf", "pdf", 5, b"%PDF-")
+    db.store_extracted_text(make_result())
+
+    page = db.get_text_slice("f1", page=2)
+    assert (page.text, page.start, page.end, page.page_count) == ("gamma ", 11, 17, 3)
+    window = db.get_text_slice("f1", 6, 10)
+    assert (window.text, window.total_chars) == ("beta", 22)
+    assert db.get_extracted_text("f1").page_offsets == OFFSETS
+    assert db.get_text_slice("missing") is None
+    with pytest.raises(TextRangeError):
+        db.get_text_slice("f1", page=9)
+
+
+@pytest.fixture
+def client():
+    db = get_database()
+    db.store_file("window-file", "notes.pdf", "pdf", 5, b"%PDF-")
+    db.store_extracted_text(make_result("window-file").model_copy(
+        update={"text_content": TEXT * 100, "page_offsets": None}))
+    yield TestClient(app)
+    db.delete_file("window-file")
+
+
+def test_text_endpoint_windows_streams_and_compresses(client):
+    window = client.get("/api/files/window-file/text", params={"offset": 6, "length": 4})
+    assert window.json()["text"] == "beta"
+    assert client.get("/api/files/window-file/text", params={"page": 1}).status_code == 400
+
+    streamed = client.get("/api/files/window-file/text", params={"format": "ndjson"})
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    assert json.loads(streamed.text.splitlines()[0])["total_chars"] == len(TEXT) * 100
+
+    compressed = client.get("/api/files/window-file/text", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json()["text_content"] == TEXT * 100
+    plain = client.get("/api/files/window-file/text", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+@pytest.mark.asyncio
+async def test_gzipped_ndjson_arrives_before_the_stream_ends(client, monkeypatch, open_stream):
+    release = threading.Event()
+
+    def held_back(*args):
+        lines = iter_ndjson(*args)
+        yield next(lines)
+        release.wait(5)
+        yield from lines
+
+    monkeypatch.setattr("app.routers.upload.iter_ndjson", held_back)
+    messages, response = await open_stream(app, "GET", "/api/files/window-file/text",
+                                           query=b"format=ndjson", headers=[("Accept-Encoding", "gzip")])
+    start = await asyncio.wait_for(messages.get(), 5)
+    assert (b"content-encoding", b"gzip") in start["headers"]
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = await asyncio.wait_for(messages.get(), 5)
+    assert json.loads(decoder.decompress(first["body"]))["total_chars"] == len(TEXT) * 100
+    assert not response.done()
+
+    release.set()
+    body = b""
+    while True:
+        message = await asyncio.wait_for(messages.get(), 5)
+        body += decoder.decompress(message["body"])
+        if not message.get("more_body", False):
+            break
+    await response
+    assert "".join(json.loads(line)["text"] for line in body.splitlines()) == TEXT * 100